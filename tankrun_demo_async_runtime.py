@@ -0,0 +1,354 @@
+"""
+这是 Left 4 Dead 2 插件企划 "下一代 Tank Run 优化方案" 对应的 demo. 本 demo 用于在一个进程中, 基于 asyncio 同时为多个对局运行 tankrun_demo_director.py 中的导演系统.
+与 tankrun_demo_match_host.py 的进程池不同, 本 demo 中所有对局共享一个事件循环: 每个对局拥有独立的 directorExecutionFrequency 定时器, 定时器到期时以该对局最新的客户端快照执行一次插件的主程序.
+
+单个对局的执行周期耗时很短 (主要为 computeCurrSurvivorStress), 因此一个事件循环足以承载大量负载较轻的对局, 且内存开销远小于每个对局一个进程.
+对局的状态切换与 tankrun_demo_match_host.py 相同 (MatchRuntime), 执行结果与该对局单独运行时完全一致
+
+快照的输入与决策的输出均不会阻塞事件循环:
+    输入: submitSnapshot 只保存每个对局最新的快照, 执行周期到来之前被新快照覆盖的旧快照被舍弃并计数
+    输出: 决策被放入 decisionQueue (asyncio.Queue), 队列已满时舍弃最旧的决策并计数; 也可以为对局指定回调函数
+
+用法示例:
+    python tankrun_demo_async_runtime.py --matches 64 --seconds 10
+"""
+
+# --------------------------------------------------------------------------------------------------------------------------------------------------- #
+
+import argparse
+import asyncio
+import math
+import time
+
+import tankrun_demo_director as director
+from tankrun_demo_match_host import MatchRuntime, captureMatchSnapshot
+
+
+""" --- 运行时所需全局变量 --- """
+
+# 决策队列的默认容量, 为 0 时不限制
+defaultDecisionQueueSize = 4096
+
+# 用于错开各个对局定时器的黄金分割比例, 使各个对局的执行周期均匀分布在 directorExecutionFrequency 之内
+staggerRatio = ( math.sqrt( 5.0 ) - 1.0 ) / 2.0
+
+
+
+
+""" --- 对局 --- """
+
+class AsyncMatch:
+    """
+    事件循环中的一个对局: 导演系统状态 (MatchRuntime), 最新的快照, 决策回调, 定时器任务, 以及统计信息
+    """
+    def __init__(self, matchID, seed: int, phase: float, onDecision = None):
+        self.matchID = matchID
+        self.runtime = MatchRuntime( matchID, seed )
+        self.onDecision = onDecision
+
+        # 定时器相对于运行时启动时间的偏移 (秒)
+        self.phase = phase
+
+        # 最新的快照, 被执行周期取走后置为 None
+        self.pendingSnapshot = None
+
+        self.task = None
+
+        # 执行周期的次数, 错过的时间点数量, 没有新快照而跳过的执行周期数量, 被覆盖的快照数量
+        self.tickNum = 0
+        self.missedDeadlines = 0
+        self.starvedTicks = 0
+        self.droppedSnapshots = 0
+
+        # 累计 / 最长的执行耗时, 以及最大的延迟 (实际开始时间 减去 应该开始的时间)
+        self.busyTime = 0.0
+        self.worstTickDuration = 0.0
+        self.worstLateness = 0.0
+
+
+    def counters(self):
+        return {
+            "matchID": self.matchID,
+            "ticks": self.tickNum,
+            "missedDeadlines": self.missedDeadlines,
+            "starvedTicks": self.starvedTicks,
+            "droppedSnapshots": self.droppedSnapshots,
+            "meanTickDuration": self.busyTime / self.tickNum if self.tickNum > 0 else 0.0,
+            "worstTickDuration": self.worstTickDuration,
+            "worstLateness": self.worstLateness,
+        }
+
+
+
+
+""" --- 运行时 --- """
+
+class AsyncDirectorRuntime:
+    """
+    在一个 asyncio 事件循环中运行多个对局的导演系统; 每个对局以 period 为周期独立调度, 超时时舍弃错过的时间点 (与 TickScheduler 的 "skip" 策略相同)
+    """
+    def __init__(self, period: float = director.directorExecutionFrequency, survivorType: str = "Survivor", tankType: str = "Tank",
+                 decisionQueueSize: int = defaultDecisionQueueSize):
+        """
+        parameters:
+        @period: 执行周期的时间步长 (秒)
+        @survivorType, @tankType: 生还者和坦克客户端的 client.type() 返回值, 详见 bindHost
+        @decisionQueueSize: decisionQueue 的容量, 为 0 时不限制
+        """
+        if period <= 0:
+            raise ValueError("period must be positive !")
+
+        self.period = period
+
+        director.bindHost( director.Game, survivorType, tankType )
+
+        # matchID -> AsyncMatch
+        self.matches = {}
+
+        # 所有对局的决策 (MatchDecision), 由使用者通过 await decisionQueue.get() 读取
+        self.decisionQueue = asyncio.Queue( maxsize = decisionQueueSize )
+        self.droppedDecisions = 0
+
+        # 运行时启动的时间 (事件循环的时间), 为 None 时表示尚未启动
+        self.startTime = None
+
+
+    def addMatch(self, matchID, seed: int = 0, onDecision = None):
+        """
+        加入一个对局; 如果运行时已经启动, 该对局的定时器立即开始
+
+        parameters:
+        @onDecision: 可选的回调函数, 以 MatchDecision 为参数; 不为 None 时决策不放入 decisionQueue
+        """
+        if matchID in self.matches:
+            raise ValueError("match %s already exists !" % ( matchID, ))
+
+        phase = ( len( self.matches ) * staggerRatio ) % 1.0 * self.period
+
+        match = AsyncMatch( matchID, seed, phase, onDecision )
+        self.matches[ matchID ] = match
+
+        if self.startTime is not None:
+            match.task = asyncio.get_running_loop().create_task( self.runMatch( match ) )
+
+        return match
+
+
+    def removeMatch(self, matchID):
+        match = self.matches.pop( matchID )
+
+        if match.task is not None:
+            match.task.cancel()
+
+        return match
+
+
+    def submitSnapshot(self, matchID, snapshot):
+        """
+        提交一个对局最新的快照 (MatchSnapshot), 不阻塞; 尚未被执行周期取走的旧快照被舍弃
+        """
+        match = self.matches[ matchID ]
+
+        if match.pendingSnapshot is not None:
+            match.droppedSnapshots += 1
+
+        match.pendingSnapshot = snapshot
+
+
+    def publishDecision(self, match: AsyncMatch, decision):
+        """
+        输出一个决策, 不阻塞; 队列已满时舍弃最旧的决策
+        """
+        if match.onDecision is not None:
+            match.onDecision( decision )
+            return
+
+        if self.decisionQueue.full():
+            self.decisionQueue.get_nowait()
+            self.droppedDecisions += 1
+
+        self.decisionQueue.put_nowait( decision )
+
+
+    async def runMatch(self, match: AsyncMatch):
+        """
+        一个对局的定时器: 等待下一个时间点, 以最新的快照执行一次插件的主程序, 并输出决策
+        """
+        loop = asyncio.get_running_loop()
+
+        # 运行时启动之后加入的对局从下一个与其偏移对齐的时间点开始
+        nextDeadline = self.startTime + match.phase
+        now = loop.time()
+
+        if nextDeadline < now:
+            nextDeadline += math.ceil( ( now - nextDeadline ) / self.period ) * self.period
+
+        while True:
+
+            waitTime = nextDeadline - loop.time()
+
+            if waitTime > 0:
+                await asyncio.sleep( waitTime )
+
+            startTime = loop.time()
+            match.worstLateness = max( match.worstLateness, startTime - nextDeadline )
+
+            snapshot = match.pendingSnapshot
+            match.pendingSnapshot = None
+
+            if snapshot is None:        # 游戏尚未提交新的快照, 跳过本次执行周期, 以免滑动窗口重复记录相同的数据
+                match.starvedTicks += 1
+
+            else:
+                tickStartTime = time.perf_counter()
+
+                decision = match.runtime.tick( snapshot )
+
+                duration = time.perf_counter() - tickStartTime
+
+                match.tickNum += 1
+                match.busyTime += duration
+                match.worstTickDuration = max( match.worstTickDuration, duration )
+
+                self.publishDecision( match, decision )
+
+            # 推进到下一个时间点, 舍弃所有已经错过的时间点
+            nextDeadline += self.period
+            now = loop.time()
+
+            if now >= nextDeadline:
+                missedNum = int( math.floor( ( now - nextDeadline ) / self.period ) ) + 1
+
+                match.missedDeadlines += missedNum
+                nextDeadline += missedNum * self.period
+
+            # 即使没有等待也让出一次事件循环, 使其他对局和快照的输入不被饿死
+            if waitTime <= 0:
+                await asyncio.sleep( 0 )
+
+
+    async def start(self):
+        """
+        启动所有对局的定时器, 必须在事件循环中调用
+        """
+        loop = asyncio.get_running_loop()
+
+        self.startTime = loop.time()
+
+        for match in self.matches.values():
+            if match.task is None:
+                match.task = loop.create_task( self.runMatch( match ) )
+
+        return True
+
+
+    async def stop(self):
+        """
+        停止所有对局的定时器
+        """
+        tasks = [ match.task for match in self.matches.values() if match.task is not None ]
+
+        for task in tasks:
+            task.cancel()
+
+        await asyncio.gather( *tasks, return_exceptions = True )
+
+        for match in self.matches.values():
+            match.task = None
+
+        self.startTime = None
+
+        return True
+
+
+    def report(self):
+        """
+        返回运行时的统计信息: 每个对局的统计, 以及所有对局的合计
+        """
+        matchCounters = [ match.counters() for match in self.matches.values() ]
+
+        total = {
+            "matches": len( matchCounters ),
+            "ticks": sum( counters[ "ticks" ] for counters in matchCounters ),
+            "missedDeadlines": sum( counters[ "missedDeadlines" ] for counters in matchCounters ),
+            "starvedTicks": sum( counters[ "starvedTicks" ] for counters in matchCounters ),
+            "droppedSnapshots": sum( counters[ "droppedSnapshots" ] for counters in matchCounters ),
+            "droppedDecisions": self.droppedDecisions,
+            "busyTime": sum( match.busyTime for match in self.matches.values() ),
+            "worstLateness": max( ( counters[ "worstLateness" ] for counters in matchCounters ), default = 0.0 ),
+        }
+
+        return { "total": total, "matches": matchCounters }
+
+
+
+
+""" --- 离线演示 --- """
+
+async def feedWorld(runtime: AsyncDirectorRuntime, matchID, world, period: float):
+    """
+    模拟游戏一侧的快照输入: 以 period 为周期推进模拟世界, 并提交快照
+    """
+    while True:
+        world.advance( period )
+        runtime.submitSnapshot( matchID, captureMatchSnapshot( world ) )
+
+        await asyncio.sleep( period )
+
+
+async def runDemo(matchNum: int, survivorNum: int, tankNum: int, seconds: float, seed: int):
+    import tankrun_demo_simulator as simulator
+
+    period = director.directorExecutionFrequency
+
+    runtime = AsyncDirectorRuntime( period, simulator.SURVIVOR, simulator.TANK )
+
+    decisionNum = [ 0 ]
+    tankRequestNum = [ 0 ]
+
+    async def consumeDecisions():
+        while True:
+            decision = await runtime.decisionQueue.get()
+
+            decisionNum[0] += 1
+            tankRequestNum[0] += sum( 1 for group in decision.groups if group.whetherRequestTank )
+
+    feeders = []
+
+    for matchID in range( matchNum ):
+        world = simulator.buildWorld( survivorNum, tankNum, seed + matchID )
+        runtime.addMatch( matchID, seed + matchID )
+        feeders.append( asyncio.get_running_loop().create_task( feedWorld( runtime, matchID, world, period ) ) )
+
+    consumer = asyncio.get_running_loop().create_task( consumeDecisions() )
+
+    await runtime.start()
+    await asyncio.sleep( seconds )
+    await runtime.stop()
+
+    for task in feeders + [ consumer ]:
+        task.cancel()
+
+    await asyncio.gather( *feeders, consumer, return_exceptions = True )
+
+    total = runtime.report()[ "total" ]
+
+    print( "%d matches for %.1f s: %d match ticks, %d decisions, %d tank requests" % ( matchNum, seconds, total[ "ticks" ], decisionNum[0], tankRequestNum[0] ) )
+    print( "missed deadlines=%d starved ticks=%d dropped snapshots=%d dropped decisions=%d worst lateness=%.1f ms" % (
+        total[ "missedDeadlines" ], total[ "starvedTicks" ], total[ "droppedSnapshots" ], total[ "droppedDecisions" ], total[ "worstLateness" ] * 1e3 ) )
+    print( "director CPU time %.3f s (%.1f%% of one core)" % ( total[ "busyTime" ], total[ "busyTime" ] / seconds * 100.0 ) )
+
+
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser( description = "Run many Tank Run director instances on one asyncio event loop." )
+    parser.add_argument( "--matches", type = int, default = 32 )
+    parser.add_argument( "--survivors", type = int, default = 4 )
+    parser.add_argument( "--tanks", type = int, default = 2 )
+    parser.add_argument( "--seconds", type = float, default = 5.0 )
+    parser.add_argument( "--seed", type = int, default = 0 )
+    args = parser.parse_args()
+
+    asyncio.run( runDemo( args.matches, args.survivors, args.tanks, args.seconds, args.seed ) )
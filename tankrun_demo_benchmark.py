@@ -0,0 +1,323 @@
+"""
+这是 Left 4 Dead 2 插件企划 "下一代 Tank Run 优化方案" 对应的 demo. 本 demo 用于测量 tankrun_demo_director.py 中插件主程序各个流程的耗时.
+本 demo 在 tankrun_demo_simulator.py 的模拟世界中, 按照不同的生还者数量和坦克数量执行插件的主程序, 并统计每个流程的 平均 / p99 / 最大 耗时以及内存峰值.
+
+插件每 directorExecutionFrequency 秒执行一次, 因此单次执行周期的预算为 directorExecutionFrequency 秒 (默认 100 毫秒), 且与游戏服务器共享 CPU
+
+用法示例:
+    python tankrun_demo_benchmark.py
+    python tankrun_demo_benchmark.py --survivors 14 --tanks 22 --ticks 2000
+    python tankrun_demo_benchmark.py --memory
+"""
+
+# --------------------------------------------------------------------------------------------------------------------------------------------------- #
+
+import argparse
+import json
+import math
+import random
+import sys
+import tracemalloc
+
+import tankrun_demo_director as director
+import tankrun_demo_instrumentation as instrumentation
+import tankrun_demo_simulator as simulator
+
+
+""" --- 基准测试所需全局变量 --- """
+
+# 默认扫描的生还者数量, 从 4 人到 14 人 (超过 14 人会强制结束游戏)
+defaultSurvivorNums = ( 4, 8, 11, 14 )
+
+# 默认扫描的坦克数量, 从 0 个到 tankLimit 个
+defaultTankNums = ( 0, 6, 12, director.tankLimit )
+
+# 每个配置在计时之前预先执行的次数, 使滑动窗口填充完毕
+defaultWarmupTicks = 200
+
+# 每个配置计时的执行次数
+defaultMeasuredTicks = 1000
+
+""" --- 统计 --- """
+
+def percentile(sortedValues: list, p: float):
+    """
+    返回已排序数组的第 p 百分位数 (最近秩法)
+    """
+    if len( sortedValues ) <= 0:
+        return 0.0
+
+    rank = max( 1, int( math.ceil( p / 100.0 * len( sortedValues ) ) ) )
+    return sortedValues[ rank - 1 ]
+
+
+def summarize(values: list):
+    """
+    返回 ( 平均值, p99, 最大值 ), 单位为秒
+    """
+    if len( values ) <= 0:
+        return 0.0, 0.0, 0.0
+
+    sortedValues = sorted( values )
+    return sum( sortedValues ) / len( sortedValues ), percentile( sortedValues, 99.0 ), sortedValues[ -1 ]
+
+
+
+
+""" --- 基准测试 --- """
+
+def benchmarkConfig(survivorNum: int, tankNum: int, warmupTicks: int = defaultWarmupTicks,
+                    measuredTicks: int = defaultMeasuredTicks, seed: int = 0):
+    """
+    在包含 survivorNum 个生还者和 tankNum 个坦克的模拟世界中测量插件主程序各个流程的耗时
+
+    各个流程的耗时由 tankrun_demo_instrumentation.py 中的性能统计记录, 流程的划分与 runDirectorTickPhases 一致;
+    为了避免 tracemalloc 影响计时, 内存峰值在另外一次相同种子的执行中测量, 此时不启用性能统计
+
+    return:
+    包含各个流程统计结果的字典, 时间单位为秒, 内存单位为字节
+    """
+    dt = director.directorExecutionFrequency
+
+
+    # --- 计时 --- #
+
+    random.seed( seed )
+    world = simulator.installWorld( simulator.buildWorld( survivorNum, tankNum, seed ) )
+
+    for _ in range( warmupTicks ):
+        world.advance( dt )
+        director.runDirectorTick()
+
+    tickInstrumentation = instrumentation.enable( instrumentation.DirectorInstrumentation( historyLength = max( 1, measuredTicks ) ) )
+
+    try:
+        for _ in range( measuredTicks ):
+            world.advance( dt )
+            if not director.runDirectorTick():
+                break
+    finally:
+        instrumentation.disable()
+
+    # 只统计完整执行了所有流程的执行周期
+    records = [ record for record in tickInstrumentation.recentTicks if "8.recordTickData" in record[ "phases" ] ]
+
+    samples = {}
+
+    for record in records:
+        for name, elapsed in record[ "phases" ].items():
+            samples.setdefault( name, [] ).append( elapsed )
+
+    samples[ "tick" ] = [ record[ "duration" ] for record in records ]
+
+
+    # --- 内存峰值 --- #
+
+    random.seed( seed )
+    world = simulator.installWorld( simulator.buildWorld( survivorNum, tankNum, seed ) )
+
+    for _ in range( warmupTicks ):
+        world.advance( dt )
+        director.runDirectorTick()
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[ 0 ]
+
+    for _ in range( min( measuredTicks, 200 ) ):
+        world.advance( dt )
+        director.runDirectorTick()
+
+    peakMemory = tracemalloc.get_traced_memory()[ 1 ] - baseline
+    tracemalloc.stop()
+
+
+    result = {
+        "survivors": survivorNum,
+        "tanks": tankNum,
+        "ticks": len( samples[ "tick" ] ),
+        "peakMemory": peakMemory,
+        "phases": {},
+        "countersPerTick": tickInstrumentation.report()[ "countersPerTick" ],
+    }
+
+    for name, values in samples.items():
+        mean, p99, maximum = summarize( values )
+        result[ "phases" ][ name ] = { "mean": mean, "p99": p99, "max": maximum }
+
+    return result
+
+
+
+
+def formatResult(result: dict, budget: float = director.directorExecutionFrequency):
+    """
+    将 benchmarkConfig 的结果格式化为表格, 时间单位为微秒, 最后一列为平均耗时占单次执行周期预算的百分比
+    """
+    lines = [
+        "survivors=%d tanks=%d ticks=%d peak memory=%.1f KiB" % (
+            result[ "survivors" ], result[ "tanks" ], result[ "ticks" ], result[ "peakMemory" ] / 1024.0 ),
+        "  %-38s %10s %10s %10s %9s" % ( "phase", "mean(us)", "p99(us)", "max(us)", "budget%" ),
+    ]
+
+    for name, stats in result[ "phases" ].items():
+        lines.append( "  %-38s %10.1f %10.1f %10.1f %8.3f%%" % (
+            name, stats[ "mean" ] * 1e6, stats[ "p99" ] * 1e6, stats[ "max" ] * 1e6, stats[ "mean" ] / budget * 100.0 ) )
+
+    counters = result.get( "countersPerTick", {} )
+
+    if len( counters ) > 0:
+        lines.append( "  per tick: " + ", ".join( "%s=%.1f" % ( name, counters[ name ] ) for name in sorted( counters ) ) )
+
+    return "\n".join( lines )
+
+
+
+
+def deepSizeOf(obj, seen: set = None):
+    """
+    递归统计 obj 及其引用的所有对象占用的字节数, 同一个对象只统计一次
+
+    不统计 字符串 (切片, 状态和逻辑均为共享的字面量), None / 布尔值, 客户端快照 (属于游戏的数据, 不属于实例化类),
+    以及所有实例化类共享的状态存储 (每个槽位占用的字节数另外通过 bytesPerSlot 统计)
+    """
+    if seen is None:
+        seen = set()
+
+    if id( obj ) in seen or obj is None or isinstance( obj, ( str, bool, director.ClientSnapshot, director.EntityStateStore ) ):
+        return 0
+
+    seen.add( id( obj ) )
+
+    size = sys.getsizeof( obj )
+
+    if isinstance( obj, dict ):
+        for key, value in obj.items():
+            size += deepSizeOf( key, seen ) + deepSizeOf( value, seen )
+
+    elif isinstance( obj, ( list, tuple, set ) ):
+        for value in obj:
+            size += deepSizeOf( value, seen )
+
+    else:
+        for cls in type( obj ).__mro__:
+            for name in getattr( cls, "__slots__", () ):
+                size += deepSizeOf( getattr( obj, name, None ), seen )
+
+        if hasattr( obj, "__dict__" ):
+            size += deepSizeOf( obj.__dict__, seen )
+
+    return size
+
+
+
+
+def measureFootprint(survivorNum: int = 8, tankNum: int = director.tankLimit, warmupTicks: int = defaultWarmupTicks, seed: int = 0):
+    """
+    测量每个实例化类占用的内存, 生还者类包括两个滑动窗口 (以及挂载的累计量) 中的所有数据; 先执行 warmupTicks 次插件的主程序, 使滑动窗口填充完毕
+    生还者类和坦克类的字节数包括各自在状态存储中占用的一个槽位
+
+    return:
+    包含 每个生还者 / 每个坦克 / 每个组别 (不包括成员) 平均字节数的字典
+    """
+    random.seed( seed )
+    world = simulator.installWorld( simulator.buildWorld( survivorNum, tankNum, seed ) )
+
+    for _ in range( warmupTicks ):
+        world.advance( director.directorExecutionFrequency )
+        director.runDirectorTick()
+
+    survivorClassList = director.last_survivorClassList
+    tankClassList = director.last_tankClassList
+    groupClassList = director.last_survivorGroupClassList
+
+    survivorSlotBytes = director.survivorStateStore.bytesPerSlot()
+    tankSlotBytes = director.tankStateStore.bytesPerSlot()
+
+    survivorBytes = [ deepSizeOf( surClass ) + survivorSlotBytes for surClass in survivorClassList ]
+    tankBytes = [ deepSizeOf( tankClass ) + tankSlotBytes for tankClass in tankClassList ]
+
+    # 组别类的成员属于生还者类, 预先标记为已统计
+    groupBytes = [ deepSizeOf( groupClass, { id( member ) for member in groupClass.survivorMembers } ) for groupClass in groupClassList ]
+
+    def average(values):
+        return sum( values ) / len( values ) if len( values ) > 0 else 0.0
+
+    return {
+        "survivors": len( survivorClassList ),
+        "tanks": len( tankClassList ),
+        "groups": len( groupClassList ),
+        "bytesPerSurvivor": average( survivorBytes ),
+        "bytesPerTank": average( tankBytes ),
+        "bytesPerGroup": average( groupBytes ),
+    }
+
+
+
+
+def formatFootprint(footprint: dict):
+    """
+    将 measureFootprint 的结果格式化为文本
+    """
+    return "\n".join( [
+        "survivors=%d tanks=%d groups=%d" % ( footprint[ "survivors" ], footprint[ "tanks" ], footprint[ "groups" ] ),
+        "  bytes per survivor (including both sliding windows) %10.0f" % footprint[ "bytesPerSurvivor" ],
+        "  bytes per tank                                      %10.0f" % footprint[ "bytesPerTank" ],
+        "  bytes per group (excluding members)                 %10.0f" % footprint[ "bytesPerGroup" ],
+    ] )
+
+
+
+
+def runSweep(survivorNums = defaultSurvivorNums, tankNums = defaultTankNums, warmupTicks: int = defaultWarmupTicks,
+             measuredTicks: int = defaultMeasuredTicks, seed: int = 0):
+    """
+    扫描所有 ( 生还者数量, 坦克数量 ) 的组合, 返回结果列表
+    """
+    results = []
+
+    for survivorNum in survivorNums:
+        for tankNum in tankNums:
+            results.append( benchmarkConfig( survivorNum, tankNum, warmupTicks, measuredTicks, seed ) )
+
+    return results
+
+
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser( description = "Per-phase tick benchmark of the Tank Run director." )
+    parser.add_argument( "--survivors", type = int, nargs = "+", default = list( defaultSurvivorNums ) )
+    parser.add_argument( "--tanks", type = int, nargs = "+", default = list( defaultTankNums ) )
+    parser.add_argument( "--warmup", type = int, default = defaultWarmupTicks )
+    parser.add_argument( "--ticks", type = int, default = defaultMeasuredTicks )
+    parser.add_argument( "--seed", type = int, default = 0 )
+    parser.add_argument( "--stress-engine", choices = ( "scalar", "numpy" ), default = "scalar" )
+    parser.add_argument( "--json", action = "store_true", help = "print raw results as JSON" )
+    parser.add_argument( "--memory", action = "store_true", help = "report per-entity memory footprint instead of timings" )
+    args = parser.parse_args()
+
+    director.setSurvivorStressEngine( args.stress_engine )
+
+    if args.memory:
+        footprints = [ measureFootprint( survivorNum, max( args.tanks ), args.warmup, args.seed ) for survivorNum in args.survivors ]
+
+        if args.json:
+            print( json.dumps( footprints, indent = 2 ) )
+        else:
+            for footprint in footprints:
+                print( formatFootprint( footprint ) )
+                print()
+
+        sys.exit( 0 )
+
+    sweepResults = runSweep( args.survivors, args.tanks, args.warmup, args.ticks, args.seed )
+
+    if args.json:
+        print( json.dumps( sweepResults, indent = 2 ) )
+
+    else:
+        for sweepResult in sweepResults:
+            print( formatResult( sweepResult ) )
+            print()
@@ -8,9 +8,47 @@
 
 # --------------------------------------------------------------------------------------------------------------------------------------------------- #
 
+from __future__ import annotations      # 推迟类型注解的求值, 使得 Client 等由游戏提供的类型即便不存在, 本模块也可以被导入
+
+import array
+import bisect
+import builtins
+import collections
 import math
 import random
 import copy
+import heapq
+
+
+""" --- 由游戏 (插件运行环境) 提供的对象 --- """
+
+# 在游戏中, 下面的对象由插件运行环境直接提供 (模块的全局变量或者内置名称), 此处不会覆盖它们;
+# 只有在运行环境没有提供时才使用下面的默认值, 离线运行时 (例如 tankrun_demo_simulator.py 中的模拟世界), 请调用 bindHost 函数注入
+
+# 游戏对象, 提供 getAllClients, Time, getTotalFlowDistance 等函数
+Game = globals().get( "Game", getattr( builtins, "Game", None ) )
+
+# 客户端类型, 与 client.type() 的返回值进行比较
+Survivor = globals().get( "Survivor", getattr( builtins, "Survivor", "Survivor" ) )
+Tank = globals().get( "Tank", getattr( builtins, "Tank", "Tank" ) )
+
+
+def bindHost( game, survivorType = "Survivor", tankType = "Tank" ):
+    """
+    为本模块注入游戏对象和客户端类型, 仅在游戏以外的环境 (模拟世界, 基准测试等) 中调用
+
+    parameters:
+    @game: 实现了 getAllClients, Time, getTotalFlowDistance 函数的游戏对象
+    @survivorType: 生还者客户端的 client.type() 返回值
+    @tankType: 坦克客户端的 client.type() 返回值
+    """
+    global Game, Survivor, Tank
+
+    Game = game
+    Survivor = survivorType
+    Tank = tankType
+
+    return True
 
 
 """ --- 自定义 "导演系统" 所需全局变量 --- """
@@ -71,6 +109,32 @@ last_survivorClassList = []
 # 存储 上一次插件执行周期中 所有坦克实例化类, 用于坦克类信息在不同执行周期中的传递
 last_tankClassList = []
 
+# 生还者类和坦克类的 双缓冲 注册表, 记录每个执行周期中 新加入 / 已离开 / 被更新 的实例化类; 在 createSurvivorRegistry / createTankRegistry 定义后初始化
+survivorRegistry = None
+tankRegistry = None
+
+# 按照导演路程维护生还者先后顺序的容器, 可以查询生还者的排名; 在 FlowDistanceOrder 定义后初始化
+survivorOrder = None
+
+# 执行周期内的 maxD 距离缓存, 在每个执行周期开始时清空, 供分组策略和压力值的计算共同使用; 在 DistanceCache 定义后初始化
+tickDistanceCache = None
+
+# 生还者类和坦克类的 结构数组 (struct of arrays) 状态存储, 每个实例化类占用一个固定的槽位; 在 SurvivorStateStore / EntityStateStore 定义后初始化
+survivorStateStore = None
+tankStateStore = None
+
+# 执行周期内组别检查的统计, 在每个执行周期开始时清空; 在 GroupEvaluationCounter 定义后初始化
+tickGroupEvaluationCounter = None
+
+# 执行周期内各个组别的继承关系以及合并与拆分, 由分组策略填写; 在 GroupLineage 定义后初始化
+tickGroupLineage = None
+
+# 按照请求坦克的时间点 ( lastSpawnTime + spawnInterval ) 排列生还者组别的最小堆, 坦克生成器只取出已经到达时间点的组别; 在 TankRequestSchedule 定义后初始化
+tankRequestSchedule = None
+
+# 当前执行周期的客户端快照, 每个客户端在每个执行周期中只被读取一次, 后续的所有流程均使用快照中的数据, 详见 takeClientSnapshot 函数
+clientSnapshotBatch = None
+
 # 存储 当前 所有生还者组别实例化类
 survivorGroupClassList = []
 
@@ -118,43 +182,179 @@ survivorSpreadRadius = 660.0
 # 宽裕度, 详见 "方案" 第 1.1.6 小节: 前后为难的压力
 alpha = 50.0
 
+# 计算生还者压力值所使用的引擎: "scalar" 为逐个计算的 computeCurrSurvivorStress, "numpy" 为 tankrun_demo_vectorized_stress.py 中的向量化版本
+# 两者的计算结果完全一致, 可以根据服务器的环境 (是否安装了 NumPy) 分别设置, 请通过 setSurvivorStressEngine 函数修改
+survivorStressEngine = "scalar"
+
+# 成员构成和成员的状态都没有变化时, 是否跳过组别的检查, 详见 SurvivorGroupClass.updateSurvivorGroupInfo
+# 跳过与否不改变任何决策, 设置为 False 仅用于验证 (tankrun_demo_simulator.py --verify skip)
+groupEvaluationSkipping = True
+
+
+
+# --- 性能统计 --- #
+
+# 可选的性能统计, 为 None 时不统计; 请通过 tankrun_demo_instrumentation.py 中的 enable / disable 函数启用和关闭, 详见该文件
+instrumentation = None
+
+
+
+# --- 执行周期的世界常量 --- #
+
+# 当前执行周期开始时读取的游戏时间和地图完整导演路程 (TickContext), 执行周期以外为 None; 请通过 currentGameTime / currentTotalFlowDistance 函数读取
+tickContext = None
+
+# 是否在每个执行周期开始时只读取一次游戏时间和地图完整导演路程; 设置为 False 时每次调用 currentGameTime / currentTotalFlowDistance 都直接读取游戏对象,
+# 仅用于验证两者的决策一致 (tankrun_demo_simulator.py --verify clock)
+tickContextSampling = True
+
+
+
+# --- 快照录制 --- #
+
+# 可选的快照录制器, 为 None 时不录制; 每个执行周期获取客户端之后, 将当前的快照写入录制文件, 详见 tankrun_demo_trace.py, 请通过 setTraceRecorder 函数修改
+traceRecorder = None
+
 
 
 
 """ --- 获取所需要的客户端 --- """
 
-def getSatisfiedClientFromGame():  
+def snapshotClient(client: Client, clientType = None, focusedTarget = None):
     """
-    获取并返回所有满足条件的客户端列表和各自的数量
+    读取一个客户端的数据并返回对应的 ClientSnapshot, 只读取该类型的客户端会被用到的数据
+
+    parameters:
+    @client: 游戏提供的客户端
+    @clientType: 已经读取过的 client.type(), 为 None 时在函数内部读取
+    @focusedTarget: 坦克的仇恨目标 (已经生成的快照, None 或者 -1), 其他类型的客户端忽略该参数
     """
-    # 存储生还者客户端 (不 包括死亡和旁观生还者)
-    satisfiedSurvivorClients = []   
+    if clientType is None:
+        clientType = client.type()
 
-    # 存储坦克客户端
-    tankClients = []
+    if clientType == Survivor:
+        return ClientSnapshot(
+            clientType, client.getIdentification(), client.getAbsolutePosition(), client.getFlowDistance(),
+            client.isIncapacitied(), client.isHangingLedge(), client.isDead(), client.isAway(), client.isInFinalCheckPoint(), None
+        )
 
-    # 记录生还者客户端数量 (包括死亡和旁观生还者)
-    survivorClientNum = 0
+    if clientType == Tank:
+        return ClientSnapshot(
+            clientType, client.getIdentification(), client.getAbsolutePosition(), client.getFlowDistance(),
+            False, False, False, False, False, focusedTarget
+        )
 
-    # 记录坦克客户端数量
-    tankClientNum = 0
+    # 其他类型的客户端 (例如坦克的仇恨目标为其他实体) 只会被比较类型
+    return ClientSnapshot( clientType, None, None, None, False, False, False, False, False, None )
 
-    for client in Game.getAllClients():  # 假设游戏获取所有客户端的函数为getAllClients
-        
-        if client.type() == Survivor:   # 假设获取客户端类型的函数为type
-            
-            survivorClientNum += 1
 
-            if (not client.isDead()) and (not client.isAway()):   # 获取所有 非 死亡和旁观的生还者
-                
-                satisfiedSurvivorClients.append(client)
 
-        elif client.type() == Tank:   # 获取所有在场的坦克
-            
-            tankClientNum += 1
-            tankClients.append(client)
-    
-    return satisfiedSurvivorClients, survivorClientNum, tankClients, tankClientNum
+
+def takeClientSnapshot(game = None):
+    """
+    遍历一次 Game.getAllClients(), 将每个客户端的数据读取一次并打包为 ClientSnapshotBatch
+
+    每一次对游戏 (插件运行环境) 接口的调用都需要跨越插件与服务器的边界, 是插件中开销最大的操作之一;
+    并且执行周期中的各个流程如果分别读取客户端, 读到的数据可能不一致. 因此后续的所有流程只使用快照中的数据, 而不再调用 Client 的函数
+
+    parameters:
+    @game: 读取客户端的游戏对象, 为 None 时使用 Game; 多个对局共用一个进程时 (详见 tankrun_demo_match_host.py), 用于读取其他对局的客户端
+
+    return:
+    @snapshotBatch: 当前执行周期的 ClientSnapshotBatch
+    """
+    if game is None:
+        game = Game
+
+    rawClients = game.getAllClients()        # 假设游戏获取所有客户端的函数为getAllClients
+
+    snapshotBatch = ClientSnapshotBatch()
+
+    # 坦克的仇恨目标需要指向目标的快照, 因此先为其他客户端生成快照, 再为坦克生成快照
+    snapshotByClient = {}       # id( 客户端 ) -> 快照
+    pendingTanks = []
+
+    for client in rawClients:
+
+        clientType = client.type()      # 假设获取客户端类型的函数为type, 每个客户端只调用一次
+
+        if clientType == Tank:
+            pendingTanks.append( client )
+            continue
+
+        snapshot = snapshotClient( client, clientType )
+        snapshotByClient[ id( client ) ] = snapshot
+
+        if clientType == Survivor:
+            snapshotBatch.addSurvivor( snapshot )
+
+    for client in pendingTanks:
+
+        focusedTarget = client.getFocusedTarget()   # 假设获取坦克仇恨目标的函数为 getFocusedTarget, 数据类型为Client (或非Client)
+
+        if ( focusedTarget is not None ) and ( focusedTarget != -1 ):
+
+            targetSnapshot = snapshotByClient.get( id( focusedTarget ) )
+
+            if targetSnapshot is None:      # 游戏每次返回不同的客户端对象, 或者仇恨目标不在 getAllClients 中
+                targetType = focusedTarget.type()
+
+                if targetType == Survivor:      # 优先通过唯一标识查找已经生成的快照
+                    targetSnapshot = snapshotBatch.byID.get( focusedTarget.getIdentification() )
+
+                if targetSnapshot is None:
+                    targetSnapshot = snapshotClient( focusedTarget, targetType )
+
+            focusedTarget = targetSnapshot
+
+        snapshot = snapshotClient( client, Tank, focusedTarget )
+        snapshotByClient[ id( client ) ] = snapshot
+
+        snapshotBatch.addTank( snapshot )
+
+    # 按照 getAllClients 的顺序保存所有客户端的快照 (包括死亡和旁观的生还者, 以及其他类型的客户端)
+    snapshotBatch.clients = [ snapshotByClient[ id( client ) ] for client in rawClients ]
+
+    return snapshotBatch
+
+
+
+
+def currentGameTime():
+    """
+    返回当前执行周期开始时的游戏时间; 在执行周期以外调用 (或者 tickContextSampling 为 False) 时, 直接读取 Game.Time()
+    """
+    if tickContext is not None:
+        return tickContext.time
+
+    return Game.Time()
+
+
+
+
+def currentTotalFlowDistance():
+    """
+    返回当前执行周期开始时的地图完整导演路程; 在执行周期以外调用 (或者 tickContextSampling 为 False) 时, 直接读取 Game.getTotalFlowDistance()
+    """
+    if tickContext is not None:
+        return tickContext.totalFlowDistance
+
+    return Game.getTotalFlowDistance()
+
+
+
+
+def getSatisfiedClientFromGame(snapshotBatch: ClientSnapshotBatch = None):  
+    """
+    获取并返回所有满足条件的客户端列表和各自的数量, 列表中的元素为 ClientSnapshot
+
+    parameters:
+    @snapshotBatch: 当前执行周期的客户端快照, 为 None 时在函数内部调用 takeClientSnapshot
+    """
+    if snapshotBatch is None:
+        snapshotBatch = takeClientSnapshot()
+
+    return snapshotBatch.satisfiedSurvivorClients, snapshotBatch.survivorClientNum, snapshotBatch.tankClients, snapshotBatch.tankClientNum
 
 
 
@@ -162,15 +362,24 @@ def getSatisfiedClientFromGame():
 """ --- 自定义 "导演系统" 所需函数和算法 --- """
 
 def euclideanDistance(pos1: tuple, pos2: tuple):    # 计算欧式距离, 输入数据为两个三元组坐标
-    eD = math.sqrt(
-        (pos1[0] - pos2[0]) ** 2 + (pos1[1] - pos2[1]) ** 2 + (pos1[2] - pos2[2]) ** 2
-    )
+    eD = math.sqrt( squaredEuclideanDistance( pos1, pos2 ) )
 
     return eD
 
 
 
 
+def squaredEuclideanDistance(pos1: tuple, pos2: tuple):     # 计算欧式距离的平方, 用于与阈值的平方比较, 省去开方运算
+    # 使用乘法而不是 ** 2 计算平方: 乘法的结果是精确舍入的, 而 ** 2 (pow) 偶尔会有 1 个最小精度单位的误差, 且无法与向量化版本保持一致
+    dx = pos1[0] - pos2[0]
+    dy = pos1[1] - pos2[1]
+    dz = pos1[2] - pos2[2]
+
+    return dx * dx + dy * dy + dz * dz
+
+
+
+
 def maxDistance( dataOfMainTarget: tuple, dataOfDeputyTarget: tuple ):
     """
     计算 mainTarget 和 deputyTarget 的 maxD 距离, 其中 mainTarget 是主要目标 (为 mainTarget 计算 maxD 距离), deputyTarget 是副目标
@@ -254,9 +463,22 @@ def callStressComputeModel( D: float, modelType: str, gamma: float ):
 
 
 
+# --- 以下函数创建生还者类和坦克类的注册表, 注册表的定义详见 EntityRegistry 类 --- #
+
+def createSurvivorRegistry( doubleBuffered: bool = False ):
+    return EntityRegistry( SurvivorClass, SurvivorClass.updateSurvivorInfo, "survivorID", doubleBuffered, SurvivorClass.releaseState )
+
+
+def createTankRegistry( doubleBuffered: bool = False ):
+    return EntityRegistry( TankClass, TankClass.updateTankInfo, "tankID", doubleBuffered, TankClass.releaseState )
+
+
+
+
 # --- 以下函数搭建生还者和生还者组别之间的桥梁 --- #
 
-def getSurvivorClassListSortedByFlowDist(satisfiedSurvivorClients: list, last_survivorClassList: list):
+def getSurvivorClassListSortedByFlowDist(satisfiedSurvivorClients: list, last_survivorClassList: list, registry: EntityRegistry = None,
+                                         order: FlowDistanceOrder = None):
     """
     实例化所有满足条件的生还者客户端为生还者类, 并按照导演路程的先后顺序排序
     注意, 对于已经被实例化的生还者客户端, 不需要再次实例化, 而是更新其对应实例化类的信息
@@ -265,228 +487,280 @@ def getSurvivorClassListSortedByFlowDist(satisfiedSurvivorClients: list, last_su
     parameters:
     @satisfiedSurvivorClients: 从游戏中获取的 生还者客户端 列表
     @last_survivorClassList: 上一个插件执行周期中的 生还者实例化类 列表
+    @registry: 生还者类的注册表, 调用结束后其中记录了 新加入 / 已离开 / 被更新 的生还者; 为 None 时使用临时的注册表
+    @order: 维护生还者先后顺序的容器, 调用结束后可以通过 rankOf 查询生还者的排名; 为 None 时使用临时的容器 (从头排序)
 
     return:
     @survivorClassList: 当前的 生还者实例化类 列表
     """
+    if registry is None:
+        registry = createSurvivorRegistry()
+
+    # 以 survivorID 为键建立索引, 每个生还者客户端只需 O(1) 即可找到自己的实例化类, 而不必遍历 last_survivorClassList
+    registry.load( last_survivorClassList )
+
     if len(satisfiedSurvivorClients) <= 0:      # 没有存活的生还者, 异常值处理, 注意不可以使用 survivorClientNum <= 0 进行判断
+        registry.reconcile( [] )        # 记录所有离开的生还者
+
+        if order is not None:
+            order.update( [] )
+
         return []    # 实例化生还者类失败
     
-    survivorClassList = []
-    
 
     # --- 创建新的survivorClassList --- #
 
     # 请确保 satisfiedSurvivorClients 和 last_survivorClassList 添加的数据都是生还者客户端
-    
-    if len(last_survivorClassList) > 0:     # 过去存在生还者实例化类, 说明插件已经不是第一次执行
-
-        for surClient in satisfiedSurvivorClients:
-            
-            findClassFlag = False   # 生还者客户端是否找到了自己的实例化类
-
-            for surClass in last_survivorClassList:
-
-                if surClient.getIdentification() == surClass.survivorID:         # 假设获取客户端唯一标识的方法为getIdentification, 不可使用steamID, 出于对闲置的考虑
-                    
-                    surClass.updateSurvivorInfo(surClient)      # 更新对应实例化类的数据
-                    survivorClassList.append(surClass)      # 存入更新后的生还者实例化类
-
-                    findClassFlag = True        # 生还者客户端找到了自己的实例化类
-                    break       # 结束查找
-                
-            if not findClassFlag:       # 如果生还者客户端没有找到自己的实例化类, 说明其有可能刚刚复活 / 加入游戏, 为其创建实例化类
-                
-                surClass = SurvivorClass(surClient)
-                survivorClassList.append(surClass)      # 存入新创建的生还者实例化类
-
-    else:       # 过去不存在生还者实例化类, 说明插件是第一次执行
-        
-        for surClient in satisfiedSurvivorClients:
 
-            surClass = SurvivorClass(surClient)
-            survivorClassList.append(surClass)
+    survivorClassList = registry.reconcile( satisfiedSurvivorClients )
 
 
     # --- 为刚刚创建的survivorClassList排序 --- #
 
-    # 自行实现按照实例化类的属性进行排序的算法, 因为不确定插件的ArrayList类是否自带类似的功能; 如果有, 下面的内容可以忽略
-    # 冒泡排序, 按导演路程 降序 排序, 即靠前的生还者实例化类排在前面
+    # 按导演路程 降序 排序, 即靠前的生还者实例化类排在前面; 导演路程相同时按 survivorID 升序排列
+    # 以上一个插件执行周期的顺序为起点增量修复, 代替每次都从头执行的冒泡排序, 详见 FlowDistanceOrder 类
 
-    num = len(survivorClassList)
+    if order is None:
+        order = FlowDistanceOrder()
 
-    for i in range( 0, num ):       # 左闭右开区间
-        
-        for j in range( 0, num - i - 1 ):
-            
-            if survivorClassList[ j ].flowDistance < survivorClassList[ j + 1 ].flowDistance:   # 将导演路程数值较小的实例化类逐步向列表末尾移动
-                
-                temp = survivorClassList[j]     # 临时变量
-                survivorClassList[j] = survivorClassList[j + 1]
-                survivorClassList[j + 1] = temp
+    survivorClassList = order.update( survivorClassList )
 
     return survivorClassList    # 返回已经经过了排序的生还者实例化类队列
 
 
 
-def survivorGroupingStrategy(survivorClassList: list, last_survivorGroupClassList: list):
+def groupSurvivorsByFlowBand(survivorClassList: list, distanceCache: DistanceCache = None):
     """
-    通过分组策略为生还者类队列分组, 并为每一个组别创建对应的生还者组别实例化类, 同时按照创建的顺序加入数组中
-    生还者分组策略详见 "方案" 第 1.1.4 小节: 生还者分组策略;
-    注意, 这里还涉及到生还者组别类的合并与拆分策略, 详见 "方案" 第 3.1.3 小节: 生还者组别合并和拆分时数据的合并和复制
-    组别实例化类在数组中的先后顺序 等价于 组别在 导演路程 中的先后顺序
+    按照生还者分组策略将生还者类划分为若干个成员列表, 详见 "方案" 第 1.1.4 小节: 生还者分组策略
+
+    从第一个仍然等待分配的生还者开始创建组别, 组别中的每一个成员按照先后顺序与 所有 仍然等待分配的生还者比较 maxD 距离,
+    小于等于 survivorSpreadRadius 的生还者按照导演路程的先后顺序加入该组别, 直到没有新的成员加入为止
+
+    由于 maxD 距离不小于两者导演路程之差, 导演路程之差大于 survivorSpreadRadius 的两个生还者不可能被划分进同一个组别;
+    当 survivorClassList 已经按照导演路程 降序 排序时, 每个成员只需要通过二分查找, 检查导演路程位于 [ f - survivorSpreadRadius, f + survivorSpreadRadius ] 的连续区间,
+    同时使用 并查集 (nextWaiting) 在 O(α(n)) 的时间内跳过已经被分配的生还者, 而不必从等待分配的列表中逐个删除 (O(n));
+    分组结果 (包括组别内成员的先后顺序) 与逐个比较所有生还者的做法完全一致
 
     parameters:
-    @survivorClassList: 已经经过处理的 生还者实例化类 列表
-    @last_survivorGroupClassList: 上一个插件执行周期中的 组别实例化类 列表
+    @survivorClassList: 按照导演路程 降序 排序的 生还者实例化类 列表; 如果没有排序, 则退化为与所有等待分配的生还者比较
+    @distanceCache: 执行周期内的 maxD 距离缓存, 为 None 时使用临时的缓存
 
     return:
-    @survivorGroupClassList: 当前的 组别实例化类 列表
+    成员列表的列表, 各个组别的先后顺序等价于它们在导演路程中的先后顺序
     """
-    if len( survivorClassList ) <= 0:     # 异常值处理
-        return []
+    num = len( survivorClassList )
 
+    if distanceCache is None:
+        distanceCache = DistanceCache()
 
-    survivorGroupClassList = []
-    
-    # waitingForAllocation = survivorClassList.copy()     # 等待分配的生还者类, 为了避免修改原本的 survivorClassList, 需要进行复制
-    # 如果插件不存在类似copy功能的函数, 那么请参照如下方法划分新内存并复制原本的生还者类:
-    waitingForAllocation = []
+    flowDistances = [ surClass.flowDistance for surClass in survivorClassList ]
 
-    for surClass in survivorClassList:
-        waitingForAllocation.append( surClass.clone() )     # 使用自定义的克隆方法
+    # 取反后为升序, 便于使用 bisect 进行二分查找
+    negFlowDistances = [ -flowDistance for flowDistance in flowDistances ]
 
+    isSorted = all( negFlowDistances[ i ] <= negFlowDistances[ i + 1 ] for i in range( num - 1 ) )
 
-    # --- 创建新的survivorGroupClassList --- #
+    # 区间的半径略大于 survivorSpreadRadius, 以免浮点数误差导致漏掉边界上的生还者; 区间内的生还者仍然需要计算 maxD 距离
+    bandRadius = survivorSpreadRadius + 1e-6
 
-    # 请确保 survivorClassList / waitingForAllocation 中的生还者类已经全部按照导演路程的取值 降序 排序
+    # 并查集, find( i ) 返回下标 >= i 的第一个 仍然等待分配 的生还者的下标, num 为哨兵
+    nextWaiting = list( range( num + 1 ) )
+
+    def find( i ):
+        while nextWaiting[ i ] != i:
+            nextWaiting[ i ] = nextWaiting[ nextWaiting[ i ] ]      # 路径减半
+            i = nextWaiting[ i ]
+        return i
+
+    groups = []
+    first = 0
+
+    while True:
+
+        first = find( first )       # 第一个仍然等待分配的生还者, 成为新组别的首位生还者
+
+        if first >= num:        # 所有生还者都已经被划分进某一个组别
+            break
+
+        nextWaiting[ first ] = first + 1        # 移除 已经划分进组别的生还者
+
+        memberIndexes = [ first ]
+        index = 0
+
+        while index < len( memberIndexes ):
+
+            member = survivorClassList[ memberIndexes[ index ] ]
+            memberData = ( member.absolutePosition, member.flowDistance )
+
+            if isSorted:
+                lo = bisect.bisect_left( negFlowDistances, -( member.flowDistance + bandRadius ) )
+                hi = bisect.bisect_right( negFlowDistances, -( member.flowDistance - bandRadius ) )
+            else:
+                lo = 0
+                hi = num
+
+            j = find( lo )
+
+            while j < hi:
 
-    while len(waitingForAllocation) > 0:        # 仍然存在生还者没有被划分进某一个组别
+                if distanceCache.maxDistance(
+                    survivorClassList[ j ].survivorID, ( survivorClassList[ j ].absolutePosition, survivorClassList[ j ].flowDistance ),
+                    member.survivorID, memberData
+                ) <= survivorSpreadRadius:      # 这两个生还者之间的 maxD 距离 小于等于 生还者传播半径
+
+                    memberIndexes.append( j )       # 加入
+                    nextWaiting[ j ] = j + 1        # 移除
+
+                j = find( j + 1 )
+
+            # 每一个已经加入了组别的生还者都需要与 所有 仍然等待分配的生还者 进行比较
+            index += 1
+
+        groups.append( [ survivorClassList[ i ] for i in memberIndexes ] )
 
+    return groups
 
-        # --- 创建一个新的生还者组别 --- #
 
-        survivorClassListGroupingByStrategy = []        # 初始化生还者类的 子 列表, 代表了一个新的组别
 
-        firstSurvivorClass = waitingForAllocation[0]        # 确定该组别的首位生还者
+def groupSurvivorsByNestedScan(survivorClassList: list):
+    """
+    逐个比较所有仍然等待分配的生还者的分组方法 (即 groupSurvivorsByFlowBand 之前 survivorGroupingStrategy 中的做法), 不使用二分查找和 maxD 距离缓存;
+    结果与 groupSurvivorsByFlowBand 相同, 仅用于验证和对比耗时 (tankrun_demo_simulator.py --verify band)
+    """
+    waitingForAllocation = list( survivorClassList )
 
-        survivorClassListGroupingByStrategy.append( firstSurvivorClass )
+    groups = []
 
-        waitingForAllocation.remove( firstSurvivorClass )       # 移除 已经划分进组别的生还者
+    while len( waitingForAllocation ) > 0:
 
-        index = 0       # 从 survivorClassListGroupingByStrategy 的第一个生还者开始, 向后计算 maxD 的数值, 逐个检查 仍然等待分配的生还者 是否可以加入到该组别中
+        survivorClassListGroupingByStrategy = [ waitingForAllocation.pop( 0 ) ]
 
-        j = 0       # 遍历 waitingForAllocation 中元素的下标, 注意 waitingForAllocation 内的元素数量可能会发生改变, 因为有可能会在循环体内部执行删除操作
+        index = 0
 
         while index < len( survivorClassListGroupingByStrategy ):
 
+            j = 0
+
             while j < len( waitingForAllocation ):
 
-                if maxDistance( 
+                if maxDistance(
                     ( waitingForAllocation[ j ].absolutePosition, waitingForAllocation[ j ].flowDistance ),
                     ( survivorClassListGroupingByStrategy[ index ].absolutePosition, survivorClassListGroupingByStrategy[ index ].flowDistance )
-                ) <= survivorSpreadRadius:      # 这两个生还者之间的 maxD 距离 小于等于 生还者传播半径
-                    
-                    survivorClassListGroupingByStrategy.append( waitingForAllocation[ j ] )      # 加入
+                ) <= survivorSpreadRadius:
 
-                    waitingForAllocation.remove( waitingForAllocation[ j ] )     # 移除, 此时下标j 不 应该自增
+                    survivorClassListGroupingByStrategy.append( waitingForAllocation.pop( j ) )      # 移除, 此时下标j 不 应该自增
 
                 else:
 
                     j += 1
 
-            # 每一个已经加入了 survivorClassListGroupingByStrategy 的生还者都需要与 所有 仍然在 waitingForAllocation 的生还者 进行比较
             index += 1
-            j = 0
 
+        groups.append( survivorClassListGroupingByStrategy )
 
-        # --- 这个新的生还者组别的成员名单已经确定完毕, 启动生还者组别合并与拆分策略, 并将更新了信息后的组别实例化类加入到 survivorGroupClassList 中 --- #
-        
-        # 考虑到一个组别可能会在一个执行周期内被拆分成 多个 组别的小概率事件, 因此不直接在 原内存地址 更新 last_groupClass 的各项信息,
-        # 而是 划分出一个新的内存地址, 将原本 last_groupClass 的所有信息深度复制过去, 再更新其中的信息,
-        # 以避免修改原本 last_groupClass 中的任何信息, 因为这是任何周期内组别的合并与拆分的基准
+    return groups
 
-        updatedGroupClass = None
-        
-        if len( last_survivorGroupClassList ) > 0:          # 过去存在组别实例化类, 说明插件已经不是第一次执行
 
-            findGroupBindFirstSurvivor = False        # 是否找到了该组别 首位生还者 过去所在的组别
 
-            for groupClass in last_survivorGroupClassList:
+def survivorGroupingStrategy(survivorClassList: list, last_survivorGroupClassList: list, distanceCache: DistanceCache = None, lineage: GroupLineage = None):
+    """
+    通过分组策略为生还者类队列分组, 并为每一个组别创建对应的生还者组别实例化类, 同时按照创建的顺序加入数组中
+    生还者分组策略详见 "方案" 第 1.1.4 小节: 生还者分组策略;
+    注意, 这里还涉及到生还者组别类的合并与拆分策略, 详见 "方案" 第 3.1.3 小节: 生还者组别合并和拆分时数据的合并和复制
+    组别实例化类在数组中的先后顺序 等价于 组别在 导演路程 中的先后顺序
 
-                if firstSurvivorClass in groupClass.survivorMembers:        # 找到了首位生还者过去所在的组别
+    parameters:
+    @survivorClassList: 已经经过处理的 生还者实例化类 列表
+    @last_survivorGroupClassList: 上一个插件执行周期中的 组别实例化类 列表
+    @distanceCache: 执行周期内的 maxD 距离缓存, 为 None 时使用临时的缓存
+    @lineage: 记录各个组别继承关系以及合并与拆分的 GroupLineage, 为 None 时不记录
 
-                    # updatedGroupClass = copy.deepcopy( groupClass )         # deepcopy 确保组别类中的 所有数组 也一并划分新内存地址, 请根据插件中类似功能的函数进行实现
-                    # 可以通过如下方法划分内存并复制:
+    return:
+    @survivorGroupClassList: 当前的 组别实例化类 列表
+    """
+    if len( survivorClassList ) <= 0:     # 异常值处理
+        return []
 
-                    updatedGroupClass = groupClass.clone()          # 自定义克隆方法
-                    updatedGroupClass.updateSurvivorGroupInfo( survivorClassListGroupingByStrategy )
-                    
-                    survivorGroupClassList.append( updatedGroupClass )      # 将更新后的组别实例化信息加入到 survivorGroupClassList 中
 
-                    findGroupBindFirstSurvivor = True
-                    break       # 结束查找
+    survivorGroupClassList = []
+    
+    waitingForAllocation = list( survivorClassList )     # 等待分配的生还者类, 只复制列表本身, 不复制其中的生还者类
+
+    # 上一个执行周期组别中的生还者类与当前的生还者类不是同一个实例化类, 需要通过 survivorID 查找成员过去所在的组别;
+    # 以 survivorID 为键, 在每个执行周期中只建立一次 survivorID -> 过去所在的组别 的索引, 每个成员 O(1) 查找, 而不必遍历上一个执行周期的所有组别及其成员, 详见 buildSurvivorMembershipIndex 函数
+    lastMembershipIndex = buildSurvivorMembershipIndex( last_survivorGroupClassList )
+
+    if lineage is not None:
+        lineage.clear()
 
-            if not findGroupBindFirstSurvivor:      # 该 首位生还者 过去没有存在于任何生还者组别中, 已经排除掉插件第一次执行的情况, 那么说明生还者刚刚复活 / 加入游戏
 
-                # --- 下面的代码为原本不存在于 "方案" 中的新增功能, 请仔细阅读注释 ---#
+    # --- 创建新的survivorGroupClassList --- #
 
-                # 一个过去不存在于任何生还者组别中的生还者, 突然成为了某一组别的首位生还者, 那么大概率是被后方的生还者使用电击器复活,
-                # 或者从前方的复活门中复活. 因此, 通常来讲复活的生还者所属的组别的成员数量 大于1
-                # 如果根据这个过去不存在的首位生还者, 直接创建一个与所有现存的生还者组别都没有任何关系的新组别, 显然不太合理
-                # 因此, 应该 跳过 该首位生还者, 而在该组别内向后查找 第一位 过去存在于某个生还者组别中 的生还者, 继承其之前所属组别的属性, 才是相对合理的处理方式;
-                # 此功能理论上可以与上面的代码合并成 一个 循环体, 但为了方便理解功能的设计, 还是选择拆分成多个循环体
+    # 请确保 survivorClassList / waitingForAllocation 中的生还者类已经全部按照导演路程的取值 降序 排序
+    # 分组的过程详见 groupSurvivorsByFlowBand 函数, 各个组别按照首位生还者的先后顺序返回
 
-                if len( survivorClassListGroupingByStrategy ) <= 1:     # 极少数异常情况下, 才会为 该过去不存在的生还者 初始化一个生还者组别类
+    for survivorClassListGroupingByStrategy in groupSurvivorsByFlowBand( waitingForAllocation, distanceCache ):
 
-                    updatedGroupClass = SurvivorGroupClass( survivorClassListGroupingByStrategy )
-                    survivorGroupClassList.append( updatedGroupClass )      # 将新创建的组别实例化信息加入到 survivorGroupClassList 中
 
-                else:
+        # --- 一个新的生还者组别, 这个新的生还者组别的成员名单已经确定完毕, 启动生还者组别合并与拆分策略, 并将更新了信息后的组别实例化类加入到 survivorGroupClassList 中 --- #
+        
+        # 考虑到一个组别可能会在一个执行周期内被拆分成 多个 组别的小概率事件, 因此不直接在 原内存地址 更新 last_groupClass 的各项信息,
+        # 而是 划分出一个新的内存地址, 将原本 last_groupClass 的所有信息深度复制过去, 再更新其中的信息,
+        # 以避免修改原本 last_groupClass 中的任何信息, 因为这是任何周期内组别的合并与拆分的基准
 
-                    findGroup = False       # 找到了该组别后面的生还者过去所在的组别
-                    index = 1       # 遍历 survivorClassListGroupingByStrategy 的下标, 除去首位生还者
+        # 该组别成员过去所在的组别, 按照成员的先后顺序排列, 不重复; 每个成员通过索引 O(1) 查找
+        sourceGroupClasses = []
 
-                    while index < len( survivorClassListGroupingByStrategy ):
+        for surClass in survivorClassListGroupingByStrategy:
 
-                        for groupClass in last_survivorGroupClassList:
+            sourceMembership = lastMembershipIndex.get( surClass.survivorID )
 
-                            if survivorClassListGroupingByStrategy[ index ] in groupClass.survivorMembers:      # 找到了后面的生还者过去所在的组别
+            if sourceMembership is not None and sourceMembership[0] not in sourceGroupClasses:
+                sourceGroupClasses.append( sourceMembership[0] )
 
-                                # updatedGroupClass = copy.deepcopy( groupClass )
+        # 继承的组别: 首位生还者过去所在的组别;
+        # 如果首位生还者过去不存在于任何生还者组别中 (已经排除掉插件第一次执行的情况), 那么说明生还者刚刚复活 / 加入游戏
 
-                                updatedGroupClass = groupClass.clone()      # 自定义克隆方法
-                                updatedGroupClass.updateSurvivorGroupInfo( survivorClassListGroupingByStrategy )
+        # --- 下面的规则为原本不存在于 "方案" 中的新增功能, 请仔细阅读注释 ---#
 
-                                survivorGroupClassList.append( updatedGroupClass )      # 将更新后的组别实例化信息加入到 survivorGroupClassList 中
+        # 一个过去不存在于任何生还者组别中的生还者, 突然成为了某一组别的首位生还者, 那么大概率是被后方的生还者使用电击器复活,
+        # 或者从前方的复活门中复活. 因此, 通常来讲复活的生还者所属的组别的成员数量 大于1
+        # 如果根据这个过去不存在的首位生还者, 直接创建一个与所有现存的生还者组别都没有任何关系的新组别, 显然不太合理
+        # 因此, 应该 跳过 该首位生还者, 而在该组别内向后查找 第一位 过去存在于某个生还者组别中 的生还者, 继承其之前所属组别的属性, 才是相对合理的处理方式;
+        # 由于 sourceGroupClasses 按照成员的先后顺序排列, 两种情况下继承的组别都是 sourceGroupClasses[0]
+        # 只有该组别的所有生还者过去都不存在于任何组别中 (插件第一次执行, 或者异常情况) 时, 才初始化一个生还者组别类
 
-                                findGroup = True
-                                break       # 结束查找
+        if len( sourceGroupClasses ) > 0:
 
-                        if findGroup:       # 如果已经成功更新实例化信息并加入了 survivorGroupClassList 中, 那么不再检查后面的生还者
-                            break
+            ancestorGroupClass = sourceGroupClasses[0]
 
-                        index += 1
+            # updatedGroupClass = copy.deepcopy( ancestorGroupClass )         # deepcopy 确保组别类中的 所有数组 也一并划分新内存地址, 请根据插件中类似功能的函数进行实现
+            # 可以通过如下方法划分内存并复制:
 
-                    
-                    if not findGroup:       # 如果该组别的后方生还者也没有任何一个生还者之前存在于某一个组别中 (异常情况), 那么就 初始化一个生还者组别类
+            updatedGroupClass = ancestorGroupClass.clone()          # 自定义克隆方法
+            updatedGroupClass.updateSurvivorGroupInfo( survivorClassListGroupingByStrategy )
 
-                        updatedGroupClass = SurvivorGroupClass( survivorClassListGroupingByStrategy )
-                        survivorGroupClassList.append( updatedGroupClass )      # 将新创建的组别实例化信息加入到 survivorGroupClassList 中
+        else:
 
-        
-        else:        # 过去不存在组别实例化类, 说明插件第一次执行
+            ancestorGroupClass = None
 
             updatedGroupClass = SurvivorGroupClass( survivorClassListGroupingByStrategy )
-            survivorGroupClassList.append( updatedGroupClass )
+
+        survivorGroupClassList.append( updatedGroupClass )      # 将更新 / 新创建的组别实例化信息加入到 survivorGroupClassList 中
+
+        if lineage is not None:
+            lineage.record( updatedGroupClass, ancestorGroupClass, sourceGroupClasses )
 
     
+    if lineage is not None:
+        lineage.finish()
+
     return survivorGroupClassList       # 返回 生还者组别实例化类 队列, 各个组别在队列中的先后顺序等价于它们在导演路程中的先后顺序
 
 
 
 
-def getTankClassList(tankClients: list, last_tankClassList: list):
+def getTankClassList(tankClients: list, last_tankClassList: list, registry: EntityRegistry = None):
     """
     实例化所有的坦克客户端为坦克类
     注意, 对于已经被实例化的坦克客户端, 不需要再次实例化, 而是更新其对应实例化类的信息
@@ -495,71 +769,89 @@ def getTankClassList(tankClients: list, last_tankClassList: list):
     parameters:
     @tankClients: 从游戏中获取的 坦克客户端 列表
     @last_tankClassList: 上一个插件执行周期中的 坦克实例化类 列表
+    @registry: 坦克类的注册表, 调用结束后其中记录了 新加入 / 已离开 / 被更新 的坦克; 为 None 时使用临时的注册表
 
     return:
     @tankClassList: 当前的 坦克实例化类 列表
     """
+    if registry is None:
+        registry = createTankRegistry()
+
+    # 以 tankID 为键建立索引, 每个坦克客户端只需 O(1) 即可找到自己的实例化类, 而不必遍历 last_tankClassList
+    registry.load( last_tankClassList )
+
     if len(tankClients) <= 0:      # 当前没有存活的坦克
+        registry.reconcile( [] )        # 记录所有离开的坦克
         return []
-    
-    tankClassList = []
 
 
     # --- 创建新的tankClassList --- #
 
     # 请确保 tankClients 和 last_tankClassList 添加的数据都是坦克客户端
-    
-    if len(last_tankClassList) > 0:     # 过去存在坦克实例化类
 
-        for tkClient in tankClients:
-            
-            findClassFlag = False   # 坦克客户端是否找到了自己的实例化类
+    tankClassList = registry.reconcile( tankClients )
 
-            for tkClass in last_tankClassList:
+    return tankClassList    # 返回坦克实例化类队列
 
-                if tkClient.getIdentification() == tkClass.tankID:         # 假设获取客户端唯一标识的方法为getIdentification
-                    
-                    tkClass.updateTankInfo(tkClient)      # 更新对应实例化类的数据
-                    tankClassList.append(tkClass)      # 存入更新后的坦克实例化类
 
-                    findClassFlag = True        # 坦克客户端找到了自己的实例化类
-                    break       # 结束查找
-                
-            if not findClassFlag:       # 如果坦克客户端没有找到自己的实例化类, 为其创建实例化类
-                
-                tkClass = TankClass(tkClient)
-                tankClassList.append(tkClass)      # 存入新创建的坦克实例化类
 
-    else:       # 过去不存在坦克实例化类
-        
-        for tkClient in tankClients:
 
-            tkClass = TankClass(tkClient)
-            tankClassList.append(tkClass)
+def buildSurvivorMembershipIndex(survivorGroupClassList: list):
+    """
+    在分组策略执行完毕后调用, 为每一个生还者建立 survivorID -> ( 所在的组别实例化类, 在该组别成员列表中的下标 ) 的索引,
+    使 computeCurrSurvivorStress 可以在 O(1) 的时间内找到坦克的仇恨目标所在的组别和位置, 而不必遍历所有组别及其成员
 
-    return tankClassList    # 返回坦克实例化类队列
+    return:
+    survivorID -> ( groupClass, memberIndex ) 的字典
+    """
+    membershipIndex = {}
+
+    for groupClass in survivorGroupClassList:
+
+        for memberIndex, surClass in enumerate( groupClass.survivorMembers ):
 
+            if surClass.survivorID not in membershipIndex:      # 与逐个遍历时一致, 以第一次出现的位置为准
+                membershipIndex[ surClass.survivorID ] = ( groupClass, memberIndex )
 
+    return membershipIndex
 
 
-def computeCurrSurvivorStress(survivorGroupClassList: list, tankClassList: list):
+
+
+def computeCurrSurvivorStress(survivorGroupClassList: list, tankClassList: list, membershipIndex: dict = None,
+                              distanceCache: DistanceCache = None):
     """
     为各个生还者组别中的成员计算他们的压力值, 只有当实例化了所有 生还者类, 生还者组别类, 坦克类 以后, 才调用此函数;
     生还者压力值的计算公式详见 “方案” 第 1.1.7, 1.1.8, 1.2.2, 1.2.3, 1.3.1, 1.3.2 小节;
+
+    parameters:
+    @membershipIndex: buildSurvivorMembershipIndex 返回的索引, 为 None 时在函数内部建立
+    @distanceCache: 执行周期内的 maxD 距离缓存, 为 None 时使用临时的缓存;
+                    D(t, si) 对于每个生还者都相同, D(t, s) 在情况 2.1 中会被使用两次, D(s, si) 对于仇恨目标相同的坦克都相同, 因此均只计算一次
     """
     if len( survivorGroupClassList ) <= 0:      # 异常处理
         return False
 
+    if membershipIndex is None:
+        membershipIndex = buildSurvivorMembershipIndex( survivorGroupClassList )
+
+    if distanceCache is None:
+        distanceCache = DistanceCache()
+
 
     # --- 下面的代码即便 len( tankClassList ) <= 0 时也可以执行, 因为游戏进行中没有出现任何坦克时不算作出现异常, 此时所有生还者的压力值应为 0 --- #
 
+    # 绝对坐标和导演路程从状态存储中读取, 每个坦克和生还者只读取一次, 而不是在每一对 ( 生还者, 坦克 ) 中重复读取
+    tankDataList = [ ( tankClass, ( tankClass.absolutePosition, tankClass.flowDistance ) ) for tankClass in tankClassList ]
+
     for groupClass in survivorGroupClassList:       # 遍历所有组别
 
-        for surClass in groupClass.survivorMembers:      # 遍历该组别中的所有成员
+        for surIndex, surClass in enumerate( groupClass.survivorMembers ):      # 遍历该组别中的所有成员, surIndex 为该成员在组别中的下标
 
+            surStatus = surClass.status
             
             # 如果该生还者处于 I 或者 S 状态, 那么其压力值统一设置为0
-            if surClass.status == "I" or surClass.status == "S":
+            if surStatus == "I" or surStatus == "S":
 
                 surClass.currSurvivorStress = 0.0
                 continue            # 跳过后面的代码, 计算下一个生还者的压力值
@@ -567,7 +859,9 @@ def computeCurrSurvivorStress(survivorGroupClassList: list, tankClassList: list)
 
             totalStressValue = 0.0      # 累计各个坦克对该成员带来的压力值
 
-            for tankClass in tankClassList:         # 为该成员遍历所有坦克
+            survivorData = ( surClass.absolutePosition, surClass.flowDistance )
+
+            for tankClass, tankData in tankDataList:         # 为该成员遍历所有坦克
 
                 gamma = 1.0         # 压力值的衰减系数的初始值 (future discount)
                 D = 0
@@ -580,13 +874,16 @@ def computeCurrSurvivorStress(survivorGroupClassList: list, tankClassList: list)
                     continue        # 不中断查找, 而是 跳过 当前坦克给生还者带来的压力值的计算, 查找下一个坦克
 
 
+                # 该生还者与该坦克之间的 maxD 距离, 即 D(t, s)
+                D_st = distanceCache.maxDistance(
+                    surClass.survivorID, survivorData,
+                    tankClass.tankID, tankData
+                )
+
                 # 1. 如果 s 是 t 的仇恨
                 if focusedTarget.getIdentification() == surClass.survivorID:
 
-                    D = maxDistance( 
-                        ( surClass.absolutePosition, surClass.flowDistance ),
-                        ( tankClass.absolutePosition, tankClass.flowDistance )
-                     )
+                    D = D_st
                     
                     totalStressValue += callStressComputeModel( D, surClass.belongSurvivorGroupLogic, gamma )      # 累计该坦克对该生还者带来的压力值
 
@@ -596,39 +893,22 @@ def computeCurrSurvivorStress(survivorGroupClassList: list, tankClassList: list)
 
                     # --- gamma值的确定, 详见 "方案" 第 1.1.8 小节 --- #
 
-                    targetBelongSurvivorGroupClass = None        # 坦克的仇恨目标所在的 组别实例化类
-                    findTargetBelongSurvivorGroupClass = False     # 是否找到了仇恨目标所在的 组别实例化类
-                    index = 0       # 仇恨目标当前位于 所在成员列表中 的下标
-
-                    for gc in survivorGroupClassList:
-
-                        index = 0
-
-                        for sc in gc.survivorMembers:
-
-                            if focusedTarget.getIdentification() == sc.survivorID:
-
-                                targetBelongSurvivorGroupClass = gc         # 指向 gc 所属的内存地址
-                                findTargetBelongSurvivorGroupClass = True   # 找到了仇恨目标所在的 组别实例化类
-                                break
-
-                            index += 1
-
-                        if findTargetBelongSurvivorGroupClass:      # 找到了仇恨目标所在的 组别实例化类, 不再向后遍历
-                            break
-
+                    # 坦克的仇恨目标所在的 组别实例化类, 以及仇恨目标当前位于 所在成员列表中 的下标, 通过索引 O(1) 查找
+                    targetMembership = membershipIndex.get( focusedTarget.getIdentification() )
                     
-                    if not findTargetBelongSurvivorGroupClass:
+                    if targetMembership is None:
                         continue        # 异常处理, 跳过 当前坦克给生还者带来的压力值的计算, 查找下一个坦克
 
+                    targetBelongSurvivorGroupClass, index = targetMembership
+
 
                     # --- 比较 该生还者 与 坦克的目标仇恨 所在的组别实例化类 在导演路程上的先后顺序 --- #
                     
                     # 如果 该生还者 与 仇恨目标 属于同一个生还者组别中
                     if groupClass.survivorGroupID == targetBelongSurvivorGroupClass.survivorGroupID:
 
-                        # gamma的最小值为0.5, index是python用于查找对象所在数组的位置的函数, 传递的参数为内存地址, 请换用插件类似功能的函数实现
-                        gamma = max( 0.9 ** abs( index - groupClass.survivorMembers.index( surClass ) ), 0.5 )
+                        # gamma的最小值为0.5, surIndex 为该生还者在所在组别中的下标, 在遍历成员时已经得到, 不需要再查找
+                        gamma = max( 0.9 ** abs( index - surIndex ), 0.5 )
 
                     # 如果 该生还者 与 仇恨目标 不属于同一个生还者组别中
                     else:
@@ -637,7 +917,7 @@ def computeCurrSurvivorStress(survivorGroupClassList: list, tankClassList: list)
                         if groupClass.survivorMembers[ 0 ].flowDistance > targetBelongSurvivorGroupClass.survivorMembers[ 0 ].flowDistance:
 
                             gamma = max(
-                                0.9 ** abs( groupClass.memberNum - groupClass.survivorMembers.index( surClass ) + index ),  
+                                0.9 ** abs( groupClass.memberNum - surIndex + index ),  
                                 0.5
                             )
 
@@ -645,7 +925,7 @@ def computeCurrSurvivorStress(survivorGroupClassList: list, tankClassList: list)
                         elif groupClass.survivorMembers[ 0 ].flowDistance < targetBelongSurvivorGroupClass.survivorMembers[ 0 ].flowDistance:
 
                             gamma = max(
-                                0.9 ** abs( targetBelongSurvivorGroupClass.memberNum - index + groupClass.survivorMembers.index( surClass ) ),  
+                                0.9 ** abs( targetBelongSurvivorGroupClass.memberNum - index + surIndex ),  
                                 0.5
                             )
 
@@ -658,31 +938,29 @@ def computeCurrSurvivorStress(survivorGroupClassList: list, tankClassList: list)
                             )
 
 
+                    # 注意这里的 focusedTarget 是 Client 类 (的快照), 充当临时变量的作用, 并没有参与实例化过程, 因此在缓存中使用 clientKey 作为键
+                    targetKey = DistanceCache.clientKey( focusedTarget.getIdentification() )
+                    targetData = ( focusedTarget.getAbsolutePosition(), focusedTarget.getFlowDistance() )
+
+                    # 坦克与其仇恨目标之间的 maxD 距离, 即 D(t, si)
+                    D_tsi = distanceCache.maxDistance(
+                        targetKey, targetData,
+                        tankClass.tankID, tankData
+                    )
+
                     # 2.1. si是t的仇恨，且 D(t, s) <= D(t, si) - alpha
-                    if maxDistance(
-                        ( surClass.absolutePosition, surClass.flowDistance ),
-                        ( tankClass.absolutePosition, tankClass.flowDistance )
-                    ) <= maxDistance(
-                        ( focusedTarget.getAbsolutePosition(), focusedTarget.getFlowDistance() ),       # 注意这里的 focusedTarget 是 Client 类, 充当临时变量的作用, 并没有参与实例化过程
-                        ( tankClass.absolutePosition, tankClass.flowDistance )
-                    ) - alpha:
+                    if D_st <= D_tsi - alpha:
                         
-                        D = maxDistance( 
-                            ( surClass.absolutePosition, surClass.flowDistance ),
-                            ( tankClass.absolutePosition, tankClass.flowDistance )
-                        )
+                        D = D_st
 
                         totalStressValue += callStressComputeModel( D, surClass.belongSurvivorGroupLogic, gamma )      # 累计该坦克对该生还者带来的压力值
 
                     # 2.2. si是t的仇恨，且D(t, s) > D(t, si) - alpha
                     else:
                         
-                        D = maxDistance(
-                            ( focusedTarget.getAbsolutePosition(), focusedTarget.getFlowDistance() ),
-                            ( tankClass.absolutePosition, tankClass.flowDistance )
-                        ) + maxDistance(
-                            ( surClass.absolutePosition, surClass.flowDistance ),
-                            ( focusedTarget.getAbsolutePosition(), focusedTarget.getFlowDistance() )
+                        D = D_tsi + distanceCache.maxDistance(
+                            surClass.survivorID, survivorData,
+                            targetKey, targetData
                         )
 
                         totalStressValue += callStressComputeModel( D, surClass.belongSurvivorGroupLogic, gamma )       # 累计该坦克对该生还者带来的压力值
@@ -698,18 +976,78 @@ def computeCurrSurvivorStress(survivorGroupClassList: list, tankClassList: list)
 
 
 
-def computeCurrGroupStress( survivorGroupClassList: list ):
+def setSurvivorStressEngine( engine: str ):
     """
-    在 computeCurrSurvivorStress 函数执行完成后执行, 此时所有生还者的压力值应全都知道
+    切换计算生还者压力值所使用的引擎, 允许的取值为 "scalar" 和 "numpy"; 选择 "numpy" 时会立即导入向量化版本, 未安装 NumPy 时抛出 ImportError
     """
-    if len( survivorGroupClassList ) <= 0:          # 异常处理
-        return False            
+    global survivorStressEngine
 
+    if engine not in ( "scalar", "numpy" ):
+        raise ValueError("unknown survivor stress engine !")
 
-    for groupClass in survivorGroupClassList:
+    if engine == "numpy":
+        import tankrun_demo_vectorized_stress       # 延迟导入, 未安装 NumPy 的服务器不受影响
 
-        # 当生还者组别处于 冲刺型逻辑 时
-        if groupClass.survivorGroupLogic == "R":
+    survivorStressEngine = engine
+
+    return survivorStressEngine
+
+
+
+
+def setInstrumentation( newInstrumentation ):
+    """
+    设置插件主程序使用的性能统计, 传入 None 时关闭; 一般由 tankrun_demo_instrumentation.enable / disable 调用
+    """
+    global instrumentation
+
+    instrumentation = newInstrumentation
+
+    return instrumentation
+
+
+
+
+def setTraceRecorder( newTraceRecorder ):
+    """
+    设置插件主程序使用的快照录制器 (实现了 recordBatch 函数), 传入 None 时停止录制
+    """
+    global traceRecorder
+
+    traceRecorder = newTraceRecorder
+
+    return traceRecorder
+
+
+
+
+def computeCurrSurvivorStressByEngine(survivorGroupClassList: list, tankClassList: list, membershipIndex: dict = None,
+                                      distanceCache: DistanceCache = None):
+    """
+    根据 survivorStressEngine 的取值, 调用逐个计算的版本或者向量化版本计算所有生还者的压力值, 参数与返回值与 computeCurrSurvivorStress 一致
+    向量化版本一次性计算所有距离, 不使用 distanceCache
+    """
+    if survivorStressEngine == "numpy":
+        import tankrun_demo_vectorized_stress
+        return tankrun_demo_vectorized_stress.computeCurrSurvivorStressVectorized( survivorGroupClassList, tankClassList, membershipIndex )
+
+    return computeCurrSurvivorStress( survivorGroupClassList, tankClassList, membershipIndex, distanceCache )
+
+
+
+
+def computeCurrGroupStress( survivorGroupClassList: list ):
+    """
+    在 computeCurrSurvivorStress 函数执行完成后执行, 此时所有生还者的压力值应全都知道
+    """
+    if len( survivorGroupClassList ) <= 0:          # 异常处理
+        return False            
+
+
+    for groupClass in survivorGroupClassList:
+
+        # 当生还者组别处于 冲刺型逻辑 时
+        if groupClass.survivorGroupLogic == "R":
 
             for surClass in groupClass.survivorMembers:
 
@@ -737,79 +1075,1128 @@ def computeCurrGroupStress( survivorGroupClassList: list ):
         # 当生还者组别处于 后退型逻辑 时
         elif groupClass.survivorGroupLogic == "B":
 
-            index = 0       # 用于遍历 该生还者组别 的成员列表
-            last_sur_index = 0          # 记录位于该组别 末尾 的 非倒地/挂边 且 非处于安全区域 的成员的索引
+            index = 0       # 用于遍历 该生还者组别 的成员列表
+            last_sur_index = 0          # 记录位于该组别 末尾 的 非倒地/挂边 且 非处于安全区域 的成员的索引
+
+            while index < groupClass.memberNum:
+
+                if groupClass.survivorMembers[ index ].status != "I" and groupClass.survivorMembers[ index ].status != "S":
+                    last_sur_index = index          # 更新该索引
+
+                index += 1
+
+            # 后退型逻辑组别的代表压力值 由 该组别 末尾第一个 非倒地/挂边 且 非处于安全区域 的成员的压力值确定
+            groupClass.survivorGroupStress = groupClass.survivorMembers[ last_sur_index ].currSurvivorStress
+
+        
+        # 当生还者组别处于 其他逻辑 时
+        else:
+            groupClass.survivorGroupStress = 0.0
+
+    
+    return True         # 成功计算完所有 组别 实例化类的 代表压力值
+
+
+
+
+""" --- 自定义 "导演系统" 所需类的定义 --- """
+
+class FixedSizeArray:
+    """
+    自定义先进先出的数组类型, Python中可以直接使用collections.deque实现该功能, 但不确定插件是否自带类似的数据结构; 如果有, 这部分的内容可以忽略
+
+    使用长度固定的 环形缓冲区 实现: 加入元素和按下标访问元素的耗时均为 O(1), 不再需要在数组已满时移动所有元素 (pop(0) 为 O(n));
+    逻辑上的下标与原来一致, 下标 0 为最早加入的元素, 数组已满时下标 maxSize - 1 为最新加入的元素
+
+    可以通过 addAggregate 挂载 累计量 (例如 ValueCountAggregate, WindowCache), 在元素加入和移除时以 O(1) 的耗时同步更新, 使调用者不必重新遍历整个数组;
+    累计量需要实现如下方法:
+        onPush( window, value, evicted, hasEvicted ): window 加入 value 之后调用; hasEvicted 为 True 时, evicted 为被移除的最早加入的元素
+        rebuild( window ): 遍历 window 中的所有元素, 重新计算累计量
+        copyFrom( other ), clone(): 原地复制 / 在新内存地址克隆累计量
+    """
+    __slots__ = ( "maxSize", "data", "head", "size", "aggregates" )
+
+    def __init__(self, maxSize):
+        self.maxSize = maxSize
+        
+        if maxSize <= 0:
+            raise ValueError("maxSize must be positive !")      # 直接停止插件的执行
+        
+        # 环形存储, 长度始终为 maxSize
+        self.data = [ None ] * maxSize
+
+        # 逻辑下标 0 (最早加入的元素) 在 data 中的位置
+        self.head = 0
+
+        # 当前存储的元素数量
+        self.size = 0
+
+        # 挂载的累计量
+        self.aggregates = []
+
+    def push(self, value):
+        """
+        加入一个元素, 数组已满时移除最早加入的元素 (即逻辑下标 0 的元素)
+        """
+        if self.size >= self.maxSize:
+
+            # 覆盖最早加入的元素, 并将逻辑下标 0 向后移动一位
+            evicted = self.data[ self.head ]
+            self.data[ self.head ] = value
+            self.head = ( self.head + 1 ) % self.maxSize
+
+            for aggregate in self.aggregates:
+                aggregate.onPush( self, value, evicted, True )
+
+        else:
+
+            self.data[ ( self.head + self.size ) % self.maxSize ] = value
+            self.size += 1
+
+            for aggregate in self.aggregates:
+                aggregate.onPush( self, value, None, False )
+
+    def add_tuple_data(self, value: tuple):    # 存储的元素为二元组类型, 同时包含 (绝对坐标, 导演路程) 两个变量        
+        self.push( value )
+
+    def add_str_data(self, value: str):     # 存储的元素为字符串类型
+        self.push( value )
+
+    def __getitem__(self, index: int):      # 按照逻辑下标访问元素, 支持负数下标
+        if index < 0:
+            index += self.size
+
+        if index < 0 or index >= self.size:
+            raise IndexError("FixedSizeArray index out of range !")
+
+        return self.data[ ( self.head + index ) % self.maxSize ]
+
+    def __iter__(self):     # 按照从早到晚的顺序遍历元素
+        for i in range( self.size ):
+            yield self.data[ ( self.head + i ) % self.maxSize ]
+
+    def get_all(self):      # 按照从早到晚的顺序返回所有元素组成的新数组
+        return list( self )
+
+    def __len__(self):
+        return self.size   # 返回数组当前的长度
+
+    def is_full(self):
+        return self.size >= self.maxSize
+
+
+    def addAggregate(self, aggregate):
+        """
+        挂载一个累计量, 并使用数组中已有的元素初始化它
+        """
+        aggregate.rebuild( self )
+        self.aggregates.append( aggregate )
+
+        return aggregate
+    
+
+    def clone(self):
+        """
+        专门为插件语法设计的在新内存地址克隆对象的方法
+        """
+        newObj = FixedSizeArray(self.maxSize)       # 划分新内存地址
+
+        newObj.copyFrom( self )
+
+        return newObj       # 返回克隆对象的新内存地址
+
+
+    def copyFrom(self, other: FixedSizeArray):
+        """
+        将 other 中的数据 (包括挂载的累计量) 原地复制到当前对象中, 不划分新内存地址, 供双缓冲的实例化类使用
+        """
+        if self.maxSize != other.maxSize:
+            self.maxSize = other.maxSize
+            self.data = [ None ] * other.maxSize
+
+        self.data[:] = other.data       # 原地覆盖, 复用原本的数组; 已确保data中的元素都是 字符串 / 元组
+        self.head = other.head
+        self.size = other.size
+
+        if len( self.aggregates ) == len( other.aggregates ):
+            for aggregate, otherAggregate in zip( self.aggregates, other.aggregates ):
+                aggregate.copyFrom( otherAggregate )
+
+        else:
+            self.aggregates = [ otherAggregate.clone() for otherAggregate in other.aggregates ]
+
+        return self
+
+
+
+
+class ValueCountAggregate:
+    """
+    统计 FixedSizeArray 中逻辑下标 >= fromIndex 的区间内, 每种取值出现的次数; fromIndex 为 0 时统计整个数组
+    """
+    __slots__ = ( "fromIndex", "counts" )
+
+    def __init__(self, fromIndex: int = 0):
+        self.fromIndex = fromIndex
+
+        # 取值 -> 出现的次数
+        self.counts = {}
+
+    def onPush(self, window: FixedSizeArray, value, evicted, hasEvicted: bool):
+        counts = self.counts
+
+        if hasEvicted:      # 数组已满, 所有元素的逻辑下标减 1
+
+            if self.fromIndex <= 0:     # 被移除的元素离开统计区间
+                counts[ evicted ] -= 1
+
+            else:       # 原本位于 fromIndex 的元素移动到 fromIndex - 1, 离开统计区间
+                leaving = window[ self.fromIndex - 1 ]
+                counts[ leaving ] -= 1
+
+            counts[ value ] = counts.get( value, 0 ) + 1        # 新元素位于 maxSize - 1
+
+        elif len( window ) - 1 >= self.fromIndex:       # 数组未满, 新元素的逻辑下标为 len - 1
+            counts[ value ] = counts.get( value, 0 ) + 1
+
+    def rebuild(self, window: FixedSizeArray):
+        self.counts = {}
+
+        for i in range( self.fromIndex, len( window ) ):
+            self.counts[ window[ i ] ] = self.counts.get( window[ i ], 0 ) + 1
+
+    def count(self, value):
+        return self.counts.get( value, 0 )
+
+    def copyFrom(self, other: ValueCountAggregate):
+        self.fromIndex = other.fromIndex
+        self.counts.clear()
+        self.counts.update( other.counts )
+
+    def clone(self):
+        newObj = ValueCountAggregate( self.fromIndex )
+        newObj.counts = dict( self.counts )
+        return newObj
+
+
+
+
+class WindowCache:
+    """
+    挂载在 FixedSizeArray 上的缓存, 存储由数组中的元素计算出的任意数值; 数组每次加入元素时缓存都会失效, 需要调用者重新计算
+    """
+    __slots__ = ( "valid", "value" )
+
+    def __init__(self):
+        self.valid = False
+        self.value = None
+
+    def onPush(self, window: FixedSizeArray, value, evicted, hasEvicted: bool):
+        self.valid = False
+
+    def rebuild(self, window: FixedSizeArray):
+        self.valid = False
+
+    def store(self, value):
+        self.value = value
+        self.valid = True
+        return value
+
+    def copyFrom(self, other: WindowCache):
+        self.valid = other.valid
+        self.value = other.value
+
+    def clone(self):
+        newObj = WindowCache()
+        newObj.copyFrom( self )
+        return newObj
+
+
+
+
+# 生还者切片和状态的编码, 在状态存储中以整数的形式存储
+stateCodes = { "R": 0, "D": 1, "B": 2, "S": 3, "I": 4 }
+stateNames = ( "R", "D", "B", "S", "I" )
+
+
+
+
+class EntityStateStore:
+    """
+    以 结构数组 (struct of arrays) 的形式存储实例化类的数据: 每个实例化类占用一个固定的槽位 (slot), 同一种数据的所有槽位存储在同一个连续的数组中;
+    实例化类只保留槽位的编号, 作为访问这些数组的 "视图", 对外的属性名与原来保持一致
+
+    连续的数组可以直接交给 NumPy 等向量化的计算使用 (例如 numpy.frombuffer), 并且实例化类被舍弃后槽位被回收复用,
+    生还者死亡和复活时不需要重新划分这些数据的内存
+
+    被舍弃的槽位不会被立即复用, 而是等到下一个执行周期开始时 (recycle) 才可以再次分配, 因为上一个执行周期的列表中仍然可能引用着对应的实例化类
+    """
+    def __init__(self, capacity: int = 16):
+        # 已经划分内存的槽位数量
+        self.capacity = 0
+
+        # 绝对坐标 ( x, y, z ) 和导演路程
+        self.positionX = array.array( "d" )
+        self.positionY = array.array( "d" )
+        self.positionZ = array.array( "d" )
+        self.flowDistance = array.array( "d" )
+
+        # 可以分配的槽位, 以及等待下一个执行周期回收的槽位
+        self.freeSlots = []
+        self.pendingFreeSlots = []
+
+        # 正在使用中的槽位数量
+        self.allocatedNum = 0
+
+        self.grow( capacity )
+
+
+    def columns(self):
+        """
+        返回每个槽位占用一个元素的所有数组
+        """
+        return [ self.positionX, self.positionY, self.positionZ, self.flowDistance ]
+
+
+    def grow(self, capacity: int):
+        """
+        将槽位数量扩充至 capacity, 新的槽位加入 freeSlots
+        """
+        addedNum = capacity - self.capacity
+
+        if addedNum <= 0:
+            return self.capacity
+
+        for column in self.columns():
+            column.extend( [ 0 ] * addedNum )
+
+        # 倒序加入, 使编号较小的槽位先被分配
+        self.freeSlots.extend( range( capacity - 1, self.capacity - 1, -1 ) )
+        self.capacity = capacity
+
+        return self.capacity
+
+
+    def allocate(self):
+        """
+        分配一个槽位并初始化其中的数据, 没有可用的槽位时扩充为原来的两倍
+        """
+        if len( self.freeSlots ) <= 0:
+            self.grow( max( 1, 2 * self.capacity ) )
+
+        slot = self.freeSlots.pop()
+        self.resetSlot( slot )
+        self.allocatedNum += 1
+
+        return slot
+
+
+    def release(self, slot: int):
+        """
+        归还一个槽位, 该槽位在下一次 recycle 之后才可以被再次分配
+        """
+        self.pendingFreeSlots.append( slot )
+        self.allocatedNum -= 1
+
+
+    def recycle(self):
+        """
+        在每个执行周期开始时调用, 使上一个执行周期归还的槽位可以被再次分配
+        """
+        if len( self.pendingFreeSlots ) > 0:
+            self.freeSlots.extend( reversed( self.pendingFreeSlots ) )
+            self.pendingFreeSlots.clear()
+
+
+    def resetSlot(self, slot: int):
+        for column in self.columns():
+            column[ slot ] = 0
+
+
+    def copySlot(self, sourceSlot: int, targetSlot: int):
+        """
+        将 sourceSlot 中的数据复制到 targetSlot 中
+        """
+        for column in self.columns():
+            column[ targetSlot ] = column[ sourceSlot ]
+
+
+    def getPosition(self, slot: int):
+        return ( self.positionX[ slot ], self.positionY[ slot ], self.positionZ[ slot ] )
+
+
+    def setPosition(self, slot: int, position: tuple):
+        self.positionX[ slot ], self.positionY[ slot ], self.positionZ[ slot ] = position
+
+
+    def bytesPerSlot(self):
+        """
+        每个槽位在所有数组中占用的字节数
+        """
+        return sum( column.itemsize for column in self.columns() )
+
+
+
+
+class SurvivorStateStore(EntityStateStore):
+    """
+    生还者类的结构数组状态存储, 在 EntityStateStore 的基础上增加了 倒地 / 切片 / 状态 / 压力值, 以及 slice_2_sec_window 中的 (绝对坐标, 导演路程) 历史记录;
+    历史记录以环形缓冲区的形式存储, 每个槽位占用 historyLength 个连续的元素, 详见 SlotHistoryWindow 类
+    """
+    def __init__(self, historyLength: int, capacity: int = 16):
+        if historyLength <= 0:
+            raise ValueError("historyLength must be positive !")      # 直接停止插件的执行
+
+        # 每个槽位历史记录的长度
+        self.historyLength = historyLength
+
+        # 是否倒地或者挂边, 切片和状态的编码 (详见 stateCodes), 当前的压力值
+        self.incapacitated = array.array( "b" )
+        self.sliceCode = array.array( "b" )
+        self.statusCode = array.array( "b" )
+        self.survivorStress = array.array( "d" )
+
+        # 状态的版本号, 状态每改变一次加 1; 组别类通过成员的版本号判断成员的状态是否发生了变化, 详见 SurvivorGroupClass.evaluationKeyOf
+        self.statusVersion = array.array( "l" )
+
+        # 历史记录的逻辑下标 0 (最早加入的记录) 在该槽位的环形缓冲区中的位置, 以及当前存储的记录数量
+        self.historyHead = array.array( "l" )
+        self.historySize = array.array( "l" )
+
+        # 历史记录中的 绝对坐标 ( x, y, z ) 和 导演路程, 槽位 slot 的记录位于 [ slot * historyLength, ( slot + 1 ) * historyLength )
+        self.historyX = array.array( "d" )
+        self.historyY = array.array( "d" )
+        self.historyZ = array.array( "d" )
+        self.historyFlow = array.array( "d" )
+
+        super().__init__( capacity )
+
+
+    def columns(self):
+        return super().columns() + [ self.incapacitated, self.sliceCode, self.statusCode, self.statusVersion, self.survivorStress, self.historyHead, self.historySize ]
+
+
+    def historyColumns(self):
+        return [ self.historyX, self.historyY, self.historyZ, self.historyFlow ]
+
+
+    def grow(self, capacity: int):
+        addedNum = capacity - self.capacity
+
+        if addedNum > 0:
+            for column in self.historyColumns():
+                column.extend( [ 0.0 ] * ( addedNum * self.historyLength ) )
+
+        return super().grow( capacity )
+
+
+    def copyHistory(self, sourceSlot: int, targetSlot: int):
+        """
+        将 sourceSlot 的历史记录复制到 targetSlot 中
+        """
+        length = self.historyLength
+        source = sourceSlot * length
+        target = targetSlot * length
+
+        for column in self.historyColumns():
+            column[ target : target + length ] = column[ source : source + length ]
+
+        self.historyHead[ targetSlot ] = self.historyHead[ sourceSlot ]
+        self.historySize[ targetSlot ] = self.historySize[ sourceSlot ]
+
+
+    def pushHistory(self, slot: int, position: tuple, flowDistance: float):
+        """
+        为槽位加入一条历史记录, 记录已满时覆盖最早加入的记录
+
+        return:
+        被覆盖的记录 ( 绝对坐标, 导演路程 ), 记录未满时返回 None
+        """
+        length = self.historyLength
+        head = self.historyHead[ slot ]
+        size = self.historySize[ slot ]
+
+        evicted = None
+
+        if size >= length:
+            index = slot * length + head
+            evicted = ( ( self.historyX[ index ], self.historyY[ index ], self.historyZ[ index ] ), self.historyFlow[ index ] )
+            self.historyHead[ slot ] = ( head + 1 ) % length
+
+        else:
+            index = slot * length + ( head + size ) % length
+            self.historySize[ slot ] = size + 1
+
+        self.historyX[ index ], self.historyY[ index ], self.historyZ[ index ] = position
+        self.historyFlow[ index ] = flowDistance
+
+        return evicted
+
+
+    def historyAt(self, slot: int, index: int):
+        """
+        返回槽位中逻辑下标为 index 的历史记录 ( 绝对坐标, 导演路程 ), index 需要在 [ 0, historySize ) 之间
+        """
+        position = slot * self.historyLength + ( self.historyHead[ slot ] + index ) % self.historyLength
+
+        return ( ( self.historyX[ position ], self.historyY[ position ], self.historyZ[ position ] ), self.historyFlow[ position ] )
+
+
+    def bytesPerSlot(self):
+        return super().bytesPerSlot() + sum( column.itemsize for column in self.historyColumns() ) * self.historyLength
+
+
+
+
+class SlotHistoryWindow:
+    """
+    SurvivorStateStore 中某一个槽位的历史记录的视图, 提供与 FixedSizeArray 相同的接口 (push, 下标访问, is_full, addAggregate 等), 用作生还者类的 slice_2_sec_window;
+    存储的元素为 ( 绝对坐标, 导演路程 ) 二元组, 数据本身存储在状态存储的连续数组中
+    """
+    __slots__ = ( "store", "slot", "maxSize", "aggregates" )
+
+    def __init__(self, store: SurvivorStateStore, slot: int):
+        self.store = store
+        self.slot = slot
+        self.maxSize = store.historyLength
+
+        # 挂载的累计量
+        self.aggregates = []
+
+    def push(self, value: tuple):
+        """
+        加入一个 ( 绝对坐标, 导演路程 ) 二元组, 数组已满时移除最早加入的元素
+        """
+        evicted = self.store.pushHistory( self.slot, value[0], value[1] )
+
+        for aggregate in self.aggregates:
+            aggregate.onPush( self, value, evicted, evicted is not None )
+
+    def add_tuple_data(self, value: tuple):    # 存储的元素为二元组类型, 同时包含 (绝对坐标, 导演路程) 两个变量
+        self.push( value )
+
+    def __getitem__(self, index: int):      # 按照逻辑下标访问元素, 支持负数下标
+        size = self.store.historySize[ self.slot ]
+
+        if index < 0:
+            index += size
+
+        if index < 0 or index >= size:
+            raise IndexError("SlotHistoryWindow index out of range !")
+
+        return self.store.historyAt( self.slot, index )
+
+    def __iter__(self):     # 按照从早到晚的顺序遍历元素
+        for i in range( len( self ) ):
+            yield self.store.historyAt( self.slot, i )
+
+    def get_all(self):      # 按照从早到晚的顺序返回所有元素组成的新数组
+        return list( self )
+
+    def __len__(self):
+        return self.store.historySize[ self.slot ]
+
+    def is_full(self):
+        return self.store.historySize[ self.slot ] >= self.maxSize
+
+    def addAggregate(self, aggregate):
+        """
+        挂载一个累计量, 并使用已有的元素初始化它
+        """
+        aggregate.rebuild( self )
+        self.aggregates.append( aggregate )
+
+        return aggregate
+
+    def copyFrom(self, other):
+        """
+        将 other (SlotHistoryWindow 或者 FixedSizeArray) 中的数据 (包括挂载的累计量) 原地复制到当前槽位中
+        """
+        if isinstance( other, SlotHistoryWindow ) and other.store is self.store:
+            self.store.copyHistory( other.slot, self.slot )
+
+        else:
+            self.store.historyHead[ self.slot ] = 0
+            self.store.historySize[ self.slot ] = 0
+
+            for value in list( other )[ -self.maxSize: ]:
+                self.store.pushHistory( self.slot, value[0], value[1] )
+
+        if len( self.aggregates ) == len( other.aggregates ):
+            for aggregate, otherAggregate in zip( self.aggregates, other.aggregates ):
+                aggregate.copyFrom( otherAggregate )
+
+        else:
+            self.aggregates = [ otherAggregate.clone() for otherAggregate in other.aggregates ]
+
+        return self
+
+
+
+
+class ClientSnapshot( collections.namedtuple( "ClientSnapshot", (
+    "clientType", "clientID", "absolutePosition", "flowDistance",
+    "incapacitated", "hangingLedge", "dead", "away", "inFinalCheckPoint", "focusedTarget"
+) ) ):
+    """
+    客户端在某一个执行周期中的只读快照, 由 takeClientSnapshot 生成
+
+    实现了与 Client 相同的函数, 因此可以直接代替 Client 传入 SurvivorClass, TankClass 等; 调用这些函数不会再跨越插件与服务器的边界
+    坦克的 focusedTarget 为仇恨目标的快照 (或者 None, -1)
+    """
+    __slots__ = ()
+
+    def type(self):
+        return self.clientType
+
+    def getIdentification(self):
+        return self.clientID
+
+    def getAbsolutePosition(self):
+        return self.absolutePosition
+
+    def getFlowDistance(self):
+        return self.flowDistance
+
+    def isIncapacitied(self):
+        return self.incapacitated
+
+    def isHangingLedge(self):
+        return self.hangingLedge
+
+    def isDead(self):
+        return self.dead
+
+    def isAway(self):
+        return self.away
+
+    def isInFinalCheckPoint(self):
+        return self.inFinalCheckPoint
+
+    def getFocusedTarget(self):
+        return self.focusedTarget
+
+
+
+
+class TickContext:
+    """
+    一个执行周期的世界常量, 在执行周期开始时从游戏中读取一次
+
+    执行周期中的每个生还者类, 坦克类和组别类的更新都需要游戏时间, 每个生还者和组别成员的 S 状态检查都需要地图完整导演路程;
+    这些调用都需要跨越插件与服务器的边界, 并且同一个执行周期中的决策应该使用同一个时间点, 因此只读取一次
+    """
+    __slots__ = ( "time", "totalFlowDistance" )
+
+    def __init__(self, time: float, totalFlowDistance: float):
+        self.time = time
+        self.totalFlowDistance = totalFlowDistance
+
+
+    @classmethod
+    def sample(cls, game):
+        return cls( game.Time(), game.getTotalFlowDistance() )
+
+
+
+
+class ClientSnapshotBatch:
+    """
+    一个执行周期中所有客户端快照的集合, 由 takeClientSnapshot 生成, 对应 getSatisfiedClientFromGame 的返回值
+    """
+    def __init__(self):
+        # 存储生还者客户端的快照 (不 包括死亡和旁观生还者)
+        self.satisfiedSurvivorClients = []
+
+        # 存储坦克客户端的快照
+        self.tankClients = []
+
+        # 记录生还者客户端数量 (包括死亡和旁观生还者)
+        self.survivorClientNum = 0
+
+        # 记录坦克客户端数量
+        self.tankClientNum = 0
+
+        # 唯一标识 -> 生还者或坦克的快照
+        self.byID = {}
+
+        # 按照 getAllClients 的顺序存储的所有客户端的快照, 由 takeClientSnapshot 填充
+        self.clients = []
+
+
+    def addSurvivor(self, snapshot: ClientSnapshot):
+        self.survivorClientNum += 1
+        self.byID[ snapshot.clientID ] = snapshot
+
+        if ( not snapshot.dead ) and ( not snapshot.away ):    # 获取所有 非 死亡和旁观的生还者
+            self.satisfiedSurvivorClients.append( snapshot )
+
+
+    def addTank(self, snapshot: ClientSnapshot):
+        self.tankClientNum += 1
+        self.byID[ snapshot.clientID ] = snapshot
+        self.tankClients.append( snapshot )
+
+
+
+
+class DistanceCache:
+    """
+    执行周期内的 maxD 距离缓存, 以两个目标的键组成的二元组为键; 每个执行周期开始时清空, 使每一对目标之间的距离在一个执行周期内最多只计算一次
+
+    目标的键:
+        生还者类 使用 survivorID, 坦克类 使用 tankID (均为客户端的唯一标识, 不会重复);
+        直接从 Client 获取数据的目标 (例如坦克的仇恨目标) 使用 clientKey( 唯一标识 ), 因为其数据与实例化类中的数据不一定一致
+    """
+    def __init__(self):
+        # ( 键A, 键B ) -> maxD 距离, 同时存储两种顺序
+        self.maxDistances = {}
+
+        # 统计信息: 实际计算的次数, 命中缓存的次数
+        self.evaluations = 0
+        self.hits = 0
+
+
+    def clear(self):
+        self.maxDistances.clear()
+        self.evaluations = 0
+        self.hits = 0
+
+
+    @staticmethod
+    def clientKey(clientID):
+        return ( "client", clientID )
+
+
+    def maxDistance(self, keyOfMainTarget, dataOfMainTarget: tuple, keyOfDeputyTarget, dataOfDeputyTarget: tuple):
+        """
+        与 maxDistance 函数一致, 额外传入两个目标的键; maxD 距离是对称的, 因此 ( A, B ) 与 ( B, A ) 共用一个结果
+        """
+        pairKey = ( keyOfMainTarget, keyOfDeputyTarget )
+
+        value = self.maxDistances.get( pairKey )
+
+        if value is not None:
+            self.hits += 1
+            return value
+
+        value = maxDistance( dataOfMainTarget, dataOfDeputyTarget )
+        self.evaluations += 1
+
+        self.maxDistances[ pairKey ] = value
+        self.maxDistances[ ( keyOfDeputyTarget, keyOfMainTarget ) ] = value
+
+        return value
+
+
+
+
+class GroupEvaluationCounter:
+    """
+    执行周期内组别检查的统计: 重新检查 ( check_whether_in_S_Logic, check_logic ) 的组别数量, 以及因为输入没有变化而跳过检查的组别数量
+    每个执行周期开始时清空, 详见 SurvivorGroupClass.updateSurvivorGroupInfo
+    """
+    __slots__ = ( "evaluated", "skipped" )
+
+    def __init__(self):
+        self.evaluated = 0
+        self.skipped = 0
+
+
+    def clear(self):
+        self.evaluated = 0
+        self.skipped = 0
+
+
+
+
+class GroupLineage:
+    """
+    记录一个执行周期中各个组别的继承关系, 由 survivorGroupingStrategy 填写, 详见 "方案" 第 3.1.3 小节: 生还者组别合并和拆分时数据的合并和复制
+        ancestors: 当前组别的 survivorGroupID -> 继承的上一个执行周期组别的 survivorGroupID, 新创建的组别为 None
+        merges: ( 当前组别的 survivorGroupID, 成员过去所在的多个组别的 survivorGroupID ), 即多个组别合并成一个组别
+        splits: ( 上一个执行周期组别的 survivorGroupID, 其成员当前所在的多个组别的 survivorGroupID ), 即一个组别拆分成多个组别
+    """
+    __slots__ = ( "ancestors", "merges", "splits", "createdNum", "inheritedNum", "successors" )
+
+    def __init__(self):
+        self.ancestors = {}
+        self.merges = []
+        self.splits = []
+        self.createdNum = 0
+        self.inheritedNum = 0
+
+        # 上一个执行周期的组别 -> 其成员当前所在的组别的 survivorGroupID, 在 finish 中整理为 splits
+        self.successors = {}
+
+
+    def clear(self):
+        self.ancestors.clear()
+        self.merges.clear()
+        self.splits.clear()
+        self.createdNum = 0
+        self.inheritedNum = 0
+        self.successors.clear()
+
+
+    def record(self, groupClass, ancestorGroupClass, sourceGroupClasses: list):
+        """
+        记录一个当前组别: 继承的组别 ( 为 None 时为新创建的组别 ), 以及成员过去所在的所有组别
+        """
+        if ancestorGroupClass is None:
+            self.ancestors[ groupClass.survivorGroupID ] = None
+            self.createdNum += 1
+        else:
+            self.ancestors[ groupClass.survivorGroupID ] = ancestorGroupClass.survivorGroupID
+            self.inheritedNum += 1
+
+        if len( sourceGroupClasses ) > 1:
+            self.merges.append( ( groupClass.survivorGroupID, tuple( sourceClass.survivorGroupID for sourceClass in sourceGroupClasses ) ) )
+
+        for sourceClass in sourceGroupClasses:
+            self.successors.setdefault( sourceClass, [] ).append( groupClass.survivorGroupID )
+
+
+    def finish(self):
+        for sourceClass, groupIDs in self.successors.items():
+            if len( groupIDs ) > 1:
+                self.splits.append( ( sourceClass.survivorGroupID, tuple( groupIDs ) ) )
+
+        self.successors.clear()
+
+
+
+
+class EntityRegistry:
+    """
+    以客户端唯一标识 (getIdentification) 为键存储实例化类的注册表, 用于在 一次 遍历中完成客户端与上一次插件执行周期中实例化类的匹配
+    同时记录此次匹配中 新加入, 已离开 和 被更新 的实例化类的唯一标识, 供后续流程根据变化量进行处理, 而不必重新遍历
+    """
+    def __init__(self, createEntity, updateEntity, idAttributeName: str, doubleBuffered: bool = False, releaseEntity = None):
+        """
+        parameters:
+        @createEntity: 为客户端创建实例化类的函数, 例如 SurvivorClass
+        @updateEntity: 根据客户端更新实例化类的函数, 例如 SurvivorClass.updateSurvivorInfo
+        @idAttributeName: 实例化类中存储唯一标识的属性名, 例如 survivorID
+        @doubleBuffered: 是否使用双缓冲, 详见 reconcile 函数
+        @releaseEntity: 实例化类被舍弃时调用的函数, 例如 SurvivorClass.releaseState (归还状态存储中的槽位); 为 None 时不调用
+        """
+        self.createEntity = createEntity
+        self.updateEntity = updateEntity
+        self.idAttributeName = idAttributeName
+        self.doubleBuffered = doubleBuffered
+        self.releaseEntity = releaseEntity
+
+        # 唯一标识 -> 实例化类 (最近一次 reconcile 的结果, 即上一个执行周期的数据)
+        self.entities = {}
+
+        # 唯一标识 -> 另一个缓冲区中的实例化类, 仅在双缓冲时使用; 存储的是再上一个执行周期的数据, 可以被当前执行周期覆盖
+        self.backEntities = {}
+
+        # 最近一次 reconcile 中 新加入 / 已离开 / 被更新 的实例化类的唯一标识
+        self.joinedIDs = []
+        self.leftIDs = []
+        self.updatedIDs = []
+
+
+    def load(self, classList: list):
+        """
+        使用 上一次插件执行周期中的 实例化类列表 重建索引, 不改变任何实例化类的数据
+        """
+        self.entities = {}
+
+        for entity in classList:
+            self.entities[ getattr( entity, self.idAttributeName ) ] = entity
+
+        return self.entities
+
+
+    def reconcile(self, clients: list):
+        """
+        为每一个客户端查找 (O(1)) 或者创建对应的实例化类, 并舍弃此次不存在的客户端对应的实例化类
+
+        不使用双缓冲时, 直接更新上一个执行周期的实例化类, 调用者需要自行克隆以保护上一个执行周期的数据;
+        使用双缓冲时, 每个唯一标识对应两个实例化类, 上一个执行周期的实例化类保持不变, 其数据被原地复制 (copyStateFrom) 到另一个缓冲区的实例化类后再更新,
+        因此不需要每个执行周期都克隆 (划分新内存) 所有实例化类
+
+        return:
+        与 clients 顺序一致的 实例化类 列表
+        """
+        entities = {}
+        classList = []
+
+        joinedIDs = []
+        updatedIDs = []
+
+        for client in clients:
+
+            clientID = client.getIdentification()       # 每个客户端只获取一次唯一标识
+            entity = self.entities.get( clientID )
+
+            if entity is None:      # 没有找到自己的实例化类, 说明该客户端刚刚复活 / 加入游戏, 为其创建实例化类
+
+                entity = self.createEntity( client )
+                joinedIDs.append( clientID )
+
+            else:
+
+                if self.doubleBuffered:     # 写入另一个缓冲区, 不修改上一个执行周期的实例化类
+
+                    previousEntity = entity
+                    entity = self.backEntities.get( clientID )
+
+                    if entity is None:      # 第一次使用另一个缓冲区
+                        entity = previousEntity.clone()
+                    else:
+                        entity.copyStateFrom( previousEntity )
+
+                if self.updateEntity( entity, client ):       # 更新对应实例化类的数据
+                    updatedIDs.append( clientID )
+
+            entities[ clientID ] = entity
+            classList.append( entity )
+
+        self.leftIDs = [ entityID for entityID in self.entities if entityID not in entities ]
+        self.joinedIDs = joinedIDs
+        self.updatedIDs = updatedIDs
+
+        if self.releaseEntity is not None:      # 舍弃已离开的实例化类 (包括另一个缓冲区中的实例化类)
+            for entityID in self.leftIDs:
+                self.releaseEntity( self.entities[ entityID ] )
+
+                backEntity = self.backEntities.get( entityID )
+
+                if backEntity is not None:
+                    self.releaseEntity( backEntity )
+
+        if self.doubleBuffered:     # 交换缓冲区, 上一个执行周期的实例化类将在下一个执行周期被覆盖; 已离开的实例化类被舍弃
+            self.backEntities = { entityID: entity for entityID, entity in self.entities.items() if entityID in entities }
+
+        self.entities = entities
+
+        return classList
+
+
+    def get(self, entityID):
+        """
+        根据唯一标识返回实例化类, 不存在时返回 None
+        """
+        return self.entities.get( entityID )
+
+
+    def __len__(self):
+        return len( self.entities )
+
+
+
+
+class FlowDistanceOrder:
+    """
+    按照导演路程 降序 维护生还者类顺序的容器, 导演路程相同时按照 survivorID 升序排列
+    由于相邻两个插件执行周期之间生还者的先后顺序几乎不变, 每次只需以上一次的顺序为起点执行一次自适应的插入排序, 耗时为 O(n + 逆序对数量)
+    """
+    def __init__(self):
+        # 上一次排序后的 survivorID 顺序
+        self.order = []
+
+        # survivorID -> 在排序结果中的下标 (排名, 从 0 开始)
+        self.rank = {}
+
+
+    def update(self, survivorClassList: list):
+        """
+        以上一次的顺序为起点, 对当前的生还者类重新排序; 新加入的生还者追加在末尾后参与排序, 已离开的生还者被舍弃
+
+        return:
+        已经排序的 生还者实例化类 列表 (新列表, 不修改 survivorClassList)
+        """
+        classByID = {}
+
+        for surClass in survivorClassList:
+            classByID[ surClass.survivorID ] = surClass
+
+        sortedList = []
+
+        for survivorID in self.order:       # 保留上一次的顺序
+            surClass = classByID.pop( survivorID, None )
+
+            if surClass is not None:
+                sortedList.append( surClass )
+
+        for surClass in survivorClassList:      # 新加入的生还者, 保持传入时的先后顺序
+            if surClass.survivorID in classByID:
+                sortedList.append( surClass )
+
+
+        # --- 插入排序, 对于几乎有序的数组接近线性时间 --- #
+
+        for i in range( 1, len( sortedList ) ):
+
+            current = sortedList[ i ]
+            j = i - 1
+
+            while j >= 0 and self.isBefore( current, sortedList[ j ] ):     # 将导演路程数值较大的实例化类向列表前方移动
+                sortedList[ j + 1 ] = sortedList[ j ]
+                j -= 1
+
+            sortedList[ j + 1 ] = current
+
+        self.order = [ surClass.survivorID for surClass in sortedList ]
+        self.rank = { survivorID: index for index, survivorID in enumerate( self.order ) }
+
+        return sortedList
+
+
+    @staticmethod
+    def isBefore(surClassA, surClassB):
+        """
+        surClassA 是否应该排在 surClassB 的前面: 导演路程更大, 或者导演路程相同但 survivorID 更小
+        """
+        if surClassA.flowDistance != surClassB.flowDistance:
+            return surClassA.flowDistance > surClassB.flowDistance
+
+        return surClassA.survivorID < surClassB.survivorID
+
+
+    def rankOf(self, survivorID):
+        """
+        返回该生还者在导演路程中的排名 (0 为最靠前), 不存在时返回 -1
+        """
+        return self.rank.get( survivorID, -1 )
+
+
+    def __len__(self):
+        return len( self.order )
+
+
+
+
+class TankRequestSchedule:
+    """
+    以 survivorGroupID 为键, 按照每个组别开始请求坦克的时间点 ( lastSpawnTime + spawnInterval ) 排列的最小堆
+
+    坦克生成器每个执行周期只取出时间点已经到达的组别, 再由 checkWhetherRequestTank 确认, 而不必在每次更新组别时为所有组别检查一次;
+    时间点改变的组别 (updateLastSpawnTime, adjustSpawnInterval) 被重新加入堆中, 旧的元素不立即删除, 取出时发现与 entries 不一致则直接舍弃
+
+    组别类在每个执行周期都会被 clone 或者重新创建, 合并与拆分时 survivorGroupID 也可能改变, 因此每个执行周期分组完成后通过 sync 与当前的组别列表对齐:
+    拆分出的组别通过 clone 继承了相同的 lastSpawnTime 和 spawnInterval, 分别以各自的 survivorGroupID 加入堆中; 被合并而消失的组别从 entries 中删除
+    """
+    __slots__ = ( "heap", "entries", "sequence", "poppedGroupNum", "staleEntryNum" )
+
+    # 取出元素时允许的时间误差; lastSpawnTime + spawnInterval 与 currentGameTime() - lastSpawnTime >= spawnInterval 的浮点舍入可能不同, 最终以 checkWhetherRequestTank 为准
+    dueTolerance = 1e-6
+
+    def __init__(self):
+        # 最小堆, 元素为 ( 时间点, 加入的序号, survivorGroupID ); 序号使时间点相同的元素按照加入的先后顺序取出, 且不比较 survivorGroupID
+        self.heap = []
+
+        # survivorGroupID -> ( 时间点, 组别实例化类 ), 只包括尚未开始请求坦克的组别
+        self.entries = {}
+
+        self.sequence = 0
+
+        # 累计取出的组别数量, 以及被舍弃的过期元素数量
+        self.poppedGroupNum = 0
+        self.staleEntryNum = 0
+
+
+    @staticmethod
+    def dueTimeOf(groupClass):
+        return groupClass.lastSpawnTime + groupClass.spawnInterval
+
+
+    def schedule(self, groupClass):
+        """
+        按照组别当前的 lastSpawnTime 和 spawnInterval 加入 (或者重新加入) 堆中; 正在请求坦克的组别不需要加入, 直到坦克生成器调用 updateLastSpawnTime
+        """
+        survivorGroupID = groupClass.survivorGroupID
+
+        if groupClass.whetherRequestTank:
+            self.entries.pop( survivorGroupID, None )
+            return False
+
+        dueTime = self.dueTimeOf( groupClass )
+
+        self.entries[ survivorGroupID ] = ( dueTime, groupClass )
+        self.push( dueTime, survivorGroupID )
+
+        return True
+
+
+    def push(self, dueTime: float, survivorGroupID):
+        heapq.heappush( self.heap, ( dueTime, self.sequence, survivorGroupID ) )
+        self.sequence += 1
+
+
+    def sync(self, survivorGroupClassList: list):
+        """
+        与当前执行周期的组别列表对齐, 在分组策略执行完毕后调用: entries 指向当前的组别类, 时间点改变或者新出现的组别被加入堆中, 不再存在的组别被删除
+        """
+        entries = {}
+
+        for groupClass in survivorGroupClassList:
+
+            if groupClass.whetherRequestTank:       # 已经开始请求坦克, 等待坦克生成器处理
+                continue
+
+            survivorGroupID = groupClass.survivorGroupID
+            dueTime = self.dueTimeOf( groupClass )
+
+            lastEntry = self.entries.get( survivorGroupID )
+
+            if lastEntry is None or lastEntry[0] != dueTime:      # 继承的时间点没有改变时, 堆中已有的元素仍然有效
+                self.push( dueTime, survivorGroupID )
 
-            while index < groupClass.memberNum:
+            entries[ survivorGroupID ] = ( dueTime, groupClass )
 
-                if groupClass.survivorMembers[ index ].status != "I" and groupClass.survivorMembers[ index ].status != "S":
-                    last_sur_index = index          # 更新该索引
+        self.entries = entries
 
-                index += 1
+        # 过期的元素过多时重建堆
+        if len( self.heap ) > 2 * len( self.entries ) + 32:
+            self.heap = [ ( dueTime, index, survivorGroupID ) for index, ( survivorGroupID, ( dueTime, _ ) ) in enumerate( self.entries.items() ) ]
+            heapq.heapify( self.heap )
+            self.sequence = len( self.heap )
 
-            # 后退型逻辑组别的代表压力值 由 该组别 末尾第一个 非倒地/挂边 且 非处于安全区域 的成员的压力值确定
-            groupClass.survivorGroupStress = groupClass.survivorMembers[ last_sur_index ].currSurvivorStress
+        return True
 
-        
-        # 当生还者组别处于 其他逻辑 时
-        else:
-            groupClass.survivorGroupStress = 0.0
 
-    
-    return True         # 成功计算完所有 组别 实例化类的 代表压力值
+    def popDueGroups(self, currentTime: float):
+        """
+        取出所有已经到达时间点的组别, 并通过 checkWhetherRequestTank 将其标记为正在请求坦克
 
+        return:
+        按照时间点先后顺序排列的 组别实例化类 列表
+        """
+        dueGroups = []
 
+        heap = self.heap
 
+        while len( heap ) > 0 and heap[0][0] - currentTime <= self.dueTolerance:
 
-""" --- 自定义 "导演系统" 所需类的定义 --- """
+            dueTime, sequence, survivorGroupID = heapq.heappop( heap )
 
-class FixedSizeArray:
-    """
-    自定义先进先出的数组类型, Python中可以直接使用collections.deque实现该功能, 但不确定插件是否自带类似的数据结构; 如果有, 这部分的内容可以忽略
-    """
-    def __init__(self, maxSize):
-        self.maxSize = maxSize
-        
-        if maxSize <= 0:
-            raise ValueError("maxSize must be positive !")      # 直接停止插件的执行
-        
-        self.data = []
+            entry = self.entries.get( survivorGroupID )
 
-    def add_tuple_data(self, value: tuple):    # 存储的元素为二元组类型, 同时包含 (绝对坐标, 导演路程) 两个变量        
-        if len(self.data) >= self.maxSize:
-            
-            # 移除最早加入的元素 (即索引 0 的元素)
-            self.data.pop(0)
-        
-        self.data.append(value)
+            if entry is None or entry[0] != dueTime:        # 过期的元素
+                self.staleEntryNum += 1
+                continue
 
-    def add_str_data(self, value: str):     # 存储的元素为字符串类型
-        if len(self.data) >= self.maxSize:
-            
-            # 移除最早加入的元素 (即索引 0 的元素)
-            self.data.pop(0)
-        
-        self.data.append(value)
+            groupClass = entry[1]
 
-    # def get_all(self):            # 无作用
-    #     return self.data.copy()     # 复制data, 避免修改同一内存
+            if not groupClass.checkWhetherRequestTank():        # 浮点误差范围内尚未到达, 放回堆中, 下一个执行周期再检查
+                heapq.heappush( heap, ( dueTime, sequence, survivorGroupID ) )
+                break
 
-    def __len__(self):
-        return len(self.data)   # 返回数组当前的长度
-    
+            del self.entries[ survivorGroupID ]
+            dueGroups.append( groupClass )
 
-    def clone(self):
-        """
-        专门为插件语法设计的在新内存地址克隆对象的方法
-        """
-        newObj = FixedSizeArray(self.maxSize)       # 划分新内存地址
+        self.poppedGroupNum += len( dueGroups )
 
-        newObj.maxSize = self.maxSize
-        
-        for _ in self.data:
-            newObj.data.append( _ )     # 已确保data中的元素都是 字符串 / 元组
+        return dueGroups
 
-        return newObj       # 返回克隆对象的新内存地址
+
+    def __len__(self):
+        return len( self.entries )
 
 
 
@@ -817,16 +2204,34 @@ class FixedSizeArray:
 class SurvivorClass:
     """
     为每个生还者 Client 实例化一个生还者类
+
+    使用 __slots__ 代替每个实例的 __dict__ 以减少内存占用, 因此不能在类的外部添加新的属性; 新增属性时请同时加入 __slots__ 中
+    slice, status, belongSurvivorGroupLogic 等字符串均为代码中的字面量 ( "R", "D", "B", "S", "I" ), 所有实例共享同一个字符串对象, 不额外占用内存
+    绝对坐标, 导演路程, 是否倒地, 切片, 状态, 压力值以及 slice_2_sec_window 的数据存储在 SurvivorStateStore 的槽位 slot 中 (详见 EntityStateStore 类),
+    对应的属性名与原来保持一致, 通过 property 读写
     """
+    __slots__ = (
+        "stateStore", "slot",
+        "survivor", "survivorID", "instantCreateTime",
+        "should_be_marked_as_S_Status",
+        "slice_2_sec_window", "dirEucDCache",
+        "status_10_sec_window", "statusSliceCount", "statusSliceCountAtTail",
+        "belongSurvivorGroupLogic",
+    )
+
     def __init__(self, client: Client):    # 假设游戏存储客户端所有信息的对象为Client类
         if client.type() != Survivor:
             raise ValueError("client is not Survivor type !")       # 直接停止插件的执行
         
+        # 在状态存储中分配槽位, 以下 绝对坐标 / 导演路程 / 是否倒地 / 切片 / 状态 / 压力值 均写入该槽位
+        self.stateStore = survivorStateStore
+        self.slot = survivorStateStore.allocate()
+
         self.survivor = client
 
         self.survivorID = client.getIdentification()        # 假设获取客户端唯一标识的方法为getIdentification, 不可使用steamID, 出于对闲置的考虑
 
-        self.instantCreateTime = Game.Time()    # 该实例化类创建的时间, 假设游戏获取当前时间的函数为Time
+        self.instantCreateTime = currentGameTime()    # 该实例化类创建的时间, 假设游戏获取当前时间的函数为Time, 同一个执行周期中只读取一次
 
 
         # --- 从游戏中获取的数据 -- #
@@ -853,25 +2258,110 @@ class SurvivorClass:
         # 生还者所处状态, 初始化为R (Status)
         self.status = "R"
 
-        # 长度为2秒的滑动窗口, 由于directorExecutionFrequency = 0.1, 因此实际长度为20
+        # 长度为2秒的滑动窗口, 由于directorExecutionFrequency = 0.1, 因此实际长度为20; 数据存储在状态存储的槽位中, 详见 SlotHistoryWindow 类
         # 该滑动窗口初始填充当前的 (绝对坐标, 导演路程) 数据, 长度为 1
-        self.slice_2_sec_window = FixedSizeArray( int(2 / directorExecutionFrequency) )
+        self.slice_2_sec_window = SlotHistoryWindow( self.stateStore, self.slot )
 
         self.slice_2_sec_window.add_tuple_data( ( self.absolutePosition, self.flowDistance ) )
 
+        # 挂载在 slice_2_sec_window 上的缓存, 存储 dirEucD 的 ( 符号, 欧式位移的平方 ); slice_2_sec_window 每次更新时失效, 详见 dirEucDComponents 函数
+        self.dirEucDCache = self.slice_2_sec_window.addAggregate( WindowCache() )
+
         # 长度为10秒的滑动窗口, 由于directorExecutionFrequency = 0.1, 因此实际长度为100
         # 该滑动窗口初始全部填充 R Slice
         self.status_10_sec_window = FixedSizeArray( int(10 / directorExecutionFrequency) )
 
-        while len(self.status_10_sec_window.data) < self.status_10_sec_window.maxSize:
+        while len(self.status_10_sec_window) < self.status_10_sec_window.maxSize:
             self.status_10_sec_window.add_str_data( "R" )
 
+        # 挂载在 status_10_sec_window 上的累计量, 分别统计整个滑动窗口和末尾 40% 的滑动窗口中 R, D, B Slice 的数量, 供 check_status 使用
+        # 末尾区间的起点为满足 i >= 0.6 * maxSize 的最小逻辑下标 i, 与逐个遍历滑动窗口时的判断条件一致
+        tailStartIndex = 0
+
+        while tailStartIndex < self.status_10_sec_window.maxSize and tailStartIndex < 0.6 * self.status_10_sec_window.maxSize:
+            tailStartIndex += 1
+
+        self.statusSliceCount = self.status_10_sec_window.addAggregate( ValueCountAggregate() )
+        self.statusSliceCountAtTail = self.status_10_sec_window.addAggregate( ValueCountAggregate( tailStartIndex ) )
+
         # 该生还者当前的压力值, 初始化为0, 生还者类内部无法更改该变量, 需要外部进行更改
         self.currSurvivorStress = 0.0
 
         # 该生还者所属的生还者组别的逻辑, 初始化为字符串 R, 生还者类内部无法更改该变量, 需要外部进行更改
         self.belongSurvivorGroupLogic = "R"
 
+
+    # --- 下面的属性存储在状态存储的槽位中 --- #
+
+    @property
+    def absolutePosition(self):
+        return self.stateStore.getPosition( self.slot )
+
+    @absolutePosition.setter
+    def absolutePosition(self, value: tuple):
+        self.stateStore.setPosition( self.slot, value )
+
+    @property
+    def flowDistance(self):
+        return self.stateStore.flowDistance[ self.slot ]
+
+    @flowDistance.setter
+    def flowDistance(self, value: float):
+        self.stateStore.flowDistance[ self.slot ] = value
+
+    @property
+    def isIncapacitied(self):
+        return self.stateStore.incapacitated[ self.slot ] != 0
+
+    @isIncapacitied.setter
+    def isIncapacitied(self, value: bool):
+        self.stateStore.incapacitated[ self.slot ] = 1 if value else 0
+
+    @property
+    def slice(self):        # 编码为 -1 (异常值) 时返回 None
+        code = self.stateStore.sliceCode[ self.slot ]
+        return stateNames[ code ] if code >= 0 else None
+
+    @slice.setter
+    def slice(self, value: str):
+        self.stateStore.sliceCode[ self.slot ] = stateCodes.get( value, -1 )
+
+    @property
+    def status(self):       # 编码为 -1 (异常值) 时返回 None
+        code = self.stateStore.statusCode[ self.slot ]
+        return stateNames[ code ] if code >= 0 else None
+
+    @status.setter
+    def status(self, value: str):       # 状态改变时版本号加 1
+        code = stateCodes.get( value, -1 )
+        stateStore = self.stateStore
+
+        if stateStore.statusCode[ self.slot ] != code:
+            stateStore.statusCode[ self.slot ] = code
+            stateStore.statusVersion[ self.slot ] += 1
+
+    @property
+    def statusVersion(self):
+        return self.stateStore.statusVersion[ self.slot ]
+
+    @property
+    def currSurvivorStress(self):
+        return self.stateStore.survivorStress[ self.slot ]
+
+    @currSurvivorStress.setter
+    def currSurvivorStress(self, value: float):
+        self.stateStore.survivorStress[ self.slot ] = value
+
+
+    def releaseState(self):
+        """
+        该实例化类被舍弃时调用 (详见 EntityRegistry 类), 将槽位归还给状态存储;
+        槽位在下一个执行周期开始之前不会被复用, 因此在此之前仍然可以读取该实例化类的数据
+        """
+        self.stateStore.release( self.slot )
+
+        return True
+
     
     def check_whether_in_S_Status(self):   # 生还者是否处于S Status, 已经集成了切换至S Status的逻辑
         """
@@ -881,7 +2371,7 @@ class SurvivorClass:
         3. 生还者与地图末尾的导演距离差距小于flowDistanceToFinalCheckPoint, 假设游戏获取地图完整导演路程的函数为getTotalFlowDistance
         4. 当前存活生还者大于1人, 注意不可以使用 survivorClientNum > 1 进行判断, 这是因为survivorClientNum记录了死亡和旁观的玩家
         """
-        if self.survivor.isInFinalCheckPoint() and ( not self.isIncapacitied ) and abs( Game.getTotalFlowDistance() 
+        if self.survivor.isInFinalCheckPoint() and ( not self.isIncapacitied ) and abs( currentTotalFlowDistance() 
             - self.flowDistance ) < flowDistanceToFinalCheckPoint and len(satisfiedSurvivorClients) > 1:
 
             self.should_be_marked_as_S_Status = True
@@ -898,32 +2388,70 @@ class SurvivorClass:
 
 
     def is_slice_window_full(self):     # 判断slice滑动窗口是否填充完毕
-        return len(self.slice_2_sec_window.data) >= self.slice_2_sec_window.maxSize
+        return self.slice_2_sec_window.is_full()
 
 
-    def dirEucD(self):      # 计算dirEucD距离
+    def dirEucDComponents(self):
+        """
+        返回 dirEucD 距离的 ( 符号, 欧式位移的平方 ), 符号的取值为 +1, -1 或 0 (视为0位移);
+        计算结果缓存在挂载于 slice_2_sec_window 的 dirEucDCache 中, 直到 slice_2_sec_window 下一次更新, 因此每个执行周期最多计算一次
+        """
+        if self.dirEucDCache.valid:
+            return self.dirEucDCache.value
+
         if not self.is_slice_window_full():     # 如果游戏刚开始, 或者生还者刚复活, 即slice滑动窗口没有填充完毕
-            return 0.0
+            return self.dirEucDCache.store( ( 0, 0.0 ) )
 
         # 请确保 slice_2_sec_window 添加的数据均为 (绝对坐标, 导演路程) 二元组
+        newest = self.slice_2_sec_window[ self.slice_2_sec_window.maxSize - 1 ]
+        oldest = self.slice_2_sec_window[ 0 ]
+
+        flowDisplacement = newest[1] - oldest[1]
+
         # 过去2秒移动的导演路程大于dirEucNoMovementUpBoundary
-        if ( self.slice_2_sec_window.data[ self.slice_2_sec_window.maxSize - 1 ][1]
-             - self.slice_2_sec_window.data[ 0 ][1] ) > dirEucNoMovementUpBoundary:      
-            
-            return +euclideanDistance( self.slice_2_sec_window.data[ self.slice_2_sec_window.maxSize - 1 ][0], 
-                                      self.slice_2_sec_window.data[ 0 ][0] )
-            
-        # 过去2秒移动的导演路程小于dirEucNoMovementUpBoundary
-        if ( self.slice_2_sec_window.data[ self.slice_2_sec_window.maxSize - 1 ][1]
-             - self.slice_2_sec_window.data[ 0 ][1] ) < dirEucNoMovementDownBoundary:
-            
-            return -euclideanDistance( self.slice_2_sec_window.data[ self.slice_2_sec_window.maxSize - 1 ][0], 
-                                      self.slice_2_sec_window.data[ 0 ][0] )
-        
+        if flowDisplacement > dirEucNoMovementUpBoundary:
+            return self.dirEucDCache.store( ( +1, squaredEuclideanDistance( newest[0], oldest[0] ) ) )
+
+        # 过去2秒移动的导演路程小于dirEucNoMovementDownBoundary
+        if flowDisplacement < dirEucNoMovementDownBoundary:
+            return self.dirEucDCache.store( ( -1, squaredEuclideanDistance( newest[0], oldest[0] ) ) )
+
         # 不满足上述所有条件, 则视为0位移
-        else:
+        return self.dirEucDCache.store( ( 0, 0.0 ) )
+
+
+    def dirEucD(self):      # 计算dirEucD距离
+        sign, squaredDistance = self.dirEucDComponents()
+
+        if sign == 0:
             return 0.0
 
+        return sign * math.sqrt( squaredDistance )
+
+
+    def dirEucDGreaterThan(self, boundary: float):      # 等价于 dirEucD() > boundary, 在平方空间中比较, 不需要开方
+        sign, squaredDistance = self.dirEucDComponents()
+
+        if sign > 0:
+            return boundary < 0 or squaredDistance > boundary * boundary
+
+        if sign < 0:
+            return boundary < 0 and squaredDistance < boundary * boundary
+
+        return 0.0 > boundary
+
+
+    def dirEucDLessThan(self, boundary: float):     # 等价于 dirEucD() < boundary, 在平方空间中比较, 不需要开方
+        sign, squaredDistance = self.dirEucDComponents()
+
+        if sign > 0:
+            return boundary > 0 and squaredDistance < boundary * boundary
+
+        if sign < 0:
+            return boundary > 0 or squaredDistance > boundary * boundary
+
+        return 0.0 < boundary
+
 
     def check_slice(self):      # 检查生还者短时行动切片
         if self.slice not in ["R", "D", "B"]:   # 异常值处理
@@ -933,13 +2461,15 @@ class SurvivorClass:
             pass    # 维持初始值R
 
         else:
-            if self.dirEucD() > rushSliceBoundary and self.slice != "R":  # 过去2秒移动的dirEucD距离大于rushSliceBoundary
+            # dirEucD 距离的 符号 和 平方 每个执行周期只计算一次, 与各个边界的比较均在平方空间中进行
+
+            if self.dirEucDGreaterThan( rushSliceBoundary ) and self.slice != "R":  # 过去2秒移动的dirEucD距离大于rushSliceBoundary
                 self.slice = "R"    # 切换至 R Slice
 
-            elif defendSliceDownBoundary <= self.dirEucD() <= defendSliceUpBoundary and self.slice != "D":    # 过去2秒移动的dirEucD距离位于 [defendSliceDownBoundary, defendSliceUpBoundary]
+            elif ( not self.dirEucDLessThan( defendSliceDownBoundary ) ) and ( not self.dirEucDGreaterThan( defendSliceUpBoundary ) ) and self.slice != "D":    # 过去2秒移动的dirEucD距离位于 [defendSliceDownBoundary, defendSliceUpBoundary]
                 self.slice = "D"    # 切换至 D Slice
 
-            elif self.dirEucD() < backSliceBoundary and self.slice != "B":  # 过去2秒移动的dirEucD距离小于backSliceBoundary
+            elif self.dirEucDLessThan( backSliceBoundary ) and self.slice != "B":  # 过去2秒移动的dirEucD距离小于backSliceBoundary
                 self.slice = "B"    # 切换至 B Slice
 
             else:
@@ -960,28 +2490,15 @@ class SurvivorClass:
             
         else:   # 注意该滑动窗口初始化时已经全部填充 R Slice, 所以不会出现异常
             
-            RSliceNum = 0
-            DSliceNum = 0
-            BSliceNum = 0
-            RSliceNumAtTail = 0
-            # DSliceNumAtTail = 0
-            BSliceNumAtTail = 0
-
             # 请确保 status_10_sec_window 添加的数据均为 R, D, B 字符串
-            for i in range( 0, self.status_10_sec_window.maxSize ):     # range为左闭右开区间
-                
-                if self.status_10_sec_window.data[ i ] == "R":
-                    RSliceNum += 1
-                    if i >= 0.6 * self.status_10_sec_window.maxSize:     # 处于末尾的R Slice
-                        RSliceNumAtTail += 1
-
-                elif self.status_10_sec_window.data[ i ] == "D":
-                    DSliceNum += 1
+            # 各个 Slice 的数量由挂载在滑动窗口上的累计量随着 Slice 的加入和移除同步更新, 不需要每次都遍历整个滑动窗口, 结果与逐个遍历完全一致
 
-                elif self.status_10_sec_window.data[ i ] == "B":
-                    BSliceNum += 1
-                    if i >= 0.6 * self.status_10_sec_window.maxSize:
-                        BSliceNumAtTail += 1    # 处于末尾的B Slice
+            RSliceNum = self.statusSliceCount.count( "R" )
+            # DSliceNum = self.statusSliceCount.count( "D" )
+            BSliceNum = self.statusSliceCount.count( "B" )
+            RSliceNumAtTail = self.statusSliceCountAtTail.count( "R" )      # 处于末尾的R Slice
+            # DSliceNumAtTail = self.statusSliceCountAtTail.count( "D" )
+            BSliceNumAtTail = self.statusSliceCountAtTail.count( "B" )      # 处于末尾的B Slice
 
             # Status 标记的优先级 R > B > D
             
@@ -1011,7 +2528,7 @@ class SurvivorClass:
         if self.survivorID != client.getIdentification():   # survivor ID 不一致
             return False        # 不 停止插件的执行, 但处理不当将造成意想不到的错误
         
-        if Game.Time() - self.instantCreateTime < directorExecutionFrequency:   # 不更新刚完成实例化的类的数据, 插件执行一次的时间通常不会超过0.1秒
+        if currentGameTime() - self.instantCreateTime < directorExecutionFrequency:   # 不更新刚完成实例化的类的数据, 插件执行一次的时间通常不会超过0.1秒
             return False
         
         self.survivor = client  # 已知为生还者类型且survivorID, 因此部分数据无需重新更新
@@ -1057,52 +2574,81 @@ class SurvivorClass:
         """
         专门为插件语法设计的在新内存地址克隆对象的方法
         """
-        newObj = SurvivorClass(self.survivor)       # 划分新内存地址
+        newObj = SurvivorClass.__new__( SurvivorClass )       # 划分新内存地址, 不重复从客户端读取数据
 
-        newObj.survivor = self.survivor
+        newObj.stateStore = self.stateStore
+        newObj.slot = self.stateStore.allocate()        # 在同一个状态存储中分配新的槽位
 
-        newObj.survivorID = self.survivorID
+        newObj.slice_2_sec_window = SlotHistoryWindow( newObj.stateStore, newObj.slot )
 
-        newObj.instantCreateTime = self.instantCreateTime
+        newObj.status_10_sec_window = FixedSizeArray( self.status_10_sec_window.maxSize )
+
+        newObj.copyStateFrom( self )
+
+        return newObj       # 返回克隆对象的新内存地址
 
-        newObj.absolutePosition = self.absolutePosition
 
-        newObj.flowDistance = self.flowDistance
 
-        newObj.isIncapacitied = self.isIncapacitied
+    def copyStateFrom(self, other: SurvivorClass):
+        """
+        将 other 的所有数据原地复制到当前实例化类中, 不划分新内存地址 (包括两个滑动窗口);
+        双缓冲的注册表使用该方法将上一个执行周期的数据写入另一个缓冲区中的实例化类, 以避免每个执行周期都克隆所有生还者类
+        """
+        self.survivor = other.survivor
+
+        self.survivorID = other.survivorID
+
+        self.instantCreateTime = other.instantCreateTime
 
-        newObj.should_be_marked_as_S_Status = self.should_be_marked_as_S_Status
+        if self.stateStore is other.stateStore:     # 绝对坐标, 导演路程, 是否倒地, 切片, 状态和压力值在状态存储中逐个数组复制
+            self.stateStore.copySlot( other.slot, self.slot )
 
-        newObj.slice = self.slice
+        else:
+            self.absolutePosition = other.absolutePosition
+            self.flowDistance = other.flowDistance
+            self.isIncapacitied = other.isIncapacitied
+            self.slice = other.slice
+            self.status = other.status
+            self.stateStore.statusVersion[ self.slot ] = other.statusVersion
+            self.currSurvivorStress = other.currSurvivorStress
+
+        self.should_be_marked_as_S_Status = other.should_be_marked_as_S_Status
 
-        newObj.status = self.status
+        self.slice_2_sec_window.copyFrom( other.slice_2_sec_window )
 
-        newObj.slice_2_sec_window = self.slice_2_sec_window.clone()     # 自定义函数 克隆 FixedSizeArray对象至新内存地址
+        self.dirEucDCache, = self.slice_2_sec_window.aggregates
 
-        newObj.status_10_sec_window = self.status_10_sec_window.clone()         # 自定义函数 克隆 FixedSizeArray对象至新内存地址
+        self.status_10_sec_window.copyFrom( other.status_10_sec_window )
 
-        newObj.currSurvivorStress = self.currSurvivorStress
+        # 指向 当前 实例化类的滑动窗口上挂载的累计量
+        self.statusSliceCount, self.statusSliceCountAtTail = self.status_10_sec_window.aggregates
         
-        newObj.belongSurvivorGroupLogic = self.belongSurvivorGroupLogic
+        self.belongSurvivorGroupLogic = other.belongSurvivorGroupLogic
 
-        return newObj       # 返回克隆对象的新内存地址
+        return self
 
 
 
 
 class TankClass:
     """
-    为每个坦克 Client 实例化一个坦克类
+    为每个坦克 Client 实例化一个坦克类, 与生还者类一样使用 __slots__; 绝对坐标和导演路程存储在 EntityStateStore 的槽位 slot 中
     """
+    __slots__ = ( "stateStore", "slot", "tank", "tankID", "instantCreateTime", "focusedTarget" )
+
     def __init__(self, client: Client):    # 假设游戏存储客户端所有信息的对象为Client类
         if client.type() != Tank:
             raise ValueError("client is not Tank type !")       # 直接停止插件的执行
         
+        # 在状态存储中分配槽位, 绝对坐标和导演路程写入该槽位
+        self.stateStore = tankStateStore
+        self.slot = tankStateStore.allocate()
+
         self.tank = client
 
         self.tankID = client.getIdentification()        # 假设获取客户端唯一标识的方法为getIdentification, 不可使用steamID
 
-        self.instantCreateTime = Game.Time()    # 该实例化类创建的时间, 假设游戏获取当前时间的函数为Time
+        self.instantCreateTime = currentGameTime()    # 该实例化类创建的时间, 假设游戏获取当前时间的函数为Time, 同一个执行周期中只读取一次
 
 
         # --- 从游戏中获取的数据 -- #
@@ -1121,6 +2667,35 @@ class TankClass:
         # ......
 
 
+    # --- 下面的属性存储在状态存储的槽位中 --- #
+
+    @property
+    def absolutePosition(self):
+        return self.stateStore.getPosition( self.slot )
+
+    @absolutePosition.setter
+    def absolutePosition(self, value: tuple):
+        self.stateStore.setPosition( self.slot, value )
+
+    @property
+    def flowDistance(self):
+        return self.stateStore.flowDistance[ self.slot ]
+
+    @flowDistance.setter
+    def flowDistance(self, value: float):
+        self.stateStore.flowDistance[ self.slot ] = value
+
+
+    def releaseState(self):
+        """
+        该实例化类被舍弃时调用 (详见 EntityRegistry 类), 将槽位归还给状态存储;
+        槽位在下一个执行周期开始之前不会被复用, 因此在此之前仍然可以读取该实例化类的数据
+        """
+        self.stateStore.release( self.slot )
+
+        return True
+
+
     def returnFocusedTarget(self):
         """
         被外部调用, 用于计算压力值等流程
@@ -1139,7 +2714,7 @@ class TankClass:
         if self.tankID != client.getIdentification():   # tank ID 不一致
             return False        # 不 停止插件的执行, 但处理不当将造成意想不到的错误
         
-        if Game.Time() - self.instantCreateTime < directorExecutionFrequency:   # 不更新刚完成实例化的类的数据, 插件执行一次的时间通常不会超过0.1秒
+        if currentGameTime() - self.instantCreateTime < directorExecutionFrequency:   # 不更新刚完成实例化的类的数据, 插件执行一次的时间通常不会超过0.1秒
             return False
         
         self.tank = client  # 已知为坦克类型且tankID, 因此部分数据无需重新更新
@@ -1164,30 +2739,54 @@ class TankClass:
         """
         专门为插件语法设计的在新内存地址克隆对象的方法
         """
-        newObj = TankClass(self.tank)       # 划分新内存地址
+        newObj = TankClass.__new__( TankClass )       # 划分新内存地址, 不重复从客户端读取数据
 
-        newObj.tank = self.tank
+        newObj.stateStore = self.stateStore
+        newObj.slot = self.stateStore.allocate()        # 在同一个状态存储中分配新的槽位
 
-        newObj.tankID = self.tankID
+        newObj.copyStateFrom( self )
+
+        return newObj       # 返回克隆对象的新内存地址
 
-        newObj.instantCreateTime = self.instantCreateTime
 
-        newObj.absolutePosition = self.absolutePosition
 
-        newObj.flowDistance = self.flowDistance
+    def copyStateFrom(self, other: TankClass):
+        """
+        将 other 的所有数据原地复制到当前实例化类中, 不划分新内存地址, 供双缓冲的注册表使用
+        """
+        self.tank = other.tank
 
-        newObj.focusedTarget = self.focusedTarget
+        self.tankID = other.tankID
 
-        return newObj       # 返回克隆对象的新内存地址
+        self.instantCreateTime = other.instantCreateTime
+
+        if self.stateStore is other.stateStore:
+            self.stateStore.copySlot( other.slot, self.slot )
+
+        else:
+            self.absolutePosition = other.absolutePosition
+            self.flowDistance = other.flowDistance
+
+        self.focusedTarget = other.focusedTarget
+
+        return self
 
 
 
 
 class SurvivorGroupClass:
     """
-    为每个生还者组别 Survivor Group 实例化一个组别类
+    为每个生还者组别 Survivor Group 实例化一个组别类, 与生还者类一样使用 __slots__
                                                                 *** 非常复杂, 请仔细阅读注释 ***
     """
+    __slots__ = (
+        "survivorMembers", "survivorGroupID", "instantCreateTime",
+        "memberNum", "notIMemberNum",
+        "survivorGroupLogic", "survivorGroupStress", "should_be_marked_as_S_Logic",
+        "leftSpawnInterval", "rightSpawnInterval", "spawnInterval", "lastSpawnTime", "whetherRequestTank",
+        "evaluationKey",
+    )
+
     def __init__(self, survivorClassListGroupingByStrategy: list):
         """
         parameters:
@@ -1201,7 +2800,7 @@ class SurvivorGroupClass:
         # 详见 "方案" 第 3.1.3 小节: 生还者组别合并和拆分时数据的合并和复制
         self.survivorGroupID = survivorClassListGroupingByStrategy[ 0 ].survivorID
 
-        self.instantCreateTime = Game.Time()    # 该实例化类创建的时间, 假设游戏获取当前时间的函数为Time
+        self.instantCreateTime = currentGameTime()    # 该实例化类创建的时间, 假设游戏获取当前时间的函数为Time, 同一个执行周期中只读取一次
 
 
         # 成员的总数量
@@ -1243,7 +2842,7 @@ class SurvivorGroupClass:
         # 对于游戏刚开始第一个坦克延迟刷新的现象 ( 因为组别类被实例化时的spawnInterval不为0 ), 可以在插件的主循环中添加额外的判断条件强制刷新第一个坦克 (可以不解决)
         # 组别类被实例化时的spawnInterval 不宜 设置为0, 考虑到较大的起始点区域可能会使插件开始执行时同时创建多个组别, 此时spawnInterval初始化为0会导致插件在游戏开始后
         # 非常短的时间内就尝试向后方组别附近生成坦克
-        self.lastSpawnTime = Game.Time()
+        self.lastSpawnTime = currentGameTime()
 
         # 是否开始请求在组别附近生成坦克, 初始化为False
         self.whetherRequestTank = False
@@ -1257,8 +2856,37 @@ class SurvivorGroupClass:
         # 检查 survivorGroupLogic 的取值
         self.check_logic()
 
-        # 检查 whetherRequestTank 的取值
-        self.checkWhetherRequestTank()  
+        # whetherRequestTank 的取值不再在此处检查, 而是在分组完成后加入 tankRequestSchedule, 由坦克生成器在到达时间点时调用 checkWhetherRequestTank
+
+        # 记录此次检查之后的输入, 详见 evaluationKeyOf
+        self.evaluationKey = self.evaluationKeyOf()
+
+        if tickGroupEvaluationCounter is not None:
+            tickGroupEvaluationCounter.evaluated += 1
+
+
+
+    def evaluationKeyOf(self):
+        """
+        返回组别检查 ( check_whether_in_S_Logic, check_logic ) 的输入: ( 成员的 survivorID, 成员状态的版本号 ); 输入与上一次检查之后相同时, 检查的结果也相同, 可以跳过
+
+        其余的输入均已包括在内或者不需要记录:
+            notIMemberNum 和各个 R / D / B 状态的数量由成员的状态决定;
+            should_be_marked_as_S_Logic 和 survivorGroupLogic 是上一次检查的结果, 成员的 belongSurvivorGroupLogic 随成员的数据一起继承;
+            whetherRequestTank 由 tankRequestSchedule 按照时间点检查, 不属于组别检查
+        存在 S 状态的成员时返回 None (始终重新检查), 因为 S Logic 的判断还依赖于成员的导演路程与地图完整导演路程之差, 每个执行周期都可能变化
+        """
+        memberIDs = []
+        statusVersions = []
+
+        for surClass in self.survivorMembers:
+            if surClass.status == "S":
+                return None
+
+            memberIDs.append( surClass.survivorID )
+            statusVersions.append( surClass.statusVersion )
+
+        return ( tuple( memberIDs ), tuple( statusVersions ) )
 
 
 
@@ -1297,7 +2925,7 @@ class SurvivorGroupClass:
 
                 elif surClass.status == "S":    # 存在标记为 S Status 的生还者
 
-                    if abs( Game.getTotalFlowDistance() - surClass.flowDistance ) < flowDistanceToFinalCheckPoint:  # 且当前导演路程与终点区域的距离小于flowDistanceToFinalCheckPoint
+                    if abs( currentTotalFlowDistance() - surClass.flowDistance ) < flowDistanceToFinalCheckPoint:  # 且当前导演路程与终点区域的距离小于flowDistanceToFinalCheckPoint
                         
                         self.should_be_marked_as_S_Logic = True
                         return self.should_be_marked_as_S_Logic     # 结束搜索, 返回True
@@ -1399,7 +3027,7 @@ class SurvivorGroupClass:
         检查是否满足申请在该组别类附近生成坦克的条件
         该函数可被生还者组别类自身调用, 返回的值供外界判断该生还者组别是否正在申请生成坦克
         """
-        if ( Game.Time() - self.lastSpawnTime ) >= self.spawnInterval:      # 当前游戏时间 减去 上一次生成坦克的游戏时间 大于等于开始请求的间隔
+        if ( currentGameTime() - self.lastSpawnTime ) >= self.spawnInterval:      # 当前游戏时间 减去 上一次生成坦克的游戏时间 大于等于开始请求的间隔
             self.whetherRequestTank = True          # 是的, 开始申请, 直到成功在该组别附近生成坦克
 
         # 否则, 维持原本的否定值不变
@@ -1416,11 +3044,15 @@ class SurvivorGroupClass:
         """
         self.whetherRequestTank = False         # 调用此函数时, 说明已经成功在该组别附近生成坦克, 因此取消申请坦克
         
-        self.lastSpawnTime = Game.Time()        # 记录此次生成坦克的时间
+        self.lastSpawnTime = currentGameTime()        # 记录此次生成坦克的时间
 
         # 重新生成下一次开始申请坦克的时间间隔
         self.spawnInterval = random.uniform( self.leftSpawnInterval, self.rightSpawnInterval )
 
+        # 以新的时间点重新加入请求坦克的时间表
+        if tankRequestSchedule is not None:
+            tankRequestSchedule.schedule( self )
+
         return True
 
 
@@ -1450,6 +3082,10 @@ class SurvivorGroupClass:
             self.leftSpawnInterval = newLeftInterval
             self.rightSpawnInterval = newRightInterval
 
+            # spawnInterval 可能已经改变, 以新的时间点重新加入请求坦克的时间表
+            if tankRequestSchedule is not None:
+                tankRequestSchedule.schedule( self )
+
        # 不满足上面的条件, 则不做任何改变
 
         return True
@@ -1460,7 +3096,7 @@ class SurvivorGroupClass:
 
     def updateSurvivorGroupInfo(self, survivorClassListGroupingByStrategy: list):
 
-        if Game.Time() - self.instantCreateTime < directorExecutionFrequency:   # 不更新刚完成实例化的类的数据, 插件执行一次的时间通常不会超过0.1秒
+        if currentGameTime() - self.instantCreateTime < directorExecutionFrequency:   # 不更新刚完成实例化的类的数据, 插件执行一次的时间通常不会超过0.1秒
             return False
         
 
@@ -1473,6 +3109,18 @@ class SurvivorGroupClass:
         # 成员的总数量
         self.memberNum = len(survivorClassListGroupingByStrategy)
 
+
+        # --- 成员构成和成员的状态都没有变化时, 上一次检查的结果 (包括 notIMemberNum) 仍然有效, 跳过检查 --- #
+
+        evaluationKey = self.evaluationKeyOf()
+
+        if groupEvaluationSkipping and evaluationKey is not None and evaluationKey == self.evaluationKey:
+
+            if tickGroupEvaluationCounter is not None:
+                tickGroupEvaluationCounter.skipped += 1
+
+            return True
+
         # 非 处于 I 状态的 成员数量
         self.notIMemberNum = 0
 
@@ -1486,7 +3134,14 @@ class SurvivorGroupClass:
 
         self.check_whether_in_S_Logic() 
         self.check_logic()
-        self.checkWhetherRequestTank()  
+
+        # check_logic 可能修改成员的状态, 因此在检查之后记录输入
+        self.evaluationKey = self.evaluationKeyOf()
+
+        if tickGroupEvaluationCounter is not None:
+            tickGroupEvaluationCounter.evaluated += 1
+
+        # whetherRequestTank 由 tankRequestSchedule 在到达时间点时检查, 详见 TankRequestSchedule 类
 
 
         return True     # 成功更新实例化生还者组别类信息
@@ -1497,12 +3152,12 @@ class SurvivorGroupClass:
         """
         专门为插件语法设计的在新内存地址克隆对象的方法
         """
-        newObj = SurvivorGroupClass(self.survivorMembers)       # 划分新内存地址
+        # 划分新内存地址; 不调用构造函数, 因为构造函数中的检查流程会修改成员的数据, 并重新生成随机的 spawnInterval
+        newObj = SurvivorGroupClass.__new__( SurvivorGroupClass )
 
-        newObj.survivorMembers = []         # 为 survivorMembers 列表 及其中的 生还者类 划分新的内存
-
-        for _ in self.survivorMembers:
-            newObj.survivorMembers.append( _.clone() )      # 克隆原本的列表中 所有的生还者类 至新的列表中
+        # 只为 survivorMembers 列表划分新的内存, 不克隆其中的生还者类:
+        # 上一个执行周期的生还者类存储在双缓冲注册表的另一个缓冲区中, 当前执行周期不会修改它们, 并且 updateSurvivorGroupInfo 会替换整个成员列表
+        newObj.survivorMembers = list( self.survivorMembers )
 
         newObj.survivorGroupID = self.survivorGroupID
 
@@ -1528,6 +3183,8 @@ class SurvivorGroupClass:
 
         newObj.whetherRequestTank = self.whetherRequestTank
 
+        newObj.evaluationKey = self.evaluationKey
+
         return newObj       # 返回克隆对象的新内存地址
 
 
@@ -1535,104 +3192,283 @@ class SurvivorGroupClass:
 
 
 
-"""
-下面的代码将模拟插件的执行流程. 当游戏的导演系统被激活后, 本插件将以 directorExecutionFrequency 的频率反复执行, 直到本局游戏结束
-"""
-if __name__ == "__main__":
+survivorRegistry = createSurvivorRegistry( doubleBuffered = True )
+tankRegistry = createTankRegistry( doubleBuffered = True )
+survivorOrder = FlowDistanceOrder()
+tickDistanceCache = DistanceCache()
+tickGroupEvaluationCounter = GroupEvaluationCounter()
+tickGroupLineage = GroupLineage()
+survivorStateStore = SurvivorStateStore( int(2 / directorExecutionFrequency) )
+tankStateStore = EntityStateStore()
+tankRequestSchedule = TankRequestSchedule()
 
-    while True:         # 如果 游戏正在进行 且 没有出现异常, 那么插件就不会停止执行, 这里的 True 可以视为导演系统被激活
 
 
-            # --- 1. 获取所需要的客户端 --- #
-        
-        # 下面的变量均为全局变量
-        satisfiedSurvivorClients, survivorClientNum, tankClients, tankClientNum = getSatisfiedClientFromGame()
 
+""" --- 插件的单次执行周期 --- """
+
+# 在执行周期之间传递的全局变量, 即一个对局中导演系统的全部状态; 多个对局共用一个进程时, 通过 captureDirectorState / restoreDirectorState 切换
+directorStateNames = (
+    "Game",
+    "satisfiedSurvivorClients", "survivorClientNum", "tankClients", "tankClientNum",
+    "survivorClassList", "tankClassList", "last_survivorClassList", "last_tankClassList",
+    "survivorGroupClassList", "last_survivorGroupClassList",
+    "survivorRegistry", "tankRegistry", "survivorOrder", "tickDistanceCache", "tickGroupEvaluationCounter", "tickGroupLineage", "clientSnapshotBatch",
+    "survivorStateStore", "tankStateStore", "tankRequestSchedule",
+)
 
-            # --- 2. 为这些客户端创建或者更新对应的实例化类 --- #
 
-        # 如果当前游戏中不存在存活的生还者, 则跳出循环体并停止插件的执行, 可以视为导演系统被关闭
-        # 再次提醒, 不轻易使用 survivorClientNum <= 0, 因为 survivorClientNum 同样记录了 死亡 和 旁观 的生还者客户端的数量
-        if len( satisfiedSurvivorClients ) <= 0:         
-            break 
 
 
-        # --- 重点: 如果插件不存在功能近似于 python 中 deepcopy 的函数为 数组 和 实例化类 强制划分新的内存地址, 那么可以尝试使用
-        # 如下办法, 以避免修改上一个插件执行周期中产生的数据, 因为保持先前数据的一致性是每个周期中数据继承和更新的基础 --- #
+def captureDirectorState():
+    """
+    返回当前对局的导演系统状态 ( 全局变量名 -> 取值 ), 只保存引用, 不复制数据
+    """
+    moduleGlobals = globals()
 
-        temp_last_survivorClassList = []
-        temp_last_tankClassList = []
-        # temp_last_survivorGroupClassList = []
+    return { name: moduleGlobals[ name ] for name in directorStateNames }
 
-        for surClass in last_survivorClassList:
-            temp_last_survivorClassList.append( surClass.clone() )      # 克隆原本的生还者实例化类信息至新内存
 
-        for tankClass in last_tankClassList:
-            temp_last_tankClassList.append( tankClass.clone() )         # 克隆原本的坦克实例化类信息至新内存
 
-        # --- 组别类不需要使用临时列表存储克隆的组别实例化信息, 划分新内存的工作会在 survivorGroupingStrategy 函数中完成 --- #
-        # --- 这是因为即便 last_survivorClassList 和 last_tankClassList 中的数据被污染, 也不影响插件剩余逻辑的运行, 因为生还者和坦克不存在合并与拆分的处理 --- #
-        # --- 而一旦 last_survivorGroupClassList 被污染, 那么整个分组逻辑将直接出现问题, 因此 survivorGroupingStrategy 内部实现了新内存的划分 --- #
 
-        # for groupClass in last_survivorGroupClassList:
-        #     temp_last_survivorGroupClassList.append( groupClass.clone() )       # 克隆原本的 生还者组别 实例化类信息至新内存
+def restoreDirectorState(state: dict):
+    """
+    将 captureDirectorState 返回的状态重新设置为当前对局的导演系统状态
+    """
+    globals().update( state )
 
+    return True
 
-        # 传入生还者类的临时列表; 在该函数执行完毕后, 该临时列表将作废, 因为其中的数据已经被污染 (内存引用问题), 返回当前的生还者类列表
-        survivorClassList = getSurvivorClassListSortedByFlowDist(satisfiedSurvivorClients, temp_last_survivorClassList)     
 
-        # 传入坦克类的临时列表; 在该函数执行完毕后, 该临时列表将作废, 因为其中的数据已经被污染 (内存引用问题), 返回当前的坦克类列表
-        tankClassList = getTankClassList(tankClients, temp_last_tankClassList)
 
 
-            # --- 3. 为 survivorClassList 执行生还者分组策略, 并为每个组别创建或者更新对应的实例化类, 同时执行合并与拆分策略 --- #
+def resetDirectorState():
+    """
+    清空所有在执行周期之间传递的全局变量, 相当于导演系统被重新激活; 用于在同一进程中多次运行插件 (模拟世界, 基准测试等)
+    """
+    global satisfiedSurvivorClients, survivorClientNum, tankClients, tankClientNum, clientSnapshotBatch, survivorStateStore, tankStateStore
+    global survivorClassList, tankClassList, last_survivorClassList, last_tankClassList
+    global survivorGroupClassList, last_survivorGroupClassList, survivorRegistry, tankRegistry, survivorOrder, tickDistanceCache, tankRequestSchedule
+    global tickGroupEvaluationCounter, tickGroupLineage
 
-        if len( survivorClassList ) <= 0:
-            break
-        
-        # last_survivorGroupClassList 不会被污染, 该函数内部已经实现了新内存的划分 (克隆), 详见上面的注释, 返回当前的生还者组别类列表
-        survivorGroupClassList = survivorGroupingStrategy(survivorClassList, last_survivorGroupClassList)   
+    satisfiedSurvivorClients = []
+    survivorClientNum = 0
+    tankClients = []
+    tankClientNum = 0
+    survivorClassList = []
+    tankClassList = []
+    last_survivorClassList = []
+    last_tankClassList = []
+    survivorGroupClassList = []
+    last_survivorGroupClassList = []
+    survivorRegistry = createSurvivorRegistry( doubleBuffered = True )
+    tankRegistry = createTankRegistry( doubleBuffered = True )
+    survivorOrder = FlowDistanceOrder()
+    tickDistanceCache = DistanceCache()
+    tickGroupEvaluationCounter = GroupEvaluationCounter()
+    tickGroupLineage = GroupLineage()
+    clientSnapshotBatch = None
+    survivorStateStore = SurvivorStateStore( int(2 / directorExecutionFrequency) )
+    tankStateStore = EntityStateStore()
+    tankRequestSchedule = TankRequestSchedule()
 
+    return True
 
-            # --- 4. 计算各生还者及其所属组别的压力值 --- #
 
-        if len( survivorGroupClassList ) <= 0:
-            break
 
-        # 无需克隆 survivorGroupClassList 中保存的各个生还者类和组别类数据, 因为计算他们的压力值就是要篡改他们内部的数据
-        computeCurrSurvivorStress(survivorGroupClassList, tankClassList)
-        computeCurrGroupStress(survivorGroupClassList)
+def runDirectorTick():
+    """
+    执行一次插件的主程序 (即一个执行周期), 包含 runDirectorTickPhases 中编号为 1 - 8 的流程, 第 9 步的回调由调用者负责 (详见 tankrun_demo_scheduler.py)
+    在游戏中每 directorExecutionFrequency 秒调用一次; 离线运行时可以在推进虚拟时钟后连续调用
+    启用了性能统计时, 同时统计此次执行周期的耗时
+
+    return:
+    是否应该继续执行插件, 返回 False 可以视为导演系统被关闭
+    """
+    global tickContext
+
+    try:
+        if instrumentation is None:
+            return runDirectorTickPhases()
 
+        completed = False
 
-            # --- 5. 动态调控策略, 在调用坦克生成器前执行; 如果需要修改生还者组别的请求坦克间隔, 请调用 adjustSpawnInterval 函数 --- #
+        instrumentation.beginTick()
 
-            # 此部分内容尚未完成
+        try:
+            completed = runDirectorTickPhases()
+        finally:
+            instrumentation.endTick( completed )
 
+        return completed
 
-            # --- 6. 调用坦克生成器, 各个 组别实例化类 保存的数据作为是否要在该组别附近生成坦克的依据, 按照 survivorGroupClassList 中组别类的先后顺序进行判断, 即优先为前排组别生成坦克 --- #
+    finally:
+        # 执行周期以外 (例如坦克生成器在执行周期之后调用 updateLastSpawnTime) 不再使用此次执行周期的世界常量
+        tickContext = None
 
-            # 此部分内容 Python 难以写出伪代码, 请参阅 "方案" 1.1.11, 1.2.4, 1.3.3 小节 与 第3大章 以明确 坦克生成条件 和 坦克生成位置 的合法性
 
 
 
-            # --- 7. 其他处理 --- #
+def runDirectorTickPhases():
+    """
+    插件主程序中编号为 1 - 8 的流程, 请通过 runDirectorTick 调用; 启用了性能统计时, 在每个流程结束时记录该流程的耗时
+    """
+    global satisfiedSurvivorClients, survivorClientNum, tankClients, tankClientNum
+    global survivorClassList, tankClassList, last_survivorClassList, last_tankClassList
+    global survivorGroupClassList, last_survivorGroupClassList, survivorRegistry, tankRegistry, survivorOrder, tickDistanceCache
+    global clientSnapshotBatch, tickContext
 
-            # 可以考虑使用之前产生的数据做额外的处理, 比如根据生还者的压力值计算积分等功能, 目前阶段尚不实现
 
+        # --- 1. 获取所需要的客户端 --- #
 
+    # 游戏时间和地图完整导演路程在每个执行周期中只读取一次, 此后的所有流程均使用 tickContext 中的数据, 详见 TickContext 类
+    tickContext = TickContext.sample( Game ) if tickContextSampling else None
+    
+    # 清空上一个执行周期的 maxD 距离缓存, 客户端的数据可能已经发生了变化
+    tickDistanceCache.clear()
+
+    # 清空上一个执行周期的组别检查统计
+    tickGroupEvaluationCounter.clear()
+
+    # 上一个执行周期中被舍弃的实例化类已经不再被引用, 回收它们在状态存储中的槽位
+    survivorStateStore.recycle()
+    tankStateStore.recycle()
+
+    # 每个客户端只读取一次, 此后的流程均使用快照中的数据
+    clientSnapshotBatch = takeClientSnapshot()
+
+    # 下面的变量均为全局变量
+    satisfiedSurvivorClients, survivorClientNum, tankClients, tankClientNum = getSatisfiedClientFromGame(clientSnapshotBatch)
+
+    if traceRecorder is not None:
+        traceRecorder.recordBatch( currentGameTime(), currentTotalFlowDistance(), clientSnapshotBatch )
+
+    if instrumentation is not None:
+        instrumentation.lap( "1.getSatisfiedClientFromGame" )
+
+
+        # --- 2. 为这些客户端创建或者更新对应的实例化类 --- #
+
+    # 如果当前游戏中不存在存活的生还者, 则跳出循环体并停止插件的执行, 可以视为导演系统被关闭
+    # 再次提醒, 不轻易使用 survivorClientNum <= 0, 因为 survivorClientNum 同样记录了 死亡 和 旁观 的生还者客户端的数量
+    if len( satisfiedSurvivorClients ) <= 0:         
+        return False 
+
+
+    # --- 重点: 保持上一个执行周期中产生的数据的一致性是每个周期中数据继承和更新的基础 --- #
+    # --- 生还者和坦克的注册表使用双缓冲: 上一个执行周期的实例化类 (last_survivorClassList, last_tankClassList) 保持不变, 当前执行周期的数据被写入另一个缓冲区中的实例化类,
+    # 因此不再需要在每个执行周期开始时克隆 (划分新内存) 所有的生还者类和坦克类, 详见 EntityRegistry 类 --- #
+    # --- 组别类同理, 当前执行周期的组别成员均为另一个缓冲区中的生还者类, 因此 last_survivorGroupClassList 不会被污染 --- #
+
+    # 注册表中记录了此次执行周期中 新加入 / 已离开 / 被更新 的生还者和坦克, 供后续流程使用, 返回当前的生还者类列表
+    survivorClassList = getSurvivorClassListSortedByFlowDist(satisfiedSurvivorClients, last_survivorClassList, survivorRegistry, survivorOrder)     
+
+    if instrumentation is not None:
+        instrumentation.lap( "2.getSurvivorClassListSortedByFlowDist" )
+
+    # 返回当前的坦克类列表
+    tankClassList = getTankClassList(tankClients, last_tankClassList, tankRegistry)
+
+    if instrumentation is not None:
+        instrumentation.lap( "2.getTankClassList" )
+
+
+        # --- 3. 为 survivorClassList 执行生还者分组策略, 并为每个组别创建或者更新对应的实例化类, 同时执行合并与拆分策略 --- #
+
+    if len( survivorClassList ) <= 0:
+        return False
+    
+    # last_survivorGroupClassList 不会被污染, 详见上面的注释, 返回当前的生还者组别类列表
+    survivorGroupClassList = survivorGroupingStrategy(survivorClassList, last_survivorGroupClassList, tickDistanceCache, tickGroupLineage)   
+
+    # 合并与拆分之后, 请求坦克的时间表与当前的组别列表对齐
+    tankRequestSchedule.sync(survivorGroupClassList)
+
+    if instrumentation is not None:
+        instrumentation.lap( "3.survivorGroupingStrategy" )
+
+
+        # --- 4. 计算各生还者及其所属组别的压力值 --- #
+
+    if len( survivorGroupClassList ) <= 0:
+        return False
+
+    # 无需克隆 survivorGroupClassList 中保存的各个生还者类和组别类数据, 因为计算他们的压力值就是要篡改他们内部的数据
+    # 分组完成后, 为每一个生还者建立 survivorID -> ( 所在组别, 在组别中的下标 ) 的索引, 供压力值的计算使用
+    survivorMembershipIndex = buildSurvivorMembershipIndex(survivorGroupClassList)
+
+    computeCurrSurvivorStressByEngine(survivorGroupClassList, tankClassList, survivorMembershipIndex, tickDistanceCache)       # 引擎的选择详见 survivorStressEngine
+
+    if instrumentation is not None:
+        instrumentation.lap( "4.computeCurrSurvivorStress" )
+
+    computeCurrGroupStress(survivorGroupClassList)
+
+    if instrumentation is not None:
+        instrumentation.lap( "4.computeCurrGroupStress" )
+
+
+        # --- 5. 动态调控策略, 在调用坦克生成器前执行; 如果需要修改生还者组别的请求坦克间隔, 请调用 adjustSpawnInterval 函数 --- #
+
+        # 此部分内容尚未完成
+
+    if instrumentation is not None:
+        instrumentation.lap( "5.dynamicAdjustment" )
+
+
+        # --- 6. 调用坦克生成器, 各个 组别实例化类 保存的数据作为是否要在该组别附近生成坦克的依据, 按照 survivorGroupClassList 中组别类的先后顺序进行判断, 即优先为前排组别生成坦克 --- #
+
+    # 只取出已经到达请求时间点的组别并将其标记为正在请求坦克, 而不是为每个组别检查一次; 之后按照 survivorGroupClassList 的顺序处理 whetherRequestTank 为 True 的组别,
+    # 成功生成坦克后调用该组别的 updateLastSpawnTime, 组别将以新的时间点重新加入时间表
+    # 合法生成位置的查询可以使用离线构建的候选点表 (按照导演路程排序, 二分查找), 而不是实时搜索导航网格, 详见 tankrun_demo_spawn_table.py
+    tankRequestSchedule.popDueGroups( currentGameTime() )
+
+        # 此部分内容 Python 难以写出伪代码, 请参阅 "方案" 1.1.11, 1.2.4, 1.3.3 小节 与 第3大章 以明确 坦克生成条件 和 坦克生成位置 的合法性
+
+    if instrumentation is not None:
+        instrumentation.lap( "6.tankSpawner" )
 
-            # --- 8. 记录此次插件执行周期所产生的数据 --- #
-        
-        last_survivorClassList = survivorClassList
-        last_tankClassList = tankClassList
-        last_survivorGroupClassList = survivorGroupClassList
 
 
-            # --- 9. 以 directorExecutionFrequency 的频率回调插件 --- #
+        # --- 7. 其他处理 --- #
+
+        # 可以考虑使用之前产生的数据做额外的处理, 比如根据生还者的压力值计算积分等功能, 目前阶段尚不实现
+
+    if instrumentation is not None:
+        instrumentation.lap( "7.other" )
+
+
+
+        # --- 8. 记录此次插件执行周期所产生的数据 --- #
+    
+    last_survivorClassList = survivorClassList
+    last_tankClassList = tankClassList
+    last_survivorGroupClassList = survivorGroupClassList
+
+    if instrumentation is not None:
+        instrumentation.lap( "8.recordTickData" )
+
+    return True
+
+
+
+
+"""
+下面的代码将模拟插件的执行流程. 当游戏的导演系统被激活后, 本插件将以 directorExecutionFrequency 的频率反复执行, 直到本局游戏结束
+离线运行 (不依赖游戏) 请参阅 tankrun_demo_simulator.py
+"""
+if __name__ == "__main__":
 
-            # 请使用插件中相应的函数实现
+    import tankrun_demo_scheduler
 
+    # --- 9. 以 directorExecutionFrequency 的频率回调插件 --- #
 
+    # 调度器以固定的时间步长执行插件的主程序, 并统计超时的执行周期; 超时处理策略详见 tankrun_demo_scheduler.py
+    # 在游戏中请将 clock 和 sleep 替换为插件中相应的函数
+    scheduler = tankrun_demo_scheduler.TickScheduler( runDirectorTick, directorExecutionFrequency )
 
+    # 如果 游戏正在进行 且 没有出现异常, 那么插件就不会停止执行, 可以视为导演系统被激活
 
+    # --- 1 - 8. 每次调度执行一次插件的主程序 --- #
 
+    scheduler.run()
@@ -0,0 +1,417 @@
+"""
+这是 Left 4 Dead 2 插件企划 "下一代 Tank Run 优化方案" 对应的 demo. 本 demo 为 tankrun_demo_director.py 中的插件主程序提供可选的性能统计.
+本 demo 统计插件主循环中编号为 1 - 9 的各个流程, 以及 survivorGroupingStrategy, computeCurrSurvivorStressByEngine, SurvivorClass.updateSurvivorInfo,
+SurvivorGroupClass.updateSurvivorGroupInfo 等主要函数的耗时分布, 调用次数, 实例化类的数量, 克隆次数和 maxD 距离的计算次数.
+
+未启用时, 插件的主程序中只剩下若干次 "instrumentation is not None" 的判断, 主要函数也不会被替换, 因此几乎没有额外的开销;
+启用后, 最近 historyLength 个执行周期的各流程耗时都会被保留, 可以在真实的对局中找出超出单次执行周期预算的流程
+
+用法示例:
+    instrumentation = tankrun_demo_instrumentation.enable()
+    ... 执行插件的主程序 ...
+    print( instrumentation.formatReport() )
+    tankrun_demo_instrumentation.disable()
+"""
+
+# --------------------------------------------------------------------------------------------------------------------------------------------------- #
+
+import collections
+import functools
+import time
+
+import tankrun_demo_director as director
+
+
+""" --- 性能统计所需全局变量 --- """
+
+# 耗时分布中最小的区间上界 (秒), 之后每个区间的上界为前一个的 2 倍
+histogramSmallestBound = 1e-6
+
+# 耗时分布的区间数量, 最大的区间上界约为 1e-6 * 2 ** 23 = 8.4 秒, 超出的耗时统一计入最后一个区间
+histogramBucketNum = 24
+
+# 默认保留的执行周期记录数量, 对应 60 秒的游戏时间
+defaultHistoryLength = 600
+
+# 被替换为计时版本的 导演系统 函数, 以及类的方法; 类的 clone 方法只统计调用次数
+# 压力值的计算统计 computeCurrSurvivorStressByEngine, 使逐个计算的版本和向量化版本 (survivorStressEngine) 可以在相同的条件下比较
+timedFunctionNames = ( "survivorGroupingStrategy", "computeCurrSurvivorStressByEngine" )
+timedMethodNames = ( ( "SurvivorClass", "updateSurvivorInfo" ), ( "SurvivorGroupClass", "updateSurvivorGroupInfo" ), ( "TankClass", "updateTankInfo" ) )
+countedMethodNames = ( ( "SurvivorClass", "clone" ), ( "TankClass", "clone" ), ( "SurvivorGroupClass", "clone" ) )
+
+# 当前启用的性能统计, 以及被替换之前的原函数 ( 名称 -> 原函数 ), 用于 disable 时恢复
+activeInstrumentation = None
+originalFunctions = {}
+
+
+
+
+""" --- 耗时分布 --- """
+
+class LatencyHistogram:
+    """
+    按照 2 的幂划分区间的耗时分布, 记录一次耗时的开销为 O(区间数量) 以内的常数
+    """
+    __slots__ = ( "buckets", "count", "total", "maximum" )
+
+    def __init__(self):
+        self.buckets = [ 0 ] * histogramBucketNum
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def record(self, seconds: float):
+        bound = histogramSmallestBound
+        index = 0
+
+        while seconds > bound and index < histogramBucketNum - 1:
+            bound += bound
+            index += 1
+
+        self.buckets[ index ] += 1
+        self.count += 1
+        self.total += seconds
+
+        if seconds > self.maximum:
+            self.maximum = seconds
+
+    def mean(self):
+        return self.total / self.count if self.count > 0 else 0.0
+
+    def percentile(self, p: float):
+        """
+        返回第 p 百分位数所在区间的上界 (秒), 不超过记录到的最大值
+        """
+        if self.count <= 0:
+            return 0.0
+
+        rank = p / 100.0 * self.count
+        accumulated = 0
+        bound = histogramSmallestBound
+
+        for bucketCount in self.buckets:
+            accumulated += bucketCount
+
+            if accumulated >= rank:
+                return min( bound, self.maximum )
+
+            bound += bound
+
+        return self.maximum
+
+    def asDict(self):
+        return {
+            "count": self.count,
+            "mean": self.mean(),
+            "p50": self.percentile( 50.0 ),
+            "p99": self.percentile( 99.0 ),
+            "max": self.maximum,
+        }
+
+
+
+
+""" --- 性能统计 --- """
+
+class DirectorInstrumentation:
+    """
+    插件主程序的性能统计, 由 runDirectorTick (流程 1 - 8), TickScheduler (流程 9) 以及被替换的计时版本函数调用
+
+    每个执行周期的记录包括: 总耗时, 各流程的耗时, 以及该执行周期的计数 (调用次数, 实例化类的数量, 克隆次数, maxD 距离的计算次数等)
+    """
+    def __init__(self, historyLength: int = defaultHistoryLength, tickBudget: float = director.directorExecutionFrequency, clock = time.perf_counter):
+        """
+        parameters:
+        @historyLength: 保留的执行周期记录数量
+        @tickBudget: 单次执行周期的预算 (秒), 超出预算的执行周期会被单独统计
+        @clock: 返回当前时间 (秒) 的函数
+        """
+        self.clock = clock
+        self.tickBudget = tickBudget
+
+        # 流程名称 -> 耗时分布, 按照第一次出现的顺序排列
+        self.phaseHistograms = {}
+
+        # 函数名称 -> 耗时分布
+        self.functionHistograms = {}
+
+        # 整个执行周期的耗时分布
+        self.tickHistogram = LatencyHistogram()
+
+        # 所有执行周期的累计计数, 以及单个执行周期中的最大计数
+        self.totalCounters = collections.Counter()
+        self.maxTickCounters = {}
+
+        # 最近 historyLength 个执行周期的记录
+        self.recentTicks = collections.deque( maxlen = historyLength )
+
+        # 超出预算的执行周期数量, 以及耗时最长的执行周期的记录
+        self.overBudgetTicks = 0
+        self.worstTick = None
+
+        # --- 当前执行周期的数据 --- #
+
+        self.tickStartTime = None
+        self.lastMarkTime = 0.0
+        self.tickPhases = {}
+        self.tickCounters = collections.Counter()
+
+
+    # --- 下面的函数由插件的主程序调用 --- #
+
+    def beginTick(self):
+        self.tickStartTime = self.lastMarkTime = self.clock()
+        self.tickPhases = {}
+        self.tickCounters = collections.Counter()
+
+
+    def lap(self, phaseName: str):
+        """
+        记录从上一次 lap (或者 beginTick) 到现在的耗时, 作为流程 phaseName 的耗时
+        """
+        now = self.clock()
+        elapsed = now - self.lastMarkTime
+        self.lastMarkTime = now
+
+        self.tickPhases[ phaseName ] = self.tickPhases.get( phaseName, 0.0 ) + elapsed
+
+        histogram = self.phaseHistograms.get( phaseName )
+
+        if histogram is None:
+            histogram = self.phaseHistograms[ phaseName ] = LatencyHistogram()
+
+        histogram.record( elapsed )
+
+
+    def count(self, counterName: str, value: int = 1):
+        self.tickCounters[ counterName ] += value
+
+
+    def recordLatency(self, phaseName: str, seconds: float):
+        """
+        直接记录一次耗时, 供不在执行周期内的流程 (例如第 9 步的回调) 使用
+        """
+        histogram = self.phaseHistograms.get( phaseName )
+
+        if histogram is None:
+            histogram = self.phaseHistograms[ phaseName ] = LatencyHistogram()
+
+        histogram.record( seconds )
+
+
+    def recordFunction(self, functionName: str, seconds: float):
+        histogram = self.functionHistograms.get( functionName )
+
+        if histogram is None:
+            histogram = self.functionHistograms[ functionName ] = LatencyHistogram()
+
+        histogram.record( seconds )
+
+        self.tickCounters[ "calls." + functionName ] += 1
+
+
+    def endTick(self, completed: bool):
+        """
+        结束当前执行周期的统计; completed 为 False 时 (导演系统被关闭) 只记录耗时
+
+        return:
+        当前执行周期的记录
+        """
+        if self.tickStartTime is None:
+            return None
+
+        duration = self.clock() - self.tickStartTime
+        self.tickStartTime = None
+
+        counters = self.tickCounters
+
+        if completed:       # 实例化类的数量和 maxD 距离的计算次数直接从导演系统中读取
+            counters[ "entities.survivors" ] = len( director.survivorClassList )
+            counters[ "entities.tanks" ] = len( director.tankClassList )
+            counters[ "entities.groups" ] = len( director.survivorGroupClassList )
+            counters[ "distance.evaluations" ] = director.tickDistanceCache.evaluations
+            counters[ "distance.hits" ] = director.tickDistanceCache.hits
+            counters[ "groups.evaluated" ] = director.tickGroupEvaluationCounter.evaluated
+            counters[ "groups.skipped" ] = director.tickGroupEvaluationCounter.skipped
+            counters[ "groups.created" ] = director.tickGroupLineage.createdNum
+            counters[ "groups.inherited" ] = director.tickGroupLineage.inheritedNum
+            counters[ "groups.merges" ] = len( director.tickGroupLineage.merges )
+            counters[ "groups.splits" ] = len( director.tickGroupLineage.splits )
+
+        self.tickHistogram.record( duration )
+        self.totalCounters.update( counters )
+
+        for counterName, value in counters.items():
+            if value > self.maxTickCounters.get( counterName, 0 ):
+                self.maxTickCounters[ counterName ] = value
+
+        record = { "duration": duration, "phases": self.tickPhases, "counters": dict( counters ) }
+        self.recentTicks.append( record )
+
+        if duration > self.tickBudget:
+            self.overBudgetTicks += 1
+
+        if self.worstTick is None or duration > self.worstTick[ "duration" ]:
+            self.worstTick = record
+
+        return record
+
+
+    # --- 下面的函数用于输出统计结果 --- #
+
+    def report(self):
+        tickNum = self.tickHistogram.count
+
+        return {
+            "ticks": tickNum,
+            "overBudgetTicks": self.overBudgetTicks,
+            "tickBudget": self.tickBudget,
+            "tick": self.tickHistogram.asDict(),
+            "phases": { name: histogram.asDict() for name, histogram in self.phaseHistograms.items() },
+            "functions": { name: histogram.asDict() for name, histogram in self.functionHistograms.items() },
+            "countersPerTick": { name: value / tickNum for name, value in self.totalCounters.items() } if tickNum > 0 else {},
+            "maxCountersPerTick": dict( self.maxTickCounters ),
+            "worstTick": self.worstTick,
+        }
+
+
+    def formatReport(self):
+        """
+        将统计结果格式化为表格, 时间单位为微秒
+        """
+        report = self.report()
+
+        lines = [ "ticks=%d over budget=%d (budget %.1f ms)" % ( report[ "ticks" ], report[ "overBudgetTicks" ], report[ "tickBudget" ] * 1e3 ),
+                  "  %-42s %8s %10s %10s %10s" % ( "phase / function", "count", "mean(us)", "p99(us)", "max(us)" ) ]
+
+        rows = [ ( "tick", report[ "tick" ] ) ] + list( report[ "phases" ].items() ) + [ ( "fn " + name, stats ) for name, stats in report[ "functions" ].items() ]
+
+        for name, stats in rows:
+            lines.append( "  %-42s %8d %10.1f %10.1f %10.1f" % ( name, stats[ "count" ], stats[ "mean" ] * 1e6, stats[ "p99" ] * 1e6, stats[ "max" ] * 1e6 ) )
+
+        lines.append( "  %-42s %10s %10s" % ( "counter", "per tick", "max" ) )
+
+        for name in sorted( report[ "countersPerTick" ] ):
+            lines.append( "  %-42s %10.2f %10d" % ( name, report[ "countersPerTick" ][ name ], report[ "maxCountersPerTick" ].get( name, 0 ) ) )
+
+        if report[ "worstTick" ] is not None:
+            worstPhases = sorted( report[ "worstTick" ][ "phases" ].items(), key = lambda item: -item[1] )
+            lines.append( "  worst tick %.1f us: %s" % ( report[ "worstTick" ][ "duration" ] * 1e6,
+                          ", ".join( "%s %.1f" % ( name, elapsed * 1e6 ) for name, elapsed in worstPhases[ :3 ] ) ) )
+
+        return "\n".join( lines )
+
+
+
+
+""" --- 启用和关闭 --- """
+
+def timedFunction(functionName: str, function):
+    """
+    返回 function 的计时版本, 耗时和调用次数记录到当前启用的性能统计中
+    """
+    @functools.wraps( function )
+    def wrapper(*args, **kwargs):
+        instrumentation = activeInstrumentation
+        startTime = instrumentation.clock()
+
+        try:
+            return function( *args, **kwargs )
+        finally:
+            instrumentation.recordFunction( functionName, instrumentation.clock() - startTime )
+
+    return wrapper
+
+
+def countedFunction(counterName: str, function):
+    """
+    返回 function 的计数版本, 调用次数记录到当前启用的性能统计中
+    """
+    @functools.wraps( function )
+    def wrapper(*args, **kwargs):
+        activeInstrumentation.count( counterName )
+        return function( *args, **kwargs )
+
+    return wrapper
+
+
+def enable(instrumentation: DirectorInstrumentation = None):
+    """
+    启用性能统计: 注入导演系统, 并将主要函数替换为计时 / 计数版本; 已经启用时先关闭之前的性能统计
+
+    return:
+    当前启用的性能统计
+    """
+    global activeInstrumentation
+
+    if activeInstrumentation is not None:
+        disable()
+
+    if instrumentation is None:
+        instrumentation = DirectorInstrumentation()
+
+    activeInstrumentation = instrumentation
+
+    for functionName in timedFunctionNames:
+        originalFunctions[ functionName ] = getattr( director, functionName )
+        setattr( director, functionName, timedFunction( functionName, originalFunctions[ functionName ] ) )
+
+    for className, methodName in timedMethodNames + countedMethodNames:
+        cls = getattr( director, className )
+        originalFunctions[ className + "." + methodName ] = cls.__dict__[ methodName ]
+
+    for className, methodName in timedMethodNames:
+        cls = getattr( director, className )
+        setattr( cls, methodName, timedFunction( className + "." + methodName, cls.__dict__[ methodName ] ) )
+
+    for className, methodName in countedMethodNames:
+        cls = getattr( director, className )
+        setattr( cls, methodName, countedFunction( "clones." + className, cls.__dict__[ methodName ] ) )
+
+    refreshRegistries()
+
+    director.setInstrumentation( instrumentation )
+
+    return instrumentation
+
+
+def disable():
+    """
+    关闭性能统计, 恢复所有被替换的函数
+
+    return:
+    被关闭的性能统计, 没有启用时返回 None
+    """
+    global activeInstrumentation
+
+    instrumentation = activeInstrumentation
+
+    if instrumentation is None:
+        return None
+
+    director.setInstrumentation( None )
+
+    for name, function in originalFunctions.items():
+        if "." in name:
+            className, methodName = name.split( "." )
+            setattr( getattr( director, className ), methodName, function )
+        else:
+            setattr( director, name, function )
+
+    originalFunctions.clear()
+    refreshRegistries()
+
+    activeInstrumentation = None
+
+    return instrumentation
+
+
+def refreshRegistries():
+    """
+    注册表在创建时保存了更新实例化类的函数, 替换或者恢复函数后需要同步更新已经存在的注册表
+    """
+    if director.survivorRegistry is not None:
+        director.survivorRegistry.updateEntity = director.SurvivorClass.updateSurvivorInfo
+
+    if director.tankRegistry is not None:
+        director.tankRegistry.updateEntity = director.TankClass.updateTankInfo
@@ -0,0 +1,356 @@
+"""
+这是 Left 4 Dead 2 插件企划 "下一代 Tank Run 优化方案" 对应的 demo. 本 demo 用于在一台服务器上同时为多个对局运行 tankrun_demo_director.py 中的导演系统.
+本 demo 包含一个对局宿主 (MatchHost), 将多个对局分配到若干个工作进程中执行: 每个对局固定在一个工作进程中, 宿主每个执行周期将各个对局的客户端快照发送给对应的工作进程,
+工作进程执行插件的主程序后返回各个组别的决策 (逻辑, 压力值, 是否请求生成坦克等), 同时宿主统计每个工作进程的负载.
+
+导演系统的状态保存在模块的全局变量中 (last_survivorClassList, last_tankClassList, last_survivorGroupClassList 等), 因此工作进程在执行每个对局之前,
+通过 captureDirectorState / restoreDirectorState 切换为该对局的状态; 每个对局同时拥有独立的随机数状态, 执行结果与该对局单独运行时完全一致
+
+用法示例:
+    python tankrun_demo_match_host.py --matches 24 --workers 4 --ticks 600
+"""
+
+# --------------------------------------------------------------------------------------------------------------------------------------------------- #
+
+import argparse
+import collections
+import multiprocessing
+import os
+import random
+import time
+
+import tankrun_demo_director as director
+
+
+""" --- 宿主与工作进程之间传递的数据 --- """
+
+# 一个对局在某一个执行周期的快照: 游戏时间, 地图完整导演路程, 以及按照 getAllClients 顺序排列的所有客户端快照 (ClientSnapshot)
+MatchSnapshot = collections.namedtuple( "MatchSnapshot", ( "time", "totalFlowDistance", "clients" ) )
+
+# 一个生还者组别的决策: 组别的唯一标识, 逻辑, 代表压力值, 是否请求生成坦克, 成员的 survivorID
+GroupDecision = collections.namedtuple( "GroupDecision", ( "survivorGroupID", "survivorGroupLogic", "survivorGroupStress", "whetherRequestTank", "memberIDs" ) )
+
+# 一个对局在某一个执行周期的决策: 导演系统是否仍在运行, 按照导演路程先后顺序排列的组别决策, 以及 survivorID -> 生还者压力值
+MatchDecision = collections.namedtuple( "MatchDecision", ( "matchID", "running", "groups", "survivorStress" ) )
+
+
+
+
+def captureMatchSnapshot(game):
+    """
+    读取一个对局的游戏对象, 返回可以发送给工作进程的 MatchSnapshot; 每个客户端只读取一次, 详见 takeClientSnapshot
+    """
+    return MatchSnapshot( game.Time(), game.getTotalFlowDistance(), director.takeClientSnapshot( game ).clients )
+
+
+
+
+class SnapshotGame:
+    """
+    由 MatchSnapshot 还原的游戏对象, 在工作进程中代替真正的游戏对象注入导演系统
+    """
+    def __init__(self, snapshot: MatchSnapshot):
+        self.snapshot = snapshot
+
+    def getAllClients(self):
+        return self.snapshot.clients
+
+    def Time(self):
+        return self.snapshot.time
+
+    def getTotalFlowDistance(self):
+        return self.snapshot.totalFlowDistance
+
+
+
+
+""" --- 工作进程中的对局 --- """
+
+class MatchRuntime:
+    """
+    一个对局在当前进程中的导演系统状态, 以及该对局独立的随机数状态
+    """
+    def __init__(self, matchID, seed: int = 0):
+        self.matchID = matchID
+
+        director.resetDirectorState()
+        self.directorState = director.captureDirectorState()
+
+        self.randomState = random.Random( seed ).getstate()
+
+        # 执行周期的次数
+        self.tickNum = 0
+
+
+    def tick(self, snapshot: MatchSnapshot):
+        """
+        切换为该对局的状态, 执行一次插件的主程序, 保存状态并返回决策
+        """
+        director.restoreDirectorState( self.directorState )
+        director.bindHost( SnapshotGame( snapshot ), director.Survivor, director.Tank )
+        random.setstate( self.randomState )
+
+        running = director.runDirectorTick()
+
+        self.directorState = director.captureDirectorState()
+        self.randomState = random.getstate()
+        self.tickNum += 1
+
+        return collectMatchDecision( self.matchID, running )
+
+
+
+
+def collectMatchDecision(matchID, running: bool):
+    """
+    从当前对局的导演系统状态中收集决策
+    """
+    if not running:
+        return MatchDecision( matchID, False, (), {} )
+
+    groups = tuple(
+        GroupDecision(
+            groupClass.survivorGroupID, groupClass.survivorGroupLogic, groupClass.survivorGroupStress, groupClass.whetherRequestTank,
+            tuple( surClass.survivorID for surClass in groupClass.survivorMembers )
+        )
+        for groupClass in director.survivorGroupClassList
+    )
+
+    survivorStress = { surClass.survivorID: surClass.currSurvivorStress for surClass in director.survivorClassList }
+
+    return MatchDecision( matchID, True, groups, survivorStress )
+
+
+
+
+def workerMain(connection, survivorType: str, tankType: str):
+    """
+    工作进程的主循环, 处理宿主发送的消息:
+    ( "add", matchID, seed ), ( "remove", matchID ), ( "tick", [ ( matchID, snapshot ), ... ] ), ( "stop", )
+    "tick" 消息的回复为 ( "decisions", [ 决策, ... ], 执行这些对局耗费的时间 )
+    """
+    director.bindHost( None, survivorType, tankType )
+
+    matches = {}
+
+    while True:
+
+        message = connection.recv()
+        command = message[0]
+
+        if command == "tick":
+            startTime = time.perf_counter()
+
+            decisions = [ matches[ matchID ].tick( snapshot ) for matchID, snapshot in message[1] ]
+
+            connection.send( ( "decisions", decisions, time.perf_counter() - startTime ) )
+
+        elif command == "add":
+            matchID, seed = message[1], message[2]
+            matches[ matchID ] = MatchRuntime( matchID, seed )
+
+        elif command == "remove":
+            matches.pop( message[1], None )
+
+        elif command == "stop":
+            break
+
+    connection.close()
+
+
+
+
+""" --- 对局宿主 --- """
+
+class MatchHost:
+    """
+    在 workerNum 个工作进程中运行多个对局的宿主; 每个对局在加入时被固定分配到当前对局数量最少的工作进程中, 之后不再移动
+    """
+    def __init__(self, workerNum: int = None, survivorType: str = "Survivor", tankType: str = "Tank", context = None):
+        """
+        parameters:
+        @workerNum: 工作进程的数量, 为 None 时使用 CPU 核心数
+        @survivorType, @tankType: 生还者和坦克客户端的 client.type() 返回值, 详见 bindHost
+        @context: multiprocessing 的上下文, 为 None 时使用默认的上下文
+        """
+        if workerNum is None:
+            workerNum = os.cpu_count() or 1
+
+        if workerNum <= 0:
+            raise ValueError("workerNum must be positive !")
+
+        if context is None:
+            context = multiprocessing.get_context()
+
+        # 宿主进程读取客户端快照时同样需要比较客户端的类型
+        director.bindHost( director.Game, survivorType, tankType )
+
+        self.connections = []
+        self.processes = []
+
+        for _ in range( workerNum ):
+            hostConnection, workerConnection = context.Pipe()
+
+            process = context.Process( target = workerMain, args = ( workerConnection, survivorType, tankType ), daemon = True )
+            process.start()
+            workerConnection.close()
+
+            self.connections.append( hostConnection )
+            self.processes.append( process )
+
+        # matchID -> 工作进程编号
+        self.matchWorker = {}
+
+        # 每个工作进程的统计信息: 对局数量, 执行的对局执行周期次数, 累计 / 最近一次的执行耗时
+        self.workerMatchNum = [ 0 ] * workerNum
+        self.workerTickNum = [ 0 ] * workerNum
+        self.workerBusyTime = [ 0.0 ] * workerNum
+        self.workerLastBusyTime = [ 0.0 ] * workerNum
+
+        self.startTime = time.perf_counter()
+
+
+    def addMatch(self, matchID, seed: int = 0):
+        """
+        加入一个对局, 返回其被分配到的工作进程编号
+        """
+        if matchID in self.matchWorker:
+            raise ValueError("match %s already exists !" % ( matchID, ))
+
+        worker = min( range( len( self.connections ) ), key = lambda index: self.workerMatchNum[ index ] )
+
+        self.connections[ worker ].send( ( "add", matchID, seed ) )
+
+        self.matchWorker[ matchID ] = worker
+        self.workerMatchNum[ worker ] += 1
+
+        return worker
+
+
+    def removeMatch(self, matchID):
+        worker = self.matchWorker.pop( matchID )
+
+        self.connections[ worker ].send( ( "remove", matchID ) )
+        self.workerMatchNum[ worker ] -= 1
+
+        return worker
+
+
+    def tick(self, snapshots: dict):
+        """
+        为 snapshots ( matchID -> MatchSnapshot ) 中的每个对局执行一次插件的主程序; 先向所有工作进程发送快照, 再依次接收决策, 使各个工作进程并行执行
+
+        return:
+        matchID -> MatchDecision
+        """
+        jobs = [ [] for _ in self.connections ]
+
+        for matchID, snapshot in snapshots.items():
+            jobs[ self.matchWorker[ matchID ] ].append( ( matchID, snapshot ) )
+
+        busyWorkers = []
+
+        for worker, workerJobs in enumerate( jobs ):
+            if len( workerJobs ) > 0:
+                self.connections[ worker ].send( ( "tick", workerJobs ) )
+                busyWorkers.append( worker )
+
+        decisions = {}
+
+        for worker in busyWorkers:
+            _, workerDecisions, busyTime = self.connections[ worker ].recv()
+
+            self.workerTickNum[ worker ] += len( workerDecisions )
+            self.workerBusyTime[ worker ] += busyTime
+            self.workerLastBusyTime[ worker ] = busyTime
+
+            for decision in workerDecisions:
+                decisions[ decision.matchID ] = decision
+
+        return decisions
+
+
+    def workerLoad(self):
+        """
+        返回每个工作进程的负载: 对局数量, 执行的对局执行周期次数, 平均每次的耗时, 最近一次 tick 的耗时, 以及执行耗时占宿主运行时间的比例
+        """
+        elapsed = max( time.perf_counter() - self.startTime, 1e-9 )
+
+        return [
+            {
+                "worker": worker,
+                "matches": self.workerMatchNum[ worker ],
+                "matchTicks": self.workerTickNum[ worker ],
+                "meanMatchTick": self.workerBusyTime[ worker ] / self.workerTickNum[ worker ] if self.workerTickNum[ worker ] > 0 else 0.0,
+                "lastBusyTime": self.workerLastBusyTime[ worker ],
+                "utilization": self.workerBusyTime[ worker ] / elapsed,
+            }
+            for worker in range( len( self.connections ) )
+        ]
+
+
+    def close(self):
+        for connection in self.connections:
+            try:
+                connection.send( ( "stop", ) )
+            except ( BrokenPipeError, OSError ):
+                pass
+
+        for process in self.processes:
+            process.join( timeout = 5.0 )
+
+        for connection in self.connections:
+            connection.close()
+
+        self.connections = []
+        self.processes = []
+
+        return True
+
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excInfo):
+        self.close()
+        return False
+
+
+
+
+if __name__ == "__main__":
+
+    import tankrun_demo_simulator as simulator
+
+    parser = argparse.ArgumentParser( description = "Run many Tank Run director instances across a worker process pool." )
+    parser.add_argument( "--matches", type = int, default = 16 )
+    parser.add_argument( "--workers", type = int, default = None )
+    parser.add_argument( "--survivors", type = int, default = 8 )
+    parser.add_argument( "--tanks", type = int, default = 6 )
+    parser.add_argument( "--ticks", type = int, default = 600 )
+    parser.add_argument( "--seed", type = int, default = 0 )
+    args = parser.parse_args()
+
+    worlds = { matchID: simulator.buildWorld( args.survivors, args.tanks, args.seed + matchID ) for matchID in range( args.matches ) }
+
+    with MatchHost( args.workers, simulator.SURVIVOR, simulator.TANK ) as host:
+
+        for matchID in worlds:
+            host.addMatch( matchID, args.seed + matchID )
+
+        startTime = time.perf_counter()
+
+        for _ in range( args.ticks ):
+
+            for world in worlds.values():
+                world.advance( director.directorExecutionFrequency )
+
+            host.tick( { matchID: captureMatchSnapshot( world ) for matchID, world in worlds.items() } )
+
+        elapsed = time.perf_counter() - startTime
+
+        print( "%d matches x %d ticks in %.3f s, %.0f match ticks/s" % ( args.matches, args.ticks, elapsed, args.matches * args.ticks / elapsed ) )
+
+        for load in host.workerLoad():
+            print( "worker %d: matches=%d match ticks=%d mean=%.1f us utilization=%.1f%%" % (
+                load[ "worker" ], load[ "matches" ], load[ "matchTicks" ], load[ "meanMatchTick" ] * 1e6, load[ "utilization" ] * 100.0 ) )
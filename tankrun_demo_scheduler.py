@@ -0,0 +1,228 @@
+"""
+这是 Left 4 Dead 2 插件企划 "下一代 Tank Run 优化方案" 对应的 demo. 本 demo 对应 tankrun_demo_director.py 主循环中的第 9 步: 以 directorExecutionFrequency 的频率回调插件.
+本 demo 包含一个固定时间步长的调度器, 按照固定的时间间隔执行插件的主程序, 测量每个执行周期实际的耗时, 并在执行周期超时 (服务器卡顿) 时按照设定的策略处理错过的执行周期.
+
+为什么需要处理超时:
+    生还者类的两个滑动窗口 (slice_2_sec_window, status_10_sec_window) 以 执行周期的次数 计算长度, 而不是以游戏时间计算;
+    如果服务器卡顿导致执行周期被推迟, 那么滑动窗口实际覆盖的游戏时间会变长, R / D / B 切片和状态的判断也会随之偏移.
+    另外, updateSurvivorInfo / updateTankInfo / updateSurvivorGroupInfo 均假设一个执行周期的耗时不会超过 directorExecutionFrequency
+
+超时处理策略:
+    "skip":     舍弃所有错过的执行周期, 等待下一个时间点再执行; 滑动窗口覆盖的游戏时间变长, 但不会在短时间内集中消耗 CPU
+    "coalesce": 立即执行 一次 执行周期代替所有错过的执行周期, 并以此次执行的时间为起点重新对齐之后的时间点
+    "catch-up": 立即连续执行错过的执行周期, 但最多执行 maxCatchUpTicks 次, 超出的部分被舍弃; 滑动窗口中执行周期的次数与游戏时间保持一致, 但补执行的周期读取到的游戏数据可能相同
+
+用法示例:
+    scheduler = TickScheduler( director.runDirectorTick, director.directorExecutionFrequency, overrunPolicy = "skip" )
+    scheduler.run()
+"""
+
+# --------------------------------------------------------------------------------------------------------------------------------------------------- #
+
+import math
+import time
+
+
+""" --- 调度器所需全局变量 --- """
+
+# 可以选择的超时处理策略
+overrunPolicies = ( "skip", "coalesce", "catch-up" )
+
+# 默认的超时处理策略
+defaultOverrunPolicy = "skip"
+
+# catch-up 策略下, 一次最多补执行的执行周期数量
+defaultMaxCatchUpTicks = 3
+
+
+
+
+""" --- 调度器 --- """
+
+class TickScheduler:
+    """
+    以固定的时间步长 period 调用 tickFunction, 直到 tickFunction 返回 False
+
+    clock 和 sleep 默认为真实时间 (time.monotonic, time.sleep); 在游戏中请替换为插件运行环境提供的计时和定时回调函数,
+    离线运行时可以使用虚拟时钟, 例如 clock = world.Time, sleep = world.advance ( tankrun_demo_simulator.py 中的模拟世界 )
+    """
+    def __init__(self, tickFunction, period: float, overrunPolicy: str = defaultOverrunPolicy, maxCatchUpTicks: int = defaultMaxCatchUpTicks,
+                 clock = time.monotonic, sleep = time.sleep, instrumentation = None):
+        """
+        parameters:
+        @tickFunction: 执行一次插件主程序的函数, 返回 False 时停止调度, 例如 runDirectorTick
+        @period: 执行周期的时间步长 (秒), 例如 directorExecutionFrequency
+        @overrunPolicy: 超时处理策略, 详见 overrunPolicies
+        @maxCatchUpTicks: catch-up 策略下一次最多补执行的执行周期数量
+        @clock: 返回当前时间 (秒) 的函数
+        @sleep: 等待指定时间 (秒) 的函数
+        @instrumentation: 可选的性能统计 (详见 tankrun_demo_instrumentation.py), 记录第 9 步回调的延迟 "9.callbackLateness"
+        """
+        if period <= 0:
+            raise ValueError("period must be positive !")      # 直接停止插件的执行
+
+        if overrunPolicy not in overrunPolicies:
+            raise ValueError("unknown overrun policy: %s !" % overrunPolicy)
+
+        if maxCatchUpTicks < 0:
+            raise ValueError("maxCatchUpTicks must not be negative !")
+
+        self.tickFunction = tickFunction
+        self.period = period
+        self.overrunPolicy = overrunPolicy
+        self.maxCatchUpTicks = maxCatchUpTicks
+        self.clock = clock
+        self.sleep = sleep
+        self.instrumentation = instrumentation
+
+        # 下一个执行周期应该开始的时间, 为 None 时表示尚未开始调度
+        self.nextDeadline = None
+
+        # 等待补执行的执行周期数量, 仅在 catch-up 策略下使用
+        self.pendingCatchUpTicks = 0
+
+        self.resetCounters()
+
+
+    def resetCounters(self):
+        """
+        清空所有统计信息
+        """
+        # 实际执行的执行周期数量 (包括补执行的执行周期)
+        self.executedTicks = 0
+
+        # 耗时超过 period 的执行周期数量
+        self.overrunTicks = 0
+
+        # 错过的时间点数量, 无论之后被如何处理
+        self.missedDeadlines = 0
+
+        # 被舍弃 / 被合并 / 被补执行的执行周期数量
+        self.skippedTicks = 0
+        self.coalescedTicks = 0
+        self.caughtUpTicks = 0
+
+        # 最近一次 / 最长的执行周期耗时, 以及最大的延迟 (实际开始时间 减去 应该开始的时间)
+        self.lastTickDuration = 0.0
+        self.worstTickDuration = 0.0
+        self.worstLateness = 0.0
+
+
+    def counters(self):
+        """
+        以字典的形式返回所有统计信息
+        """
+        return {
+            "executedTicks": self.executedTicks,
+            "overrunTicks": self.overrunTicks,
+            "missedDeadlines": self.missedDeadlines,
+            "skippedTicks": self.skippedTicks,
+            "coalescedTicks": self.coalescedTicks,
+            "caughtUpTicks": self.caughtUpTicks,
+            "lastTickDuration": self.lastTickDuration,
+            "worstTickDuration": self.worstTickDuration,
+            "worstLateness": self.worstLateness,
+        }
+
+
+    def runOnce(self):
+        """
+        等待下一个时间点 (补执行的执行周期不等待), 执行一次 tickFunction, 并根据执行结束的时间处理错过的时间点
+
+        return:
+        tickFunction 的返回值, 即是否应该继续执行插件
+        """
+        if self.nextDeadline is None:       # 第一次执行, 不等待
+            self.nextDeadline = self.clock()
+
+        catchingUp = self.pendingCatchUpTicks > 0
+
+        if catchingUp:
+            self.pendingCatchUpTicks -= 1
+            self.caughtUpTicks += 1
+
+        else:
+            waitTime = self.nextDeadline - self.clock()
+
+            if waitTime > 0:
+                self.sleep( waitTime )
+
+
+        # --- 执行并计时 --- #
+
+        startTime = self.clock()
+
+        if not catchingUp:
+            lateness = max( 0.0, startTime - self.nextDeadline )
+            self.worstLateness = max( self.worstLateness, lateness )
+
+            if self.instrumentation is not None:
+                self.instrumentation.recordLatency( "9.callbackLateness", lateness )
+
+        keepRunning = self.tickFunction()
+
+        endTime = self.clock()
+
+        duration = endTime - startTime
+
+        self.executedTicks += 1
+        self.lastTickDuration = duration
+        self.worstTickDuration = max( self.worstTickDuration, duration )
+
+        if duration > self.period:
+            self.overrunTicks += 1
+
+        if catchingUp:      # 补执行的执行周期不推进时间点, 其对应的时间点已经在错过时统计
+            return keepRunning
+
+
+        # --- 推进到下一个时间点, 并处理已经错过的时间点 --- #
+
+        self.nextDeadline += self.period
+
+        if endTime < self.nextDeadline:     # 没有超时
+            return keepRunning
+
+        # 已经错过的时间点数量 (包括 nextDeadline 本身)
+        missedNum = int( math.floor( ( endTime - self.nextDeadline ) / self.period ) ) + 1
+
+        self.missedDeadlines += missedNum
+
+        if self.overrunPolicy == "skip":
+            # 舍弃所有错过的时间点, 下一个时间点为 endTime 之后的第一个时间点
+            self.skippedTicks += missedNum
+            self.nextDeadline += missedNum * self.period
+
+        elif self.overrunPolicy == "coalesce":
+            # 立即执行一次代替所有错过的时间点, 之后的时间点以 endTime 为起点重新对齐
+            self.coalescedTicks += missedNum
+            self.nextDeadline = endTime
+
+        else:
+            # 立即补执行最多 maxCatchUpTicks 次, 超出的部分被舍弃; 补执行完毕后回到原本的时间点上
+            catchUpNum = min( missedNum, self.maxCatchUpTicks )
+
+            self.pendingCatchUpTicks = catchUpNum
+            self.skippedTicks += missedNum - catchUpNum
+            self.nextDeadline += missedNum * self.period
+
+        return keepRunning
+
+
+    def run(self, maxTicks: int = None):
+        """
+        持续调度, 直到 tickFunction 返回 False, 或者执行了 maxTicks 次 (为 None 时不限制)
+
+        return:
+        实际执行的次数
+        """
+        executedNum = 0
+
+        while maxTicks is None or executedNum < maxTicks:
+
+            executedNum += 1
+
+            if not self.runOnce():
+                break
+
+        return executedNum
@@ -0,0 +1,446 @@
+"""
+这是 Left 4 Dead 2 插件企划 "下一代 Tank Run 优化方案" 对应的 demo. 本 demo 用于在游戏以外的环境中运行 tankrun_demo_director.py.
+本 demo 包含一个带有虚拟时钟的模拟世界, 实现了导演系统所需的 Game 和 Client 接口, 使插件的主程序可以脱离游戏, 以远高于 directorExecutionFrequency 的速度离线执行.
+
+用法示例:
+    python tankrun_demo_simulator.py --survivors 8 --tanks 6 --ticks 3000
+    python tankrun_demo_simulator.py --survivors 8 --tanks 6 --ticks 3000 --verify skip
+    python tankrun_demo_simulator.py --survivors 14 --tanks 22 --ticks 3000 --verify band
+    python tankrun_demo_simulator.py --survivors 14 --tanks 22 --ticks 3000 --verify numpy
+    python tankrun_demo_simulator.py --survivors 8 --tanks 6 --ticks 3000 --verify clock
+"""
+
+# --------------------------------------------------------------------------------------------------------------------------------------------------- #
+
+import argparse
+import math
+import random
+import time
+
+import tankrun_demo_director as director
+
+
+""" --- 模拟世界所需全局变量 --- """
+
+# 模拟世界中客户端类型的取值, 通过 bindHost 注入 tankrun_demo_director.py, 与 client.type() 的返回值进行比较
+SURVIVOR = "Survivor"
+TANK = "Tank"
+
+# 默认的地图完整导演路程
+defaultTotalFlowDistance = 30000.0
+
+# 生还者和坦克的移动速度 (单位/秒)
+survivorSpeed = 220.0
+tankSpeed = 210.0
+
+# 终点安全区域的导演路程长度, 生还者的导演路程与地图末尾的距离小于该值时, 视为进入了终点安全区域
+finalCheckPointLength = 400.0
+
+# 生还者横向 (垂直于导演路程方向) 的活动范围
+lateralSpread = 400.0
+
+
+
+
+""" --- 模拟客户端 --- """
+
+class SimClient:
+    """
+    模拟的游戏客户端, 实现了导演系统所调用的全部 Client 函数
+    """
+    def __init__(self, clientID: int, clientType: str, absolutePosition: tuple, flowDistance: float):
+        self.clientID = clientID
+        self.clientType = clientType
+
+        self.absolutePosition = absolutePosition
+        self.flowDistance = flowDistance
+
+        self.incapacitated = False
+        self.hangingLedge = False
+        self.dead = False
+        self.away = False
+        self.inFinalCheckPoint = False
+
+        # 坦克的仇恨目标, 数据类型为 SimClient 或 None
+        self.focusedTarget = None
+
+        # --- 模拟世界内部使用的数据 --- #
+
+        # 当前的移动方向, +1 为前进, 0 为原地防守, -1 为后退
+        self.moveDirection = 1
+
+        # 倒地后被救起的游戏时间
+        self.reviveTime = 0.0
+
+
+    # --- 下面的函数对应导演系统所调用的 Client 接口 --- #
+
+    def type(self):
+        return self.clientType
+
+    def getIdentification(self):
+        return self.clientID
+
+    def getAbsolutePosition(self):
+        return self.absolutePosition
+
+    def getFlowDistance(self):
+        return self.flowDistance
+
+    def isIncapacitied(self):
+        return self.incapacitated
+
+    def isHangingLedge(self):
+        return self.hangingLedge
+
+    def isDead(self):
+        return self.dead
+
+    def isAway(self):
+        return self.away
+
+    def isInFinalCheckPoint(self):
+        return self.inFinalCheckPoint
+
+    def getFocusedTarget(self):
+        return self.focusedTarget
+
+
+
+
+""" --- 模拟世界 --- """
+
+class SimGame:
+    """
+    模拟的游戏对象, 实现了导演系统所调用的全部 Game 接口; 时间由虚拟时钟推进, 与真实时间无关
+    """
+    def __init__(self, totalFlowDistance: float = defaultTotalFlowDistance, seed: int = 0):
+        self.totalFlowDistance = totalFlowDistance
+
+        # 虚拟时钟, 只能通过 advance 函数推进
+        self.currentTime = 0.0
+
+        self.clients = []
+
+        # 模拟世界独立使用的随机数生成器, 不影响导演系统使用的 random 模块
+        self.rng = random.Random( seed )
+
+        self.nextClientID = 1
+
+
+    # --- 下面的函数对应导演系统所调用的 Game 接口 --- #
+
+    def getAllClients(self):
+        return self.clients
+
+    def Time(self):
+        return self.currentTime
+
+    def getTotalFlowDistance(self):
+        return self.totalFlowDistance
+
+
+    # --- 下面的函数用于构建和推进模拟世界 --- #
+
+    def addClient(self, clientType: str, flowDistance: float, lateral: float = 0.0):
+        """
+        在导演路程 flowDistance 处添加一个客户端, 绝对坐标的 x 轴与导演路程方向一致
+        """
+        client = SimClient( self.nextClientID, clientType, ( flowDistance, lateral, 0.0 ), flowDistance )
+        self.nextClientID += 1
+
+        self.clients.append( client )
+        return client
+
+
+    def survivors(self):
+        return [ client for client in self.clients if client.clientType == SURVIVOR ]
+
+
+    def tanks(self):
+        return [ client for client in self.clients if client.clientType == TANK ]
+
+
+    def advance(self, dt: float):
+        """
+        推进虚拟时钟 dt 秒, 并按照简单的行为模型更新所有客户端的数据
+        """
+        self.currentTime += dt
+
+        survivorClients = self.survivors()
+        aliveSurvivors = [ client for client in survivorClients if ( not client.dead ) and ( not client.away ) ]
+
+        for client in survivorClients:
+            self._stepSurvivor( client, dt )
+
+        for client in self.tanks():
+            self._stepTank( client, aliveSurvivors, dt )
+
+        return self.currentTime
+
+
+    def _stepSurvivor(self, client: SimClient, dt: float):
+        rng = self.rng
+
+        if client.dead or client.away:
+            return
+
+        # 倒地或者挂边的生还者原地等待救援
+        if client.incapacitated or client.hangingLedge:
+
+            if self.currentTime >= client.reviveTime:
+                client.incapacitated = False
+                client.hangingLedge = False
+
+            return
+
+        if rng.random() < 0.0005:       # 小概率倒地或挂边
+            if rng.random() < 0.8:
+                client.incapacitated = True
+            else:
+                client.hangingLedge = True
+
+            client.reviveTime = self.currentTime + rng.uniform( 3.0, 10.0 )
+            return
+
+        if rng.random() < 0.01:         # 偶尔改变移动方向, 前进的概率最大
+            client.moveDirection = rng.choices( ( 1, 0, -1 ), weights = ( 6, 3, 1 ) )[ 0 ]
+
+        flowDistance = client.flowDistance + client.moveDirection * survivorSpeed * dt
+        flowDistance = min( max( flowDistance, 0.0 ), self.totalFlowDistance )
+
+        lateral = client.absolutePosition[ 1 ] + rng.uniform( -1.0, 1.0 ) * survivorSpeed * dt
+        lateral = min( max( lateral, -lateralSpread ), lateralSpread )
+
+        client.flowDistance = flowDistance
+        client.absolutePosition = ( flowDistance, lateral, 0.0 )
+        client.inFinalCheckPoint = self.totalFlowDistance - flowDistance < finalCheckPointLength
+
+
+    def _stepTank(self, client: SimClient, aliveSurvivors: list, dt: float):
+        rng = self.rng
+
+        if len( aliveSurvivors ) <= 0:
+            client.focusedTarget = None
+            return
+
+        target = client.focusedTarget
+
+        if target is None or target.dead or target.away or rng.random() < 0.005:      # 丢失目标或偶尔切换目标
+            target = rng.choice( aliveSurvivors )
+            client.focusedTarget = target
+
+        # 坦克沿直线追赶仇恨目标
+        dx = target.absolutePosition[ 0 ] - client.absolutePosition[ 0 ]
+        dy = target.absolutePosition[ 1 ] - client.absolutePosition[ 1 ]
+        dist = math.hypot( dx, dy )
+        step = min( tankSpeed * dt, dist )
+
+        if dist > 0:
+            x = client.absolutePosition[ 0 ] + dx / dist * step
+            y = client.absolutePosition[ 1 ] + dy / dist * step
+
+            client.absolutePosition = ( x, y, 0.0 )
+            client.flowDistance = min( max( x, 0.0 ), self.totalFlowDistance )
+
+
+
+
+def buildWorld(survivorNum: int, tankNum: int, seed: int = 0, totalFlowDistance: float = defaultTotalFlowDistance):
+    """
+    构建一个包含 survivorNum 个生还者和 tankNum 个坦克的模拟世界
+
+    生还者被随机分布在地图前段的若干个小队中, 使分组策略能够划分出多个组别; 坦克出生在随机生还者的附近, 并以其为仇恨目标
+    """
+    game = SimGame( totalFlowDistance, seed )
+    rng = game.rng
+
+    # 随机的小队中心, 小队之间的导演路程间隔通常大于生还者传播半径
+    squadNum = max( 1, survivorNum // 3 )
+    squadCenters = [ rng.uniform( 1000.0, 0.5 * totalFlowDistance ) for _ in range( squadNum ) ]
+
+    for i in range( survivorNum ):
+        center = squadCenters[ i % squadNum ]
+        game.addClient( SURVIVOR, center + rng.uniform( -300.0, 300.0 ), rng.uniform( -lateralSpread, lateralSpread ) )
+
+    survivorClients = game.survivors()
+
+    for _ in range( tankNum ):
+        target = rng.choice( survivorClients )
+        tank = game.addClient( TANK, max( 0.0, target.flowDistance + rng.uniform( -1500.0, 1500.0 ) ), rng.uniform( -lateralSpread, lateralSpread ) )
+        tank.focusedTarget = target
+
+    return game
+
+
+
+
+def installWorld(game: SimGame):
+    """
+    将模拟世界注入导演系统, 并清空导演系统在执行周期之间传递的数据
+    """
+    director.bindHost( game, SURVIVOR, TANK )
+    director.resetDirectorState()
+
+    return game
+
+
+
+
+def runOffline(game: SimGame, tickNum: int, dt: float = director.directorExecutionFrequency):
+    """
+    在模拟世界中连续执行 tickNum 次插件的主程序, 每次执行前将虚拟时钟推进 dt 秒 (默认为 directorExecutionFrequency)
+
+    return:
+    实际执行的次数 (导演系统被关闭时会提前结束)
+    """
+    installWorld( game )
+
+    executedTickNum = 0
+
+    for _ in range( tickNum ):
+
+        game.advance( dt )
+
+        if not director.runDirectorTick():
+            break
+
+        executedTickNum += 1
+
+    return executedTickNum
+
+
+
+
+""" --- 验证 --- """
+
+def recordDecisions(survivorNum: int, tankNum: int, seed: int, tickNum: int):
+    """
+    在一个新的模拟世界中连续执行 tickNum 次插件的主程序, 记录每个执行周期的决策:
+    各个组别的 ( survivorGroupID, 逻辑, 代表压力值, 是否请求生成坦克, 上一次生成坦克的时间, 生成坦克的时间间隔, 成员的 ( survivorID, 状态, 压力值 ) ),
+    按照组别在导演路程中的先后顺序排列
+
+    两种实现的决策完全一致 (包括浮点数的每一位) 时, 两次调用的返回值相等
+    """
+    random.seed( seed )
+    world = installWorld( buildWorld( survivorNum, tankNum, seed ) )
+
+    decisions = []
+
+    for _ in range( tickNum ):
+
+        world.advance( director.directorExecutionFrequency )
+
+        if not director.runDirectorTick():
+            break
+
+        decisions.append( tuple(
+            (
+                groupClass.survivorGroupID, groupClass.survivorGroupLogic, groupClass.survivorGroupStress, groupClass.whetherRequestTank,
+                groupClass.lastSpawnTime, groupClass.spawnInterval,
+                tuple( ( surClass.survivorID, surClass.status, surClass.currSurvivorStress ) for surClass in groupClass.survivorMembers )
+            )
+            for groupClass in director.survivorGroupClassList
+        ) )
+
+    return decisions
+
+
+
+
+def countMismatches(expected: list, actual: list):
+    """
+    返回决策不一致的执行周期数量, 执行周期数量不同时多出的部分同样计为不一致
+    """
+    return sum( 1 for expectedTick, actualTick in zip( expected, actual ) if expectedTick != actualTick ) + abs( len( expected ) - len( actual ) )
+
+
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser( description = "Run the Tank Run director offline against a simulated world." )
+    parser.add_argument( "--survivors", type = int, default = 8 )
+    parser.add_argument( "--tanks", type = int, default = 4 )
+    parser.add_argument( "--ticks", type = int, default = 3000 )
+    parser.add_argument( "--seed", type = int, default = 0 )
+    parser.add_argument( "--verify", choices = ( "skip", "band", "numpy", "clock" ),
+                         help = "compare against the reference implementation: skip = group evaluation skipping on vs off, "
+                                "band = flow-band grouping sweep vs nested scan, numpy = vectorized vs scalar survivor stress engine, "
+                                "clock = one time sample per tick vs reading the game clock on every call" )
+    args = parser.parse_args()
+
+    if args.verify == "skip":
+        director.groupEvaluationSkipping = False
+        expected = recordDecisions( args.survivors, args.tanks, args.seed, args.ticks )
+
+        director.groupEvaluationSkipping = True
+        actual = recordDecisions( args.survivors, args.tanks, args.seed, args.ticks )
+
+        print( "%d ticks, %d mismatches" % ( len( expected ), countMismatches( expected, actual ) ) )
+
+    elif args.verify == "band":
+        random.seed( args.seed )
+        world = installWorld( buildWorld( args.survivors, args.tanks, args.seed ) )
+
+        tickNum = 0
+        mismatchNum = 0
+        bandTime = 0.0
+        nestedTime = 0.0
+
+        for _ in range( args.ticks ):
+            world.advance( director.directorExecutionFrequency )
+
+            if not director.runDirectorTick():
+                break
+
+            startTime = time.perf_counter()
+            groups = director.groupSurvivorsByFlowBand( director.survivorClassList )
+            bandTime += time.perf_counter() - startTime
+
+            startTime = time.perf_counter()
+            expectedGroups = director.groupSurvivorsByNestedScan( director.survivorClassList )
+            nestedTime += time.perf_counter() - startTime
+
+            if groups != expectedGroups:        # 比较各个组别的成员以及成员的先后顺序
+                mismatchNum += 1
+
+            tickNum += 1
+
+        print( "%d ticks, %d mismatches; band sweep %.1f us, nested scan %.1f us per tick" % (
+            tickNum, mismatchNum, bandTime / max( 1, tickNum ) * 1e6, nestedTime / max( 1, tickNum ) * 1e6 ) )
+
+    elif args.verify == "numpy":
+        director.setSurvivorStressEngine( "scalar" )
+        expected = recordDecisions( args.survivors, args.tanks, args.seed, args.ticks )
+
+        director.setSurvivorStressEngine( "numpy" )
+        actual = recordDecisions( args.survivors, args.tanks, args.seed, args.ticks )
+
+        director.setSurvivorStressEngine( "scalar" )
+
+        print( "%d ticks, %d mismatches" % ( len( expected ), countMismatches( expected, actual ) ) )
+
+    elif args.verify == "clock":
+        director.tickContextSampling = False
+        expected = recordDecisions( args.survivors, args.tanks, args.seed, args.ticks )
+
+        director.tickContextSampling = True
+        actual = recordDecisions( args.survivors, args.tanks, args.seed, args.ticks )
+
+        print( "%d ticks, %d mismatches" % ( len( expected ), countMismatches( expected, actual ) ) )
+
+    else:
+        random.seed( args.seed )
+        world = buildWorld( args.survivors, args.tanks, args.seed )
+
+        startTime = time.perf_counter()
+        executed = runOffline( world, args.ticks )
+        elapsed = time.perf_counter() - startTime
+
+        print( "executed %d ticks (%.1f s of game time) in %.3f s, %.0f ticks/s" % (
+            executed, world.Time(), elapsed, executed / elapsed if elapsed > 0 else float( "inf" ) ) )
+
+        for groupClass in director.last_survivorGroupClassList:
+            print( "group %s: logic=%s members=%d stress=%.1f" % (
+                groupClass.survivorGroupID, groupClass.survivorGroupLogic, groupClass.memberNum, groupClass.survivorGroupStress ) )
@@ -0,0 +1,430 @@
+"""
+这是 Left 4 Dead 2 插件企划 "下一代 Tank Run 优化方案" 对应的 demo. 本 demo 对应 tankrun_demo_director.py 主循环中的第 6 步: 坦克生成器寻找合法的坦克生成位置.
+本 demo 包含一个离线构建的坦克生成候选点表: 每张地图预先采样所有可以生成坦克的位置, 按照导演路程 升序 排序后写入定宽的列式二进制文件, 插件通过 mmap 读取.
+
+坦克生成器最大的开销在于为正在请求坦克的组别寻找合法的生成位置. 有了候选点表以后, 查询
+    "位于组别 G 前方 X 导演路程以内 (或者后方 X 导演路程以内), 且与每个生还者的 maxD 距离都不小于 Y 的候选点"
+只需要在导演路程一列上二分查找区间的起点, 再从距离组别最近的候选点开始依次检查, 而不必在每次请求时实时搜索导航网格.
+
+与生还者的 maxD 距离检查同样利用导演路程: 由于 maxD 距离不小于两者导演路程之差, 只有导演路程与候选点之差小于 Y 的生还者才需要计算欧式距离,
+这些生还者同样通过在 (已排序的) 生还者导演路程上二分查找得到
+
+文件格式 (本机字节序, 文件头中记录了字节序, 读取时必须与本机一致):
+    文件头: magic, 版本号, 字节序, 候选点数量
+    positionX, positionY, positionZ, flowDistance, navAreaID 五列, 每个候选点一行, 按照 flowDistance 升序排列; 每一列的起始位置按 8 字节对齐
+
+用法示例:
+    python tankrun_demo_spawn_table.py --build map.spawn --spacing 50
+    python tankrun_demo_spawn_table.py --query map.spawn --survivors 8 --ticks 600
+"""
+
+# --------------------------------------------------------------------------------------------------------------------------------------------------- #
+
+import argparse
+import array
+import bisect
+import mmap
+import random
+import struct
+import sys
+import time
+
+import tankrun_demo_director as director
+
+
+""" --- 候选点表所需全局变量 --- """
+
+spawnTableMagic = b"TRSPAWN\0"
+spawnTableVersion = 1
+
+# 文件头: magic, 版本号, 字节序 ( 1 为小端, 2 为大端 ), 候选点数量
+spawnTableHeaderFormat = "<8sIIq"
+spawnTableHeaderSize = struct.calcsize( spawnTableHeaderFormat )
+
+byteOrderCodes = { "little": 1, "big": 2 }
+
+# 各列 ( 列名, array 类型码 )
+spawnTableColumns = (
+    ( "positionX", "d" ),
+    ( "positionY", "d" ),
+    ( "positionZ", "d" ),
+    ( "flowDistance", "d" ),
+    ( "navAreaID", "i" ),
+)
+
+# 默认的查询范围: 组别前方 / 后方的导演路程, 以及与每个生还者的最小 maxD 距离
+defaultAheadDistance = 2000.0
+defaultBehindDistance = 1500.0
+defaultMinSurvivorDistance = 800.0
+
+
+
+
+def spawnTableLayout(candidateNum: int):
+    """
+    返回各列在文件中的位置: 列名 -> ( 起始字节, array 类型码, 元素数量 ), 以及文件的总字节数
+    """
+    layout = {}
+    offset = spawnTableHeaderSize
+
+    for name, typecode in spawnTableColumns:
+        offset = ( offset + 7 ) // 8 * 8
+        layout[ name ] = ( offset, typecode, candidateNum )
+        offset += array.array( typecode ).itemsize * candidateNum
+
+    return layout, offset
+
+
+
+
+""" --- 离线构建 --- """
+
+def buildSpawnTable(path: str, candidates):
+    """
+    将候选点按照导演路程升序排序后写入文件
+
+    parameters:
+    @candidates: ( 绝对坐标, 导演路程, 导航区域 ID ) 三元组的可迭代对象, 绝对坐标为 (x, y, z) 三元组
+
+    return:
+    候选点的数量
+    """
+    sortedCandidates = sorted( candidates, key = lambda candidate: candidate[ 1 ] )
+
+    columns = { name: array.array( typecode ) for name, typecode in spawnTableColumns }
+
+    for position, flowDistance, navAreaID in sortedCandidates:
+        columns[ "positionX" ].append( position[0] )
+        columns[ "positionY" ].append( position[1] )
+        columns[ "positionZ" ].append( position[2] )
+        columns[ "flowDistance" ].append( flowDistance )
+        columns[ "navAreaID" ].append( navAreaID )
+
+    candidateNum = len( sortedCandidates )
+    layout, fileSize = spawnTableLayout( candidateNum )
+
+    with open( path, "wb" ) as tableFile:
+        tableFile.write( struct.pack( spawnTableHeaderFormat, spawnTableMagic, spawnTableVersion, byteOrderCodes[ sys.byteorder ], candidateNum ) )
+
+        for name, _ in spawnTableColumns:
+            tableFile.write( b"\0" * ( layout[ name ][0] - tableFile.tell() ) )
+            columns[ name ].tofile( tableFile )
+
+        tableFile.write( b"\0" * ( fileSize - tableFile.tell() ) )
+
+    return candidateNum
+
+
+
+
+def sampleSimulatedCandidates(totalFlowDistance: float, spacing: float = 50.0, seed: int = 0):
+    """
+    为 tankrun_demo_simulator.py 的模拟世界采样候选点: 沿导演路程每隔 spacing 取一排点, 横向位置随机, 模拟地图中不规则分布的导航区域
+    """
+    import tankrun_demo_simulator as simulator
+
+    rng = random.Random( seed )
+    candidates = []
+
+    navAreaID = 0
+    flowDistance = 0.0
+
+    while flowDistance <= totalFlowDistance:
+
+        for _ in range( 3 ):
+            lateral = rng.uniform( -simulator.lateralSpread - 400.0, simulator.lateralSpread + 400.0 )
+            candidates.append( ( ( flowDistance, lateral, 0.0 ), flowDistance, navAreaID ) )
+            navAreaID += 1
+
+        flowDistance += spacing
+
+    return candidates
+
+
+
+
+""" --- 查询 --- """
+
+class SpawnPointTable:
+    """
+    通过 mmap 打开候选点表, columns 中的每一列均为直接指向文件内容的 memoryview, 不复制数据
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open( path, "rb" )
+        self.mmap = mmap.mmap( self.file.fileno(), 0, access = mmap.ACCESS_READ )
+        self.buffer = memoryview( self.mmap )
+        self.columns = {}
+
+        magic, version, byteOrderCode, self.candidateNum = struct.unpack_from( spawnTableHeaderFormat, self.buffer, 0 )
+
+        if magic != spawnTableMagic:
+            self.close()
+            raise ValueError("%s is not a spawn table !" % path)
+
+        if version != spawnTableVersion:
+            self.close()
+            raise ValueError("unsupported spawn table version: %d !" % version)
+
+        if byteOrderCode != byteOrderCodes[ sys.byteorder ]:
+            self.close()
+            raise ValueError("spawn table byte order does not match this machine !")
+
+        layout, fileSize = spawnTableLayout( self.candidateNum )
+
+        if len( self.buffer ) < fileSize:
+            self.close()
+            raise ValueError("spawn table is truncated !")
+
+        for name, ( offset, typecode, count ) in layout.items():
+            itemSize = array.array( typecode ).itemsize
+            self.columns[ name ] = self.buffer[ offset : offset + itemSize * count ].cast( typecode )
+
+        self.flowDistances = self.columns[ "flowDistance" ]
+
+        # 累计检查的候选点数量, 以及计算欧式距离的次数
+        self.checkedCandidateNum = 0
+        self.distanceEvaluations = 0
+
+
+    def position(self, index: int):
+        columns = self.columns
+        return ( columns[ "positionX" ][ index ], columns[ "positionY" ][ index ], columns[ "positionZ" ][ index ] )
+
+
+    def flowDistance(self, index: int):
+        return self.flowDistances[ index ]
+
+
+    def navAreaID(self, index: int):
+        return self.columns[ "navAreaID" ][ index ]
+
+
+    def flowRange(self, minFlowDistance: float, maxFlowDistance: float):
+        """
+        返回导演路程位于 [ minFlowDistance, maxFlowDistance ] 的候选点的下标范围, 耗时为 O(log n)
+        """
+        lo = bisect.bisect_left( self.flowDistances, minFlowDistance )
+        hi = bisect.bisect_right( self.flowDistances, maxFlowDistance )
+
+        return range( lo, hi )
+
+
+    def isFarFromSurvivors(self, index: int, survivorFlowDistances: list, survivorPositions: list, minSurvivorDistance: float):
+        """
+        候选点与每个生还者的 maxD 距离是否都不小于 minSurvivorDistance
+
+        parameters:
+        @survivorFlowDistances: 升序 排列的生还者导演路程
+        @survivorPositions: 与 survivorFlowDistances 顺序相同的生还者绝对坐标
+        """
+        flowDistance = self.flowDistances[ index ]
+
+        # 导演路程之差不小于 minSurvivorDistance 的生还者, maxD 距离必定不小于 minSurvivorDistance
+        lo = bisect.bisect_right( survivorFlowDistances, flowDistance - minSurvivorDistance )
+        hi = bisect.bisect_left( survivorFlowDistances, flowDistance + minSurvivorDistance )
+
+        if lo >= hi:
+            return True
+
+        position = self.position( index )
+        minSquaredDistance = minSurvivorDistance * minSurvivorDistance
+
+        for surIndex in range( lo, hi ):
+            self.distanceEvaluations += 1
+
+            if director.squaredEuclideanDistance( position, survivorPositions[ surIndex ] ) < minSquaredDistance:
+                return False
+
+        return True
+
+
+    @staticmethod
+    def buildSurvivorIndex(survivorClassList: list):
+        """
+        返回 ( 升序 排列的生还者导演路程, 相同顺序的生还者绝对坐标 ); 同一个执行周期中为多个组别查询时, 只需建立一次
+        """
+        survivorData = sorted( ( ( surClass.flowDistance, surClass.absolutePosition ) for surClass in survivorClassList ), key = lambda data: data[0] )
+
+        return [ data[0] for data in survivorData ], [ data[1] for data in survivorData ]
+
+
+    def queryNearGroup(self, groupClass, survivorClassList: list, aheadDistance: float = defaultAheadDistance,
+                       behindDistance: float = defaultBehindDistance, minSurvivorDistance: float = defaultMinSurvivorDistance, limit: int = None,
+                       survivorIndex: tuple = None):
+        """
+        查询组别前方和后方的合法候选点, 两者都按照与组别的导演路程之差从近到远排列
+
+        前方: 导演路程位于 ( 组别首位成员, 组别首位成员 + aheadDistance ]
+        后方: 导演路程位于 [ 组别末位成员 - behindDistance, 组别末位成员 )
+        合法: 与 survivorClassList 中每个生还者的 maxD 距离都不小于 minSurvivorDistance
+
+        parameters:
+        @groupClass: 组别实例化类, 其成员已经按照导演路程 降序 排列
+        @survivorClassList: 当前的所有生还者类
+        @limit: 前方和后方各自最多返回的候选点数量, 为 None 时不限制; 坦克生成器通常只需要最近的几个
+        @survivorIndex: buildSurvivorIndex 的返回值, 为 None 时在函数内部建立
+
+        return:
+        ( 前方候选点的下标列表, 后方候选点的下标列表 )
+        """
+        frontFlowDistance = groupClass.survivorMembers[ 0 ].flowDistance
+        backFlowDistance = groupClass.survivorMembers[ -1 ].flowDistance
+
+        if survivorIndex is None:
+            survivorIndex = self.buildSurvivorIndex( survivorClassList )
+
+        survivorFlowDistances, survivorPositions = survivorIndex
+
+        flowDistances = self.flowDistances
+
+        aheadIndices = []
+
+        index = bisect.bisect_right( flowDistances, frontFlowDistance )
+        end = bisect.bisect_right( flowDistances, frontFlowDistance + aheadDistance )
+
+        while index < end and ( limit is None or len( aheadIndices ) < limit ):
+            self.checkedCandidateNum += 1
+
+            if self.isFarFromSurvivors( index, survivorFlowDistances, survivorPositions, minSurvivorDistance ):
+                aheadIndices.append( index )
+
+            index += 1
+
+        behindIndices = []
+
+        index = bisect.bisect_left( flowDistances, backFlowDistance ) - 1
+        start = bisect.bisect_left( flowDistances, backFlowDistance - behindDistance )
+
+        while index >= start and ( limit is None or len( behindIndices ) < limit ):
+            self.checkedCandidateNum += 1
+
+            if self.isFarFromSurvivors( index, survivorFlowDistances, survivorPositions, minSurvivorDistance ):
+                behindIndices.append( index )
+
+            index -= 1
+
+        return aheadIndices, behindIndices
+
+
+    def close(self):
+        """
+        释放所有 memoryview 之后关闭 mmap 和文件
+        """
+        for column in self.columns.values():
+            column.release()
+
+        self.columns = {}
+        self.flowDistances = None
+
+        self.buffer.release()
+        self.mmap.close()
+        self.file.close()
+
+        return True
+
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excInfo):
+        self.close()
+        return False
+
+
+
+
+def bruteForceQuery(table: SpawnPointTable, groupClass, survivorClassList: list, aheadDistance: float = defaultAheadDistance,
+                    behindDistance: float = defaultBehindDistance, minSurvivorDistance: float = defaultMinSurvivorDistance):
+    """
+    遍历所有候选点和所有生还者的查询, 结果与 queryNearGroup ( limit = None ) 相同, 仅用于验证和对比耗时
+    """
+    frontFlowDistance = groupClass.survivorMembers[ 0 ].flowDistance
+    backFlowDistance = groupClass.survivorMembers[ -1 ].flowDistance
+
+    survivorDataList = [ ( surClass.absolutePosition, surClass.flowDistance ) for surClass in survivorClassList ]
+
+    aheadIndices = []
+    behindIndices = []
+
+    for index in range( table.candidateNum ):
+        flowDistance = table.flowDistance( index )
+
+        if frontFlowDistance < flowDistance <= frontFlowDistance + aheadDistance:
+            indices = aheadIndices
+        elif backFlowDistance - behindDistance <= flowDistance < backFlowDistance:
+            indices = behindIndices
+        else:
+            continue
+
+        candidateData = ( table.position( index ), flowDistance )
+
+        if all( director.maxDistance( candidateData, survivorData ) >= minSurvivorDistance for survivorData in survivorDataList ):
+            indices.append( index )
+
+    behindIndices.reverse()
+
+    return aheadIndices, behindIndices
+
+
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser( description = "Build and query a flow-distance indexed tank spawn candidate table." )
+    parser.add_argument( "--build", metavar = "PATH", help = "build a table for the simulated map at PATH" )
+    parser.add_argument( "--query", metavar = "PATH", help = "query PATH for every group of a simulated match" )
+    parser.add_argument( "--spacing", type = float, default = 50.0 )
+    parser.add_argument( "--survivors", type = int, default = 8 )
+    parser.add_argument( "--tanks", type = int, default = 4 )
+    parser.add_argument( "--ticks", type = int, default = 600 )
+    parser.add_argument( "--limit", type = int, default = 4 )
+    parser.add_argument( "--seed", type = int, default = 0 )
+    args = parser.parse_args()
+
+    if args.build is None and args.query is None:
+        parser.error( "one of --build or --query is required" )
+
+    import tankrun_demo_simulator as simulator
+
+    if args.build is not None:
+        candidateNum = buildSpawnTable( args.build, sampleSimulatedCandidates( simulator.defaultTotalFlowDistance, args.spacing, args.seed ) )
+        print( "built %d spawn candidates" % candidateNum )
+
+    if args.query is not None:
+        random.seed( args.seed )
+        world = simulator.installWorld( simulator.buildWorld( args.survivors, args.tanks, args.seed ) )
+
+        with SpawnPointTable( args.query ) as table:
+
+            queryNum = 0
+            mismatchNum = 0
+            tableTime = 0.0
+            bruteForceTime = 0.0
+
+            for _ in range( args.ticks ):
+                world.advance( director.directorExecutionFrequency )
+
+                if not director.runDirectorTick():
+                    break
+
+                survivorIndex = SpawnPointTable.buildSurvivorIndex( director.survivorClassList )
+
+                for groupClass in director.survivorGroupClassList:
+                    startTime = time.perf_counter()
+                    result = table.queryNearGroup( groupClass, director.survivorClassList, limit = args.limit, survivorIndex = survivorIndex )
+                    tableTime += time.perf_counter() - startTime
+
+                    startTime = time.perf_counter()
+                    expected = bruteForceQuery( table, groupClass, director.survivorClassList )
+                    bruteForceTime += time.perf_counter() - startTime
+
+                    if result != ( expected[0][ : args.limit ], expected[1][ : args.limit ] ):
+                        mismatchNum += 1
+
+                    queryNum += 1
+
+            print( "%d candidates, %d queries, %d mismatches" % ( table.candidateNum, queryNum, mismatchNum ) )
+            print( "table query %.1f us, brute force %.1f us per query; %.1f candidates checked and %.1f distances evaluated per query" % (
+                tableTime / max( 1, queryNum ) * 1e6, bruteForceTime / max( 1, queryNum ) * 1e6,
+                table.checkedCandidateNum / max( 1, queryNum ), table.distanceEvaluations / max( 1, queryNum ) ) )
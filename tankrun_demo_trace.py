@@ -0,0 +1,492 @@
+"""
+这是 Left 4 Dead 2 插件企划 "下一代 Tank Run 优化方案" 对应的 demo. 本 demo 用于录制对局中每个执行周期的客户端快照, 并在游戏以外的环境中重放.
+录制文件为定宽的列式二进制文件, 重放时通过 mmap 和 memoryview 直接读取各列, 而不将文件解析为每个执行周期的 Python 对象;
+因此一局 40 分钟的对局 (约 24000 个执行周期) 可以在数秒内重放完毕, 使性能优化可以在真实的对局数据上验证.
+
+录制的内容:
+    每个执行周期中 takeClientSnapshot 读取到的所有生还者和坦克客户端 (包括死亡和旁观的生还者), 按照 getAllClients 的顺序排列:
+    唯一标识, 客户端类型, 绝对坐标, 导演路程, 倒地 / 挂边 / 死亡 / 旁观 / 进入终点安全屋, 坦克的仇恨目标的唯一标识
+    以及每个执行周期的游戏时间和地图完整导演路程
+
+文件格式 (本机字节序, 文件头中记录了字节序, 重放时必须与本机一致):
+    文件头:    magic, 版本号, 字节序, 执行周期数量, 客户端行数
+    执行周期索引: time, totalFlowDistance, rowStart, rowCount 四列, 每个执行周期一行
+    客户端数据:  clientID, clientType, positionX, positionY, positionZ, flowDistance, flags, focusedTargetID 八列, 每个客户端每个执行周期一行
+    每一列连续存储, 起始位置按 8 字节对齐, 各列的位置只由执行周期数量和客户端行数决定, 详见 traceLayout
+
+用法示例:
+    python tankrun_demo_trace.py --record match.trace --survivors 8 --tanks 6 --ticks 24000
+    python tankrun_demo_trace.py --replay match.trace
+"""
+
+# --------------------------------------------------------------------------------------------------------------------------------------------------- #
+
+import argparse
+import array
+import mmap
+import random
+import struct
+import sys
+import time
+
+import tankrun_demo_director as director
+
+
+""" --- 录制文件所需全局变量 --- """
+
+traceMagic = b"TRTRACE\0"
+traceVersion = 1
+
+# 文件头: magic, 版本号, 字节序 ( 1 为小端, 2 为大端 ), 执行周期数量, 客户端行数
+traceHeaderFormat = "<8sIIqq"
+traceHeaderSize = struct.calcsize( traceHeaderFormat )
+
+byteOrderCodes = { "little": 1, "big": 2 }
+
+# 执行周期索引的各列 ( 列名, array 类型码 )
+tickColumns = (
+    ( "time", "d" ),
+    ( "totalFlowDistance", "d" ),
+    ( "rowStart", "q" ),
+    ( "rowCount", "i" ),
+)
+
+# 客户端数据的各列 ( 列名, array 类型码 )
+rowColumns = (
+    ( "clientID", "i" ),
+    ( "clientType", "B" ),
+    ( "positionX", "d" ),
+    ( "positionY", "d" ),
+    ( "positionZ", "d" ),
+    ( "flowDistance", "d" ),
+    ( "flags", "B" ),
+    ( "focusedTargetID", "i" ),
+)
+
+# clientType 列的取值
+survivorTypeCode = 0
+tankTypeCode = 1
+
+# flags 列的各个标志位
+flagIncapacitated = 1
+flagHangingLedge = 2
+flagDead = 4
+flagAway = 8
+flagInFinalCheckPoint = 16
+
+# focusedTargetID 列中表示没有仇恨目标 (或者仇恨目标没有被录制) 的取值
+noFocusedTarget = -1
+
+
+
+
+def traceLayout(tickNum: int, rowNum: int):
+    """
+    返回各列在文件中的位置: 列名 -> ( 起始字节, array 类型码, 元素数量 ), 以及文件的总字节数
+    """
+    layout = {}
+    offset = traceHeaderSize
+
+    for columns, count in ( ( tickColumns, tickNum ), ( rowColumns, rowNum ) ):
+        for name, typecode in columns:
+            offset = ( offset + 7 ) // 8 * 8
+            layout[ name ] = ( offset, typecode, count )
+            offset += array.array( typecode ).itemsize * count
+
+    return layout, offset
+
+
+
+
+""" --- 录制 --- """
+
+class TraceWriter:
+    """
+    录制客户端快照; 录制期间各列保存在内存中紧凑的 array 中 (与文件大小相同), close 时一次写入文件
+
+    可以直接作为导演系统的快照录制器 ( director.setTraceRecorder ), 也可以通过 recordTick 录制任意实现了 Client 函数的客户端
+    客户端的唯一标识必须为整数
+    """
+    def __init__(self, path: str, survivorType = None, tankType = None):
+        """
+        parameters:
+        @path: 录制文件的路径
+        @survivorType, @tankType: 生还者和坦克客户端的 client.type() 返回值, 为 None 时使用导演系统当前的 Survivor, Tank
+        """
+        self.path = path
+        self.survivorType = director.Survivor if survivorType is None else survivorType
+        self.tankType = director.Tank if tankType is None else tankType
+
+        self.columns = { name: array.array( typecode ) for name, typecode in tickColumns + rowColumns }
+
+        self.tickNum = 0
+        self.rowNum = 0
+        self.closed = False
+
+
+    def recordBatch(self, time: float, totalFlowDistance: float, snapshotBatch):
+        """
+        录制一个执行周期的 ClientSnapshotBatch, 由插件主程序的第 1 步调用
+        """
+        self.recordTick( time, totalFlowDistance, snapshotBatch.clients )
+
+
+    def recordTick(self, time: float, totalFlowDistance: float, clients):
+        """
+        录制一个执行周期, clients 中不是生还者或坦克的客户端被忽略
+        """
+        columns = self.columns
+
+        survivorType = self.survivorType
+        tankType = self.tankType
+
+        recordedClients = []
+
+        for client in clients:
+            clientType = client.type()
+
+            if clientType == survivorType:
+                recordedClients.append( ( client, survivorTypeCode ) )
+
+            elif clientType == tankType:
+                recordedClients.append( ( client, tankTypeCode ) )
+
+        recordedIDs = { client.getIdentification() for client, _ in recordedClients }
+
+        for client, typeCode in recordedClients:
+            position = client.getAbsolutePosition()
+
+            flags = 0
+            if client.isIncapacitied():
+                flags |= flagIncapacitated
+            if client.isHangingLedge():
+                flags |= flagHangingLedge
+            if client.isDead():
+                flags |= flagDead
+            if client.isAway():
+                flags |= flagAway
+            if client.isInFinalCheckPoint():
+                flags |= flagInFinalCheckPoint
+
+            focusedTargetID = noFocusedTarget
+
+            if typeCode == tankTypeCode:
+                focusedTarget = client.getFocusedTarget()
+
+                if ( focusedTarget is not None ) and ( focusedTarget != -1 ):
+                    targetID = focusedTarget.getIdentification()
+
+                    if targetID in recordedIDs:     # 仇恨目标不是生还者或坦克时, 重放时视为没有仇恨目标
+                        focusedTargetID = targetID
+
+            columns[ "clientID" ].append( client.getIdentification() )
+            columns[ "clientType" ].append( typeCode )
+            columns[ "positionX" ].append( position[0] )
+            columns[ "positionY" ].append( position[1] )
+            columns[ "positionZ" ].append( position[2] )
+            columns[ "flowDistance" ].append( client.getFlowDistance() )
+            columns[ "flags" ].append( flags )
+            columns[ "focusedTargetID" ].append( focusedTargetID )
+
+        columns[ "time" ].append( time )
+        columns[ "totalFlowDistance" ].append( totalFlowDistance )
+        columns[ "rowStart" ].append( self.rowNum )
+        columns[ "rowCount" ].append( len( recordedClients ) )
+
+        self.tickNum += 1
+        self.rowNum += len( recordedClients )
+
+
+    def close(self):
+        """
+        将所有列写入录制文件
+        """
+        if self.closed:
+            return False
+
+        layout, fileSize = traceLayout( self.tickNum, self.rowNum )
+
+        with open( self.path, "wb" ) as traceFile:
+            traceFile.write( struct.pack( traceHeaderFormat, traceMagic, traceVersion, byteOrderCodes[ sys.byteorder ], self.tickNum, self.rowNum ) )
+
+            for name, _ in tickColumns + rowColumns:
+                offset = layout[ name ][0]
+
+                traceFile.write( b"\0" * ( offset - traceFile.tell() ) )
+                self.columns[ name ].tofile( traceFile )
+
+            traceFile.write( b"\0" * ( fileSize - traceFile.tell() ) )
+
+        self.closed = True
+
+        return True
+
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excInfo):
+        self.close()
+        return False
+
+
+
+
+""" --- 重放 --- """
+
+class TraceReader:
+    """
+    通过 mmap 打开录制文件, columns 中的每一列均为直接指向文件内容的 memoryview, 不复制数据
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open( path, "rb" )
+        self.mmap = mmap.mmap( self.file.fileno(), 0, access = mmap.ACCESS_READ )
+        self.buffer = memoryview( self.mmap )
+
+        magic, version, byteOrderCode, self.tickNum, self.rowNum = struct.unpack_from( traceHeaderFormat, self.buffer, 0 )
+
+        if magic != traceMagic:
+            self.close()
+            raise ValueError("%s is not a trace file !" % path)
+
+        if version != traceVersion:
+            self.close()
+            raise ValueError("unsupported trace version: %d !" % version)
+
+        if byteOrderCode != byteOrderCodes[ sys.byteorder ]:
+            self.close()
+            raise ValueError("trace byte order does not match this machine !")
+
+        layout, fileSize = traceLayout( self.tickNum, self.rowNum )
+
+        if len( self.buffer ) < fileSize:
+            self.close()
+            raise ValueError("trace file is truncated !")
+
+        self.columns = {}
+
+        for name, ( offset, typecode, count ) in layout.items():
+            itemSize = array.array( typecode ).itemsize
+            self.columns[ name ] = self.buffer[ offset : offset + itemSize * count ].cast( typecode )
+
+
+    def tickRows(self, tick: int):
+        """
+        返回第 tick 个执行周期的客户端行号范围
+        """
+        rowStart = self.columns[ "rowStart" ][ tick ]
+        return range( rowStart, rowStart + self.columns[ "rowCount" ][ tick ] )
+
+
+    def close(self):
+        """
+        释放所有 memoryview 之后关闭 mmap 和文件
+        """
+        for column in getattr( self, "columns", {} ).values():
+            column.release()
+
+        self.columns = {}
+
+        self.buffer.release()
+        self.mmap.close()
+        self.file.close()
+
+        return True
+
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excInfo):
+        self.close()
+        return False
+
+
+
+
+class TraceClient:
+    """
+    录制文件中某一行客户端数据的视图, 实现了 Client 的函数; 每个函数直接读取 TraceReader 中对应的列
+    """
+    __slots__ = ( "replay", "row" )
+
+    def __init__(self, replay, row: int):
+        self.replay = replay
+        self.row = row
+
+    def type(self):
+        return self.replay.typeValues[ self.replay.columns[ "clientType" ][ self.row ] ]
+
+    def getIdentification(self):
+        return self.replay.columns[ "clientID" ][ self.row ]
+
+    def getAbsolutePosition(self):
+        columns = self.replay.columns
+        return ( columns[ "positionX" ][ self.row ], columns[ "positionY" ][ self.row ], columns[ "positionZ" ][ self.row ] )
+
+    def getFlowDistance(self):
+        return self.replay.columns[ "flowDistance" ][ self.row ]
+
+    def isIncapacitied(self):
+        return ( self.replay.columns[ "flags" ][ self.row ] & flagIncapacitated ) != 0
+
+    def isHangingLedge(self):
+        return ( self.replay.columns[ "flags" ][ self.row ] & flagHangingLedge ) != 0
+
+    def isDead(self):
+        return ( self.replay.columns[ "flags" ][ self.row ] & flagDead ) != 0
+
+    def isAway(self):
+        return ( self.replay.columns[ "flags" ][ self.row ] & flagAway ) != 0
+
+    def isInFinalCheckPoint(self):
+        return ( self.replay.columns[ "flags" ][ self.row ] & flagInFinalCheckPoint ) != 0
+
+    def getFocusedTarget(self):
+        targetID = self.replay.columns[ "focusedTargetID" ][ self.row ]
+
+        if targetID == noFocusedTarget:
+            return None
+
+        return self.replay.clientByID( targetID )
+
+
+
+
+class TraceReplayGame:
+    """
+    重放录制文件的游戏对象, 实现了 getAllClients, Time, getTotalFlowDistance 函数; 通过 advance 逐个执行周期推进
+    """
+    def __init__(self, reader: TraceReader, survivorType: str = "Survivor", tankType: str = "Tank"):
+        self.reader = reader
+        self.columns = reader.columns
+
+        # clientType 列的取值 -> client.type() 的返回值
+        self.typeValues = { survivorTypeCode: survivorType, tankTypeCode: tankType }
+
+        # 当前的执行周期, 调用 advance 之前为 -1
+        self.tick = -1
+
+        self.currentClients = []
+        self.currentClientsByID = None
+
+
+    def advance(self):
+        """
+        推进到下一个执行周期
+
+        return:
+        是否还有可以重放的执行周期
+        """
+        if self.tick + 1 >= self.reader.tickNum:
+            return False
+
+        self.seek( self.tick + 1 )
+        return True
+
+
+    def seek(self, tick: int):
+        self.tick = tick
+        self.currentClients = [ TraceClient( self, row ) for row in self.reader.tickRows( tick ) ]
+        self.currentClientsByID = None
+
+
+    def clientByID(self, clientID: int):
+        if self.currentClientsByID is None:
+            self.currentClientsByID = { client.getIdentification(): client for client in self.currentClients }
+
+        return self.currentClientsByID.get( clientID )
+
+
+    def getAllClients(self):
+        return self.currentClients
+
+    def Time(self):
+        return self.columns[ "time" ][ self.tick ]
+
+    def getTotalFlowDistance(self):
+        return self.columns[ "totalFlowDistance" ][ self.tick ]
+
+
+
+
+def replayTrace(path: str, survivorType: str = "Survivor", tankType: str = "Tank", onTick = None):
+    """
+    将录制文件中的每个执行周期依次交给导演系统执行; 导演系统在执行前被清空, 结束后 Game 被恢复
+
+    parameters:
+    @onTick: 可选的回调函数, 每个执行周期结束后以 ( 执行周期, runDirectorTick 的返回值 ) 为参数调用
+
+    return:
+    重放的执行周期数量
+    """
+    previousGame = director.Game
+
+    with TraceReader( path ) as reader:
+        game = TraceReplayGame( reader, survivorType, tankType )
+
+        director.bindHost( game, survivorType, tankType )
+        director.resetDirectorState()
+
+        try:
+            while game.advance():
+                running = director.runDirectorTick()
+
+                if onTick is not None:
+                    onTick( game.tick, running )
+
+        finally:
+            # 释放 memoryview 之前, 清空导演系统中引用了 TraceClient 的数据
+            director.resetDirectorState()
+            director.bindHost( previousGame, survivorType, tankType )
+
+        return game.tick + 1
+
+
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser( description = "Record and replay Tank Run client snapshot traces." )
+    parser.add_argument( "--record", metavar = "PATH", help = "record a simulated match to PATH" )
+    parser.add_argument( "--replay", metavar = "PATH", help = "replay PATH through the director" )
+    parser.add_argument( "--survivors", type = int, default = 8 )
+    parser.add_argument( "--tanks", type = int, default = 6 )
+    parser.add_argument( "--ticks", type = int, default = 24000 )
+    parser.add_argument( "--seed", type = int, default = 0 )
+    args = parser.parse_args()
+
+    if args.record is None and args.replay is None:
+        parser.error( "one of --record or --replay is required" )
+
+    if args.record is not None:
+        import tankrun_demo_simulator as simulator
+
+        random.seed( args.seed )
+        world = simulator.installWorld( simulator.buildWorld( args.survivors, args.tanks, args.seed ) )
+
+        writer = TraceWriter( args.record, simulator.SURVIVOR, simulator.TANK )
+        director.setTraceRecorder( writer )
+
+        startTime = time.perf_counter()
+
+        try:
+            for _ in range( args.ticks ):
+                world.advance( director.directorExecutionFrequency )
+                director.runDirectorTick()
+        finally:
+            director.setTraceRecorder( None )
+            writer.close()
+
+        print( "recorded %d ticks, %d client rows (%.1f s of game time) in %.3f s" % (
+            writer.tickNum, writer.rowNum, world.Time(), time.perf_counter() - startTime ) )
+
+    if args.replay is not None:
+        random.seed( args.seed )
+
+        startTime = time.perf_counter()
+        replayedNum = replayTrace( args.replay )
+        elapsed = time.perf_counter() - startTime
+
+        print( "replayed %d ticks in %.3f s, %.0f ticks/s" % ( replayedNum, elapsed, replayedNum / elapsed if elapsed > 0 else float( "inf" ) ) )
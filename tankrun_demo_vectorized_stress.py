@@ -0,0 +1,274 @@
+"""
+这是 Left 4 Dead 2 插件企划 "下一代 Tank Run 优化方案" 对应的 demo. 本 demo 是 tankrun_demo_director.py 中 computeCurrSurvivorStress 函数的 NumPy 向量化版本.
+本 demo 将所有生还者和坦克的绝对坐标与导演路程打包为数组, 一次性计算 生还者 × 坦克 的 maxD 矩阵, gamma 矩阵, 以及 R / D / B 三种压力计算模型, 最后写回各个生还者类的 currSurvivorStress.
+
+计算结果与逐个计算的版本在数值上完全一致 (相同的运算顺序, 各个坦克带来的压力值按照 tankClassList 的顺序依次累加), 因此可以按照服务器的环境自由切换;
+切换方法详见 tankrun_demo_director.py 中的 setSurvivorStressEngine 函数. 本 demo 依赖 NumPy, 未安装 NumPy 的服务器请继续使用逐个计算的版本
+"""
+
+# --------------------------------------------------------------------------------------------------------------------------------------------------- #
+
+import numpy as np
+
+import tankrun_demo_director as director
+
+
+""" --- 向量化计算所需全局变量 --- """
+
+# 生还者组别逻辑的编码, 其他逻辑 (S, I 或异常值) 的压力值为 0
+logicCodes = { "R": 1, "D": 2, "B": 3 }
+
+
+
+
+""" --- 向量化的压力计算模型, 与 stressComputeModel_RG / DG / BG 的运算顺序一致 --- """
+
+def stressComputeModelArray( D: np.ndarray, logic: np.ndarray ):
+    """
+    根据 logic (logicCodes 的编码) 为 D 矩阵中的每一个元素选择对应的压力计算模型, 返回尚未乘以 gamma 的压力值矩阵
+    """
+    stress = np.zeros( D.shape )
+
+    negative = D < 0
+
+    # 冲刺型生还者组别逻辑
+    RG = np.where( negative, 100.0, np.where( D <= 2100, 100.0 * ( 2100.0 - D ) / 2100.0, 0.0 ) )
+
+    # 防守型生还者组别逻辑
+    DG = np.where( negative | ( D <= 1050 ), 100.0, np.where( D <= 3150, 100.0 * ( 3150.0 - D ) / 2100.0, 0.0 ) )
+
+    # 后退型生还者组别逻辑
+    BG = np.where( negative, 100.0, np.where( D <= 3150, 100.0 * ( 3150.0 - D ) / 3150.0, 0.0 ) )
+
+    stress = np.where( logic == logicCodes[ "R" ], RG, stress )
+    stress = np.where( logic == logicCodes[ "D" ], DG, stress )
+    stress = np.where( logic == logicCodes[ "B" ], BG, stress )
+
+    return stress
+
+
+
+
+def maxDistanceArray( positionsA: np.ndarray, flowsA: np.ndarray, positionsB: np.ndarray, flowsB: np.ndarray ):
+    """
+    计算两组目标之间的 maxD 距离, 输入的数组可以按照 NumPy 的广播规则组合 (例如 (n, 1, 3) 与 (1, m, 3) 得到 (n, m) 矩阵)
+    """
+    difference = positionsA - positionsB
+
+    dx = difference[ ..., 0 ]
+    dy = difference[ ..., 1 ]
+    dz = difference[ ..., 2 ]
+
+    # 与 squaredEuclideanDistance 一致, 使用乘法计算平方
+    eD = np.sqrt( dx * dx + dy * dy + dz * dz )
+
+    return np.maximum( eD, np.abs( flowsA - flowsB ) )
+
+
+
+
+""" --- 从状态存储中读取数据 --- """
+
+def gatherStateArrays( entityClassList: list ):
+    """
+    根据实例化类的槽位, 从状态存储 (EntityStateStore) 的连续数组中一次性取出所有实例化类的绝对坐标 (n, 3) 和导演路程 (n,),
+    而不必逐个读取每个实例化类的属性; 实例化类不属于同一个状态存储时 (例如在执行周期之间调用了 resetDirectorState), 逐个读取属性
+    """
+    store = entityClassList[ 0 ].stateStore
+
+    for entityClass in entityClassList:
+        if entityClass.stateStore is not store:
+            return ( np.asarray( [ entityClass.absolutePosition for entityClass in entityClassList ], dtype = np.float64 ),
+                     np.asarray( [ entityClass.flowDistance for entityClass in entityClassList ], dtype = np.float64 ) )
+
+    slots = np.asarray( [ entityClass.slot for entityClass in entityClassList ], dtype = np.intp )
+
+    # 按照槽位取出的结果是新的数组, 不会继续引用状态存储的内存, 因此状态存储之后仍然可以扩充
+    positions = np.stack( (
+        np.frombuffer( store.positionX, dtype = np.float64 )[ slots ],
+        np.frombuffer( store.positionY, dtype = np.float64 )[ slots ],
+        np.frombuffer( store.positionZ, dtype = np.float64 )[ slots ],
+    ), axis = 1 )
+
+    flows = np.frombuffer( store.flowDistance, dtype = np.float64 )[ slots ]
+
+    return positions, flows
+
+
+
+
+""" --- 向量化的生还者压力值计算 --- """
+
+def computeCurrSurvivorStressVectorized( survivorGroupClassList: list, tankClassList: list, membershipIndex: dict = None ):
+    """
+    与 computeCurrSurvivorStress 的参数, 返回值和计算结果完全一致的向量化版本
+    """
+    if len( survivorGroupClassList ) <= 0:      # 异常处理
+        return False
+
+    if membershipIndex is None:
+        membershipIndex = director.buildSurvivorMembershipIndex( survivorGroupClassList )
+
+
+    # --- 1. 打包需要计算压力值的生还者, 处于 I 或者 S 状态的生还者压力值统一设置为0 --- #
+
+    survivors = []          # 需要计算压力值的生还者类
+    survivorIDs = []
+    survivorLogic = []
+    survivorIndexes = []        # 在所在组别中的下标
+    survivorGroupCodes = []     # 所在组别的编码 (组别在 survivorGroupClassList 中的下标)
+
+    groupCodeByID = {}          # survivorGroupID -> 组别编码, 与逐个计算的版本一样通过 survivorGroupID 判断是否属于同一个组别
+
+    for groupCode, groupClass in enumerate( survivorGroupClassList ):
+
+        groupCodeByID.setdefault( groupClass.survivorGroupID, groupCode )
+
+        for surIndex, surClass in enumerate( groupClass.survivorMembers ):
+
+            if surClass.status == "I" or surClass.status == "S":
+                surClass.currSurvivorStress = 0.0
+                continue
+
+            survivors.append( surClass )
+            survivorIDs.append( surClass.survivorID )
+            survivorLogic.append( logicCodes.get( surClass.belongSurvivorGroupLogic, 0 ) )
+            survivorIndexes.append( surIndex )
+            survivorGroupCodes.append( groupCodeByID[ groupClass.survivorGroupID ] )
+
+    if len( survivors ) <= 0:
+        return True
+
+
+    # --- 2. 打包仇恨目标为生还者的坦克; 丢失目标 / 仇恨目标不为生还者的坦克不带来任何压力值 --- #
+
+    tanks = []                  # 有效的坦克类
+    targetIDs = []
+    targetPositions = []        # 仇恨目标 当前 的绝对坐标和导演路程, 与逐个计算的版本一样直接从 Client 获取
+    targetFlows = []
+    targetIndexes = []          # 仇恨目标在所在组别中的下标, 不存在时为 -1
+    targetGroupCodes = []       # 仇恨目标所在组别的编码, 不存在时为 -1
+
+    tankColumns = []            # 有效坦克在 tankClassList 中的下标
+
+    for tankColumn, tankClass in enumerate( tankClassList ):
+
+        focusedTarget = tankClass.returnFocusedTarget()
+
+        if ( focusedTarget == None ) or ( focusedTarget == -1 ) or ( focusedTarget.type() != director.Survivor ):
+            continue
+
+        targetID = focusedTarget.getIdentification()
+        targetMembership = membershipIndex.get( targetID )
+
+        tankColumns.append( tankColumn )
+        tanks.append( tankClass )
+        targetIDs.append( targetID )
+        targetPositions.append( focusedTarget.getAbsolutePosition() )
+        targetFlows.append( focusedTarget.getFlowDistance() )
+
+        if targetMembership is None:
+            targetIndexes.append( -1 )
+            targetGroupCodes.append( -1 )
+        else:
+            targetBelongSurvivorGroupClass, index = targetMembership
+            targetIndexes.append( index )
+            targetGroupCodes.append( groupCodeByID[ targetBelongSurvivorGroupClass.survivorGroupID ] )
+
+    if len( tankColumns ) <= 0:         # 没有任何坦克带来压力值
+        for surClass in survivors:
+            surClass.currSurvivorStress = 0.0
+        return True
+
+
+    # --- 3. 转换为数组, 绝对坐标和导演路程直接从状态存储中按照槽位读取 --- #
+
+    survivorPositions, survivorFlows = gatherStateArrays( survivors )
+    tankPositions, tankFlows = gatherStateArrays( tanks )
+
+    sPos = survivorPositions[ :, None, : ]      # (n, 1, 3)
+    sFlow = survivorFlows[ :, None ]            # (n, 1)
+    sLogic = np.asarray( survivorLogic )[ :, None ]
+    sIndex = np.asarray( survivorIndexes )[ :, None ]
+    sGroup = np.asarray( survivorGroupCodes )[ :, None ]
+
+    tPos = tankPositions[ None, :, : ]          # (1, m, 3)
+    tFlow = tankFlows[ None, : ]                # (1, m)
+
+    siPos = np.asarray( targetPositions, dtype = np.float64 )[ None, :, : ]
+    siFlow = np.asarray( targetFlows, dtype = np.float64 )[ None, : ]
+    siIndex = np.asarray( targetIndexes )[ None, : ]
+    siGroup = np.asarray( targetGroupCodes )[ None, : ]
+
+    groupMemberNum = np.asarray( [ groupClass.memberNum for groupClass in survivorGroupClassList ] )
+    groupFirstFlow = np.asarray( [ groupClass.survivorMembers[ 0 ].flowDistance for groupClass in survivorGroupClassList ], dtype = np.float64 )
+
+    # 仇恨目标是否为该生还者, 唯一标识可以是任意可比较的对象, 因此在 Python 中比较
+    isTarget = np.asarray( [ [ survivorID == targetID for targetID in targetIDs ] for survivorID in survivorIDs ], dtype = bool )
+
+    hasMembership = siGroup >= 0
+
+
+    # --- 4. maxD 矩阵 --- #
+
+    D_st = maxDistanceArray( sPos, sFlow, tPos, tFlow )         # D(t, s), (n, m)
+    D_tsi = maxDistanceArray( siPos, siFlow, tPos, tFlow )      # D(t, si), (1, m)
+    D_ssi = maxDistanceArray( sPos, sFlow, siPos, siFlow )      # D(s, si), (n, m)
+
+
+    # --- 5. gamma 矩阵, 详见 "方案" 第 1.1.8 小节 --- #
+
+    siGroupSafe = np.where( hasMembership, siGroup, 0 )       # 仇恨目标不属于任何组别时使用任意组别占位, 结果会在后面被舍弃
+
+    sMemberNum = groupMemberNum[ sGroup ]
+    siMemberNum = groupMemberNum[ siGroupSafe ]
+    sFirstFlow = groupFirstFlow[ sGroup ]
+    siFirstFlow = groupFirstFlow[ siGroupSafe ]
+
+    k = np.where(
+        sGroup == siGroup,
+        np.abs( siIndex - sIndex ),                                         # 属于同一个生还者组别
+        np.where(
+            sFirstFlow > siFirstFlow,
+            np.abs( sMemberNum - sIndex + siIndex ),                        # 该生还者所在的组别在前面
+            np.where(
+                sFirstFlow < siFirstFlow,
+                np.abs( siMemberNum - siIndex + sIndex ),                   # 该生还者所在的组别在后面
+                ( 0.5 * ( sMemberNum + siMemberNum ) ).astype( np.int64 )   # 所处导演路程完全一致
+            )
+        )
+    )
+
+    # gamma = max( 0.9 ** k, 0.5 ), 使用 Python 预先计算查找表, 保证与逐个计算的版本完全一致
+    gammaTable = np.asarray( [ max( 0.9 ** i, 0.5 ) for i in range( int( k.max() ) + 1 ) ] )
+
+    gamma = np.where( isTarget, 1.0, gammaTable[ k ] )
+
+
+    # --- 6. D 矩阵: 情况 1 (s 是 t 的仇恨), 情况 2.1 与 2.2 (s 不是 t 的仇恨) --- #
+
+    D = np.where(
+        isTarget | ( D_st <= D_tsi - director.alpha ),
+        D_st,
+        D_tsi + D_ssi
+    )
+
+    stress = stressComputeModelArray( D, sLogic ) * gamma
+
+    # 仇恨目标不属于任何组别时, 情况 2 跳过该坦克
+    valid = isTarget | hasMembership
+
+    stress = np.where( valid, stress, 0.0 )
+
+
+    # --- 7. 按照 tankClassList 的顺序依次累加, 与逐个计算的版本的浮点数运算顺序一致, 并写回生还者类 --- #
+
+    totalStressValue = np.zeros( len( survivors ) )
+
+    for column in range( stress.shape[ 1 ] ):
+        totalStressValue += stress[ :, column ]
+
+    for surClass, value in zip( survivors, totalStressValue.tolist() ):
+        surClass.currSurvivorStress = value
+
+    return True